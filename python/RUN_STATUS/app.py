@@ -9,6 +9,17 @@ from psycopg2 import pool
 from enhanced_layout_generator import analyze_and_generate_advanced_layout
 from branch_analyzer import analyze_branch_view
 from rtl_analyzer import analyze_rtl_view
+from incremental_layout import IncrementalLayoutManager, SUPPORTED_VIEWS, DEFAULT_TABLE, ALLOWED_TABLES
+from layout_payload import compact_layout, layout_delta, compress_body
+from stream_reader import should_stream, generate_streaming_layout
+
+# orjson serialises numpy types natively and is much faster for large layouts; stdlib json is the fallback
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -106,6 +117,9 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 def convert_to_json_serializable(obj):
     """Convert numpy/pandas types to JSON serializable types"""
+    # Plain strings/ints/bools make up most of a layout - skip the pandas checks for them
+    if obj is None or isinstance(obj, (str, bool, int)) and not isinstance(obj, np.generic):
+        return obj
     if isinstance(obj, dict):
         return {key: convert_to_json_serializable(value) for key, value in obj.items()}
     elif isinstance(obj, list):
@@ -121,6 +135,46 @@ def convert_to_json_serializable(obj):
     else:
         return obj
 
+def _orjson_default(obj):
+    """Handle values orjson does not serialise natively (pandas scalars, numpy subclasses)"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def layout_response(layout_data, response_format=None, base_layout=None, base_version=None):
+    """Serialise layout data straight into a JSON response without a separate conversion pass
+    
+    ``format=compact`` (query parameter or argument) sends the compact encoding, or a delta when
+    the client's ``base_layout`` is known. The body is compressed according to Accept-Encoding.
+    """
+    response_format = response_format or request.args.get('format')
+    if response_format == 'compact':
+        payload = None
+        if base_layout is not None:
+            payload = layout_delta(base_layout, layout_data, base_version,
+                                   layout_data.get('incremental', {}).get('version'))
+        layout_data = payload if payload is not None else compact_layout(layout_data)
+    
+    if HAS_ORJSON:
+        body = orjson.dumps(
+            layout_data,
+            default=_orjson_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    else:
+        body = app.json.dumps(convert_to_json_serializable(layout_data)).encode('utf-8')
+    
+    body, encoding = compress_body(body, request.headers.get('Accept-Encoding', ''))
+    response = app.response_class(body, mimetype='application/json')
+    response.headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
 def read_data_file(file_path):
     """Read data from either CSV or Excel file based on extension - Model-based approach"""
     try:
@@ -175,7 +229,8 @@ def serve_frontend():
             "/health",
             "/upload",
             "/upload-branch", 
-            "/upload-rtl"
+            "/upload-rtl",
+            "/db-layout"
         ]
     })
 
@@ -199,9 +254,14 @@ def upload_file():
         logger.info(f"File saved to: {file_path}")
 
         try:
-            # Generate visualization using advanced model-based analysis
-            logger.info("Analyzing multi-sheet data structure and generating advanced visualization layout...")
-            layout_data = analyze_and_generate_advanced_layout(file_path)
+            # Large exports are streamed in chunks instead of loaded into one DataFrame
+            if should_stream(file_path, request.args.get('mode')):
+                logger.info("Streaming file in chunks and generating visualization layout...")
+                layout_data = generate_streaming_layout(file_path)
+            else:
+                # Generate visualization using advanced model-based analysis
+                logger.info("Analyzing multi-sheet data structure and generating advanced visualization layout...")
+                layout_data = analyze_and_generate_advanced_layout(file_path)
             
             if not layout_data or not layout_data.get("nodes"):
                 logger.error("Failed to generate valid layout")
@@ -210,11 +270,8 @@ def upload_file():
                     'details': 'No valid layout data generated'
                 }), 500
             
-            # Convert numpy/pandas types to JSON serializable types
-            layout_data = convert_to_json_serializable(layout_data)
-            
             logger.info(f"Successfully generated layout with {len(layout_data['nodes'])} nodes")
-            return jsonify(layout_data)
+            return layout_response(layout_data)
 
         except ValueError as ve:
             logger.error(f"Validation error: {str(ve)}")
@@ -269,11 +326,8 @@ def upload_file_branch():
                     'details': 'No valid branch layout data generated'
                 }), 500
             
-            # Convert numpy/pandas types to JSON serializable types
-            layout_data = convert_to_json_serializable(layout_data)
-            
             logger.info(f"Successfully generated branch layout with {len(layout_data['nodes'])} nodes")
-            return jsonify(layout_data)
+            return layout_response(layout_data)
 
         except ValueError as ve:
             logger.error(f"Branch analysis validation error: {str(ve)}")
@@ -328,11 +382,8 @@ def upload_file_rtl():
                     'details': 'No valid RTL layout data generated'
                 }), 500
             
-            # Convert numpy/pandas types to JSON serializable types
-            layout_data = convert_to_json_serializable(layout_data)
-            
             logger.info(f"Successfully generated RTL layout with {len(layout_data.get('rtl_versions', []))} versions")
-            return jsonify(layout_data)
+            return layout_response(layout_data)
 
         except ValueError as ve:
             logger.error(f"RTL analysis validation error: {str(ve)}")
@@ -355,6 +406,74 @@ def upload_file_rtl():
         logger.error(f"Unexpected error in RTL upload: {str(e)}")
         return jsonify({'error': f'Unexpected error: {str(e)}'}), 500
 
+# Layouts built from database rows, refreshed incrementally between requests
+layout_manager = IncrementalLayoutManager()
+
+@app.route('/db-layout', methods=['POST'])
+def db_layout():
+    """Build a flow, branch or RTL layout from run rows stored in the RunStatus database"""
+    try:
+        payload = request.get_json(silent=True) or {}
+        table = payload.get('table', DEFAULT_TABLE)
+        view = payload.get('view', 'flow')
+        
+        if view not in SUPPORTED_VIEWS:
+            return jsonify({'error': f"Unsupported view '{view}'", 'supported_views': list(SUPPORTED_VIEWS)}), 400
+        
+        if table not in ALLOWED_TABLES:
+            return jsonify({'error': f"Unknown RunStatus table '{table}'", 'allowed_tables': list(ALLOWED_TABLES)}), 400
+        
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection not available'}), 503
+        
+        try:
+            logger.info(f"Refreshing {view} layout from table: {table}")
+            layout_data = layout_manager.get_layout(
+                conn, table, view,
+                columns=payload.get('columns'),
+                updated_column=payload.get('updated_column'),
+                order_column=payload.get('order_column'),
+                full=bool(payload.get('full', False))
+            )
+            # Reads only, but end the transaction so the pooled connection does not stay idle in it
+            conn.rollback()
+        except ValueError as ve:
+            conn.rollback()
+            logger.error(f"Database layout validation error: {str(ve)}")
+            return jsonify({'error': str(ve)}), 400
+        except psycopg2.Error as db_error:
+            conn.rollback()
+            logger.error(f"Database layout query error: {str(db_error)}")
+            return jsonify({'error': 'Error reading run data from database', 'details': str(db_error)}), 500
+        finally:
+            return_db_connection(conn)
+        
+        # Client already has this version - skip sending the layout again
+        version = layout_data['incremental']['version']
+        if payload.get('since_version') == version:
+            return jsonify({'incremental': {'version': version, 'unchanged': True}})
+        
+        # Compact clients can ask for a delta against a version they already have
+        response_format = payload.get('format') or request.args.get('format')
+        base_version = payload.get('base_version')
+        base_layout = None
+        if response_format == 'compact' and base_version is not None:
+            base_layout = layout_manager.get_version(
+                table, view,
+                columns=payload.get('columns'),
+                updated_column=payload.get('updated_column'),
+                order_column=payload.get('order_column'),
+                version=base_version
+            )
+        
+        logger.info(f"Database layout version {version} with {len(layout_data.get('nodes', []))} nodes")
+        return layout_response(layout_data, response_format, base_layout, base_version)
+    
+    except Exception as e:
+        logger.error(f"Unexpected error in database layout: {str(e)}")
+        return jsonify({'error': f'Unexpected error: {str(e)}'}), 500
+
 # Application initialization flag
 _app_initialized = False
 
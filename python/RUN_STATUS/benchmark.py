@@ -0,0 +1,394 @@
+"""
+RunStatus Benchmark - measures how the flow, branch and RTL analyzers scale
+1. Generates a synthetic tracker (users, runs, stages, RTL versions, sheets)
+2. Runs each analyzer phase by phase (read, structure, patterns, layout, serialise)
+3. Records wall time and peak traced memory per phase, optionally with a profiler around each phase
+   (timings include tracemalloc overhead - compare results of this harness with each other only)
+4. Writes JSON results and compares them against an earlier results file
+
+Usage:
+    python benchmark.py --users 50 --runs 20 --stages 10 --rtl-versions 4 --output results.json
+    python benchmark.py --analyzers flow --profile cprofile --profile-dir profiles/
+    python benchmark.py --compare baseline.json --output results.json
+"""
+
+import argparse
+import cProfile
+import csv
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+import pandas as pd
+
+from enhanced_layout_generator import EnhancedLayoutGenerator
+from simple_branch_analyzer import SimpleBranchAnalyzer
+from rtl_analyzer import RTLViewAnalyzer
+from stream_reader import infer_column_roles
+
+# pyinstrument is optional - cProfile is always available
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+    HAS_PYINSTRUMENT = True
+except ImportError:
+    PyinstrumentProfiler = None
+    HAS_PYINSTRUMENT = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
+
+logger = logging.getLogger(__name__)
+
+ANALYZERS = ('flow', 'branch', 'rtl')
+STAGE_NAMES = ['synthesis', 'floorplan', 'placement', 'cts', 'routing', 'drc', 'lvs', 'sta', 'verification', 'signoff']
+STATUSES = ['completed', 'completed', 'completed', 'running', 'failed']
+
+
+def generate_flow_tracker(path: str, users: int, runs: int, stages: int, sheets: int = 1, seed: int = 1) -> str:
+    """Write a long format tracker (one row per user/run/stage) as CSV, or Excel when sheets > 1"""
+    rng = random.Random(seed)
+    stage_names = _stage_names(stages)
+
+    def sheet_rows(sheet_idx: int) -> List[List[str]]:
+        rows = []
+        for user_idx in range(users):
+            username = f"user{sheet_idx}_{user_idx}"
+            for run_idx in range(1, runs + 1):
+                # Later runs sometimes stop early, like real trackers
+                last_stage = stages if rng.random() > 0.2 else rng.randint(1, stages)
+                for stage in stage_names[:last_stage]:
+                    rows.append([username, f"r{run_idx}", stage, rng.choice(STATUSES)])
+        return rows
+
+    columns = ['username', 'run', 'stage', 'status']
+    if sheets > 1:
+        with pd.ExcelWriter(path) as writer:
+            for sheet_idx in range(sheets):
+                pd.DataFrame(sheet_rows(sheet_idx), columns=columns).to_excel(writer, sheet_name=f"sheet{sheet_idx + 1}", index=False)
+    else:
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(sheet_rows(0))
+    return path
+
+
+def generate_branch_tracker(path: str, users: int, runs: int, stages: int, rtl_versions: int = 0,
+                            copy_ratio: float = 0.5, seed: int = 1) -> str:
+    """Write a wide format tracker (one row per run, one column per stage) as used by the branch and RTL views
+
+    Runs copy the leading stage values of an earlier run with probability ``copy_ratio``, which is
+    what creates branches.
+    """
+    rng = random.Random(seed)
+    stage_names = _stage_names(stages)
+    columns = ['run_name'] + (['RTL_version'] if rtl_versions else []) + stage_names
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for user_idx in range(users):
+            previous_runs = []
+            for run_idx in range(1, runs + 1):
+                values = [f"u{user_idx}_r{run_idx}_{stage}" for stage in stage_names]
+                if previous_runs and rng.random() < copy_ratio:
+                    source = rng.choice(previous_runs)
+                    copied = rng.randint(1, stages - 1) if stages > 1 else 1
+                    values[:copied] = source[:copied]
+                previous_runs.append(values)
+
+                row = [f"s_user{user_idx}_R{run_idx}"]
+                if rtl_versions:
+                    row.append(f"RTL_{(run_idx - 1) * rtl_versions // runs + 1}")
+                writer.writerow(row + values)
+    return path
+
+
+def _stage_names(stages: int) -> List[str]:
+    return [STAGE_NAMES[i] if i < len(STAGE_NAMES) else f"stage{i + 1}" for i in range(stages)]
+
+
+def _serialise(data: Any) -> int:
+    if HAS_ORJSON:
+        return len(orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
+    return len(json.dumps(data, default=str))
+
+
+class PhaseRecorder:
+    """Times each phase and records its peak traced memory, optionally under a profiler"""
+
+    def __init__(self, analyzer: str, profile: Optional[str] = None, profile_dir: Optional[str] = None):
+        self.analyzer = analyzer
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        profiler = self._start_profiler()
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            self._stop_profiler(profiler, name)
+            self.phases[name] = {
+                'seconds': round(elapsed, 6),
+                'peak_mb': round((peak - start_memory) / (1024 * 1024), 3),
+                'retained_mb': round((current - start_memory) / (1024 * 1024), 3)
+            }
+            logger.info(f"{self.analyzer}.{name}: {elapsed:.3f}s, peak {self.phases[name]['peak_mb']:.1f} MB")
+
+    def _start_profiler(self):
+        if self.profile == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return profiler
+        if self.profile == 'pyinstrument':
+            profiler = PyinstrumentProfiler()
+            profiler.start()
+            return profiler
+        return None
+
+    def _stop_profiler(self, profiler, name: str):
+        if profiler is None:
+            return
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base_path = os.path.join(self.profile_dir, f"{self.analyzer}_{name}")
+        if self.profile == 'cprofile':
+            profiler.disable()
+            profiler.dump_stats(f"{base_path}.prof")
+        else:
+            profiler.stop()
+            with open(f"{base_path}.html", 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+
+
+def benchmark_flow(file_path: str, recorder: PhaseRecorder) -> Dict[str, Any]:
+    """Flow view: same steps as analyze_and_generate_advanced_layout, one phase each"""
+    with recorder.phase('read'):
+        if file_path.endswith(('.xlsx', '.xls')):
+            sheets_data = {name: df for name, df in pd.read_excel(file_path, sheet_name=None).items() if not df.empty}
+        else:
+            sheets_data = {'main': pd.read_csv(file_path)}
+
+    with recorder.phase('structure'):
+        # Same column role (and status column) detection as the upload paths
+        analysis = infer_column_roles(next(iter(sheets_data.values())))
+
+    # Patterns and metrics are handed to the layout step so each is measured once, in its own phase
+    generator = EnhancedLayoutGenerator()
+    with recorder.phase('patterns'):
+        connection_analysis = generator.analyze_connection_patterns(sheets_data, analysis)
+        layout_metrics = generator.calculate_enhanced_layout_metrics(sheets_data, analysis)
+
+    with recorder.phase('layout'):
+        layout_data = generator.generate_layout_from_sheets(sheets_data, analysis, connection_analysis,
+                                                            layout_metrics)
+
+    with recorder.phase('serialise'):
+        size = _serialise(layout_data)
+
+    return {'nodes': len(layout_data['nodes']), 'connections': len(layout_data['connections']), 'bytes': size}
+
+
+def benchmark_branch(file_path: str, recorder: PhaseRecorder) -> Dict[str, Any]:
+    """Branch view: same steps as SimpleBranchAnalyzer.analyze_csv"""
+    analyzer = SimpleBranchAnalyzer()
+
+    with recorder.phase('read'):
+        with open(file_path, 'r', newline='', encoding='utf-8') as csvfile:
+            reader = csv.DictReader(csvfile)
+            columns = reader.fieldnames
+            all_data = list(reader)
+
+    run_column = columns[0]
+    stage_columns = [col for col in columns[1:] if col != 'RTL_version']
+
+    with recorder.phase('structure'):
+        username = analyzer._extract_username([row[run_column] for row in all_data])
+
+    with recorder.phase('patterns'):
+        branch_analysis = analyzer._analyze_branching_patterns(all_data, run_column, stage_columns)
+
+    with recorder.phase('layout'):
+        layout_data = analyzer._generate_layout(branch_analysis, stage_columns, username)
+
+    with recorder.phase('serialise'):
+        size = _serialise(layout_data)
+
+    return {'nodes': len(layout_data['nodes']), 'connections': len(layout_data['connections']), 'bytes': size}
+
+
+def benchmark_rtl(file_path: str, recorder: PhaseRecorder) -> Dict[str, Any]:
+    """RTL view: same steps as RTLViewAnalyzer.analyze_rtl_patterns"""
+    analyzer = RTLViewAnalyzer()
+
+    with recorder.phase('read'):
+        df = pd.read_csv(file_path)
+        df.columns = [col.strip() for col in df.columns]
+        sheets_data = {'main': df}
+
+    with recorder.phase('structure'):
+        data_analysis = analyzer._analyze_data_structure(sheets_data, 'RTL_version')
+
+    with recorder.phase('patterns'):
+        rtl_versions = analyzer._extract_rtl_versions(sheets_data, data_analysis)
+
+    # Per version branch patterns and layouts are computed together inside _generate_rtl_layout
+    with recorder.phase('layout'):
+        layout_data = analyzer._generate_rtl_layout(sheets_data, data_analysis, rtl_versions)
+
+    with recorder.phase('serialise'):
+        size = _serialise(layout_data)
+
+    nodes = sum(len(v['branch_layout']['nodes']) for v in layout_data['version_analyses'].values())
+    return {'versions': len(rtl_versions), 'nodes': nodes, 'bytes': size}
+
+
+BENCHMARKS = {
+    'flow': benchmark_flow,
+    'branch': benchmark_branch,
+    'rtl': benchmark_rtl
+}
+
+
+def run_benchmarks(users: int, runs: int, stages: int, rtl_versions: int, sheets: int,
+                   analyzers: List[str], repeat: int = 1, profile: Optional[str] = None,
+                   profile_dir: str = 'profiles', work_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Generate the synthetic trackers and benchmark the requested analyzers"""
+    work_dir = work_dir or tempfile.mkdtemp(prefix='runstatus_bench_')
+    files = {
+        'flow': os.path.join(work_dir, 'flow_tracker.xlsx' if sheets > 1 else 'flow_tracker.csv'),
+        'branch': os.path.join(work_dir, 'branch_tracker.csv'),
+        'rtl': os.path.join(work_dir, 'rtl_tracker.csv')
+    }
+
+    if 'flow' in analyzers:
+        generate_flow_tracker(files['flow'], users, runs, stages, sheets)
+    if 'branch' in analyzers:
+        generate_branch_tracker(files['branch'], users, runs, stages)
+    if 'rtl' in analyzers:
+        generate_branch_tracker(files['rtl'], users, runs, stages, rtl_versions=max(1, rtl_versions))
+
+    results = {}
+    tracemalloc.start()
+    try:
+        for name in analyzers:
+            attempts = []
+            for attempt in range(repeat):
+                # Only profile the first attempt so profile files are not overwritten
+                recorder = PhaseRecorder(name, profile if attempt == 0 else None, profile_dir)
+                start = time.perf_counter()
+                output = BENCHMARKS[name](files[name], recorder)
+                attempts.append({
+                    'total_seconds': round(time.perf_counter() - start, 6),
+                    'phases': recorder.phases,
+                    'output': output
+                })
+            # Report the fastest attempt, the others are mostly noise
+            results[name] = min(attempts, key=lambda a: a['total_seconds'])
+            results[name]['attempts'] = len(attempts)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'orjson': HAS_ORJSON,
+            'parameters': {
+                'users': users,
+                'runs': runs,
+                'stages': stages,
+                'rtl_versions': rtl_versions,
+                'sheets': sheets,
+                'repeat': repeat
+            }
+        },
+        'results': results
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Per phase time ratios between two result files (> 1.0 means slower than the baseline)"""
+    lines = []
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        for phase, stats in result['phases'].items():
+            base_stats = base['phases'].get(phase)
+            if not base_stats or not base_stats['seconds']:
+                continue
+            ratio = stats['seconds'] / base_stats['seconds']
+            lines.append(f"{name}.{phase}: {base_stats['seconds']:.3f}s -> {stats['seconds']:.3f}s "
+                         f"(x{ratio:.2f}), peak {base_stats['peak_mb']:.1f} -> {stats['peak_mb']:.1f} MB")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the RunStatus flow, branch and RTL analyzers')
+    parser.add_argument('--users', type=int, default=20, help='users per sheet (default: 20)')
+    parser.add_argument('--runs', type=int, default=10, help='runs per user (default: 10)')
+    parser.add_argument('--stages', type=int, default=8, help='stages per run (default: 8)')
+    parser.add_argument('--rtl-versions', type=int, default=3, help='RTL versions for the RTL view (default: 3)')
+    parser.add_argument('--sheets', type=int, default=1, help='sheets in the flow tracker, > 1 writes Excel (default: 1)')
+    parser.add_argument('--analyzers', nargs='+', choices=ANALYZERS, default=list(ANALYZERS))
+    parser.add_argument('--repeat', type=int, default=1, help='attempts per analyzer, fastest is reported')
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'], help='profile each phase')
+    parser.add_argument('--profile-dir', default='profiles', help='where profile files are written')
+    parser.add_argument('--output', help='write JSON results to this file (default: stdout)')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--verbose', action='store_true', help='keep analyzer logging')
+    args = parser.parse_args(argv)
+
+    if args.profile == 'pyinstrument' and not HAS_PYINSTRUMENT:
+        parser.error("pyinstrument is not installed (pip install pyinstrument)")
+
+    # The analyzers log every run/stage at INFO, which would dominate the timings
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    if not args.verbose:
+        for module in ('data_analyzer', 'enhanced_layout_generator', 'simple_branch_analyzer', 'rtl_analyzer'):
+            logging.getLogger(module).setLevel(logging.WARNING)
+
+    results = run_benchmarks(args.users, args.runs, args.stages, args.rtl_versions, args.sheets,
+                             args.analyzers, args.repeat, args.profile, args.profile_dir)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"Results written to {args.output}")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        for line in compare_results(baseline, results):
+            print(line)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
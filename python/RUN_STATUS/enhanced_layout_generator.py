@@ -21,6 +21,19 @@ logger = logging.getLogger(__name__)
 
 # Removed AI/Ollama dependencies - using pattern-based analysis instead
 
+# Connection styles are identical for every connection of a kind, so one shared record is used
+STRAIGHT_CONNECTION_STYLE = {
+    "stroke": "white",
+    "strokeWidth": 2,
+    "arrowSize": 8
+}
+INTER_RUN_CONNECTION_STYLE = {
+    "stroke": "#FFD700",  # Gold color for inter-run connections
+    "strokeWidth": 3,
+    "arrowSize": 10,
+    "strokeDasharray": "5,5"  # Dashed line to distinguish
+}
+
 class EnhancedLayoutGenerator:
     """Enhanced layout generator with proper connection logic and dynamic sizing"""
     
@@ -111,19 +124,25 @@ class EnhancedLayoutGenerator:
         run_col = analysis["run_column"]
         stage_col = analysis["stage_column"]
         
-        # Analyze text lengths across all data
-        all_text_lengths = []
+        # Analyze text lengths across all data (column reductions, no per-cell Python lists)
+        max_text_length = 0
+        total_text_length = 0
+        text_count = 0
         max_text_per_column = {}
         
         for sheet_name, df in sheets_data.items():
             for col in [user_col, run_col, stage_col]:
-                if col in df.columns:
+                if col in df.columns and len(df):
                     lengths = df[col].astype(str).str.len()
-                    all_text_lengths.extend(lengths.tolist())
-                    max_text_per_column[f"{sheet_name}_{col}"] = lengths.max()
+                    column_max = int(lengths.max())
+                    max_text_per_column[f"{sheet_name}_{col}"] = column_max
+                    max_text_length = max(max_text_length, column_max)
+                    total_text_length += int(lengths.sum())
+                    text_count += len(lengths)
         
-        max_text_length = max(all_text_lengths) if all_text_lengths else 10
-        avg_text_length = sum(all_text_lengths) / len(all_text_lengths) if all_text_lengths else 8
+        if not text_count:
+            max_text_length = 10
+        avg_text_length = total_text_length / text_count if text_count else 8
         
         # MANUAL PRECISE GRID SIZING CALCULATION (No Model)
         # Analyze actual text space requirements
@@ -207,13 +226,16 @@ class EnhancedLayoutGenerator:
         
         for df in sheets_data.values():
             if user_col in df.columns:
-                users = [u for u in df[user_col].unique() if not str(u).lower().startswith('block')]
-                total_users += len(users)
+                user_rows = df[~df[user_col].astype(str).str.lower().str.startswith('block')]
+                if user_rows.empty:
+                    continue
+                total_users += user_rows[user_col].nunique(dropna=False)
                 
-                for user in users:
-                    user_data = df[df[user_col] == user]
-                    runs_count = user_data[run_col].nunique() if run_col in user_data.columns else 1
-                    max_runs_per_user = max(max_runs_per_user, runs_count)
+                if run_col in user_rows.columns:
+                    runs_per_user = user_rows.groupby(user_col, sort=False, dropna=False)[run_col].nunique()
+                    max_runs_per_user = max(max_runs_per_user, int(runs_per_user.max()))
+                else:
+                    max_runs_per_user = max(max_runs_per_user, 1)
         
         # Calculate layout dimensions
         layout_width = max(1500, (max_stages + 2) * spacing_x + 200)
@@ -273,11 +295,23 @@ class EnhancedLayoutGenerator:
             df = pd.read_csv(file_path)
             sheets_data = {'main': df}
         
+        return self.generate_layout_from_sheets(sheets_data, analysis)
+    
+    def generate_layout_from_sheets(self, sheets_data: Dict[str, pd.DataFrame], analysis: Dict[str, Any],
+                                    connection_analysis: Optional[Dict[str, Any]] = None,
+                                    layout_metrics: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Generate enhanced layout from already loaded sheet data (file upload or database rows)
+        
+        Connection patterns and layout metrics are computed here unless the caller already has them.
+        """
+        
         # Analyze connection patterns
-        connection_analysis = self.analyze_connection_patterns(sheets_data, analysis)
+        if connection_analysis is None:
+            connection_analysis = self.analyze_connection_patterns(sheets_data, analysis)
         
         # Calculate enhanced layout metrics
-        layout_metrics = self.calculate_enhanced_layout_metrics(sheets_data, analysis)
+        if layout_metrics is None:
+            layout_metrics = self.calculate_enhanced_layout_metrics(sheets_data, analysis)
         
         # Extract configuration
         user_col = analysis["user_column"]
@@ -294,39 +328,10 @@ class EnhancedLayoutGenerator:
         spacing_x = layout_metrics["spacing"]["x"]
         spacing_y = layout_metrics["spacing"]["y"]
         user_separation = layout_metrics["spacing"]["user_separation"]
-        layout_width = layout_metrics["layout_dimensions"]["width"]
-        layout_height = layout_metrics["layout_dimensions"]["height"]
         
         logger.info(f"Enhanced layout metrics: node_width={node_width}, grid_size={grid_size}, font_size={font_size}")
         
-        layout_data = {
-            "nodes": [],
-            "connections": [],
-            "layout": {
-                "width": layout_width,
-                "height": layout_height,
-                "background": {
-                    "color": "black",
-                    "gridSize": grid_size,
-                    "gridColor": "gray",
-                    "gridOpacity": 0.3
-                },
-                "stage_colors": {stage: config["color"] for stage, config in stages_config.items()}
-            },
-            "config": {
-                "node_width": node_width,
-                "node_height": node_height,
-                "font_size": font_size,
-                "grid_size": grid_size,
-                "spacing_x": spacing_x,
-                "spacing_y": spacing_y,
-                "dynamic_sizing": True,
-                "enhanced_connections": True
-            },
-            "analysis": analysis,
-            "connection_analysis": connection_analysis,
-            "layout_metrics": layout_metrics
-        }
+        layout_data = self._create_layout_data(analysis, connection_analysis, layout_metrics)
         
         # Process each sheet
         current_y_offset = 100
@@ -337,41 +342,26 @@ class EnhancedLayoutGenerator:
             
             # Add starting block for this sheet
             if starting_block and sheet_name == starting_block.get("sheet", list(sheets_data.keys())[0]):
-                block_node = {
-                    "id": f"block_{sheet_name}",
-                    "label": starting_block.get("label", "ETH_SBS"),
-                    "x": 50,
-                    "y": current_y_offset,
-                    "type": "block",
-                    "sheet": sheet_name,
-                    "tree_id": f"tree_{sheet_name}",
-                    "style": {
-                        "width": node_width,
-                        "height": node_height,
-                        "fill": "#2C3E50",
-                        "stroke": "white",
-                        "strokeWidth": 3,
-                        "cornerRadius": 8,
-                        "fontSize": font_size,
-                        "textColor": "white",
-                        "fontWeight": "bold"
-                    }
-                }
+                block_node = self._create_block_node(sheet_name, starting_block, current_y_offset,
+                                                     node_width, node_height, font_size)
                 layout_data["nodes"].append(block_node)
             
             # Process users in this sheet
             if user_col in df.columns:
                 users = [user for user in df[user_col].unique() if not str(user).lower().startswith('block')]
+                # Split rows per user once instead of filtering the whole sheet for every user
+                user_groups = dict(tuple(df.groupby(user_col, sort=False)))
                 
                 for user_idx, user in enumerate(sorted(users)):
                     user_key = f"{sheet_name}_{user}"
-                    user_data = df[df[user_col] == user]
+                    user_data = user_groups.get(user, df.iloc[0:0])
                     
                     # Calculate user's Y position
                     user_y_offset = current_y_offset + (user_idx * user_separation)
                     
                     # Analyze runs for this user
-                    runs_analysis = self._analyze_user_runs(user_data, run_col, stage_col, stages_config)
+                    runs_analysis = self._analyze_user_runs(user_data, run_col, stage_col, stages_config,
+                                                            analysis.get("status_column"))
                     
                     # Store user flow for connection analysis
                     all_user_flows[user_key] = {
@@ -395,16 +385,89 @@ class EnhancedLayoutGenerator:
         logger.info(f"Enhanced layout generated: {len(layout_data['nodes'])} nodes, {len(layout_data['connections'])} connections")
         return layout_data
     
-    def _analyze_user_runs(self, user_data: pd.DataFrame, run_col: str, stage_col: str, stages_config: Dict[str, Any]) -> Dict[str, Any]:
+    def _create_block_node(self, sheet_name: str, starting_block: Dict[str, Any], y_offset: int,
+                           node_width: int, node_height: int, font_size: int) -> Dict[str, Any]:
+        """Create the starting block node that the first stage of every user flow connects to"""
+        
+        return {
+            "id": f"block_{sheet_name}",
+            "label": starting_block.get("label", "ETH_SBS"),
+            "x": 50,
+            "y": y_offset,
+            "type": "block",
+            "sheet": sheet_name,
+            "tree_id": f"tree_{sheet_name}",
+            "style": {
+                "width": node_width,
+                "height": node_height,
+                "fill": "#2C3E50",
+                "stroke": "white",
+                "strokeWidth": 3,
+                "cornerRadius": 8,
+                "fontSize": font_size,
+                "textColor": "white",
+                "fontWeight": "bold"
+            }
+        }
+    
+    def _create_layout_data(self, analysis: Dict[str, Any], connection_analysis: Dict[str, Any],
+                            layout_metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """Create the empty layout structure (canvas, config and analysis) that user flows are added to"""
+        
+        stages_config = {s["name"]: s for s in analysis["stages"]}
+        node_width = layout_metrics["node_sizing"]["width"]
+        node_height = layout_metrics["node_sizing"]["height"]
+        font_size = layout_metrics["node_sizing"]["font_size"]
+        grid_size = layout_metrics["grid_sizing"]["size"]
+        spacing_x = layout_metrics["spacing"]["x"]
+        spacing_y = layout_metrics["spacing"]["y"]
+        layout_width = layout_metrics["layout_dimensions"]["width"]
+        layout_height = layout_metrics["layout_dimensions"]["height"]
+        
+        return {
+            "nodes": [],
+            "connections": [],
+            "layout": {
+                "width": layout_width,
+                "height": layout_height,
+                "background": {
+                    "color": "black",
+                    "gridSize": grid_size,
+                    "gridColor": "gray",
+                    "gridOpacity": 0.3
+                },
+                "stage_colors": {stage: config["color"] for stage, config in stages_config.items()}
+            },
+            "config": {
+                "node_width": node_width,
+                "node_height": node_height,
+                "font_size": font_size,
+                "grid_size": grid_size,
+                "spacing_x": spacing_x,
+                "spacing_y": spacing_y,
+                "dynamic_sizing": True,
+                "enhanced_connections": True
+            },
+            "analysis": analysis,
+            "connection_analysis": connection_analysis,
+            "layout_metrics": layout_metrics
+        }
+    
+    def _analyze_user_runs(self, user_data: pd.DataFrame, run_col: str, stage_col: str, stages_config: Dict[str, Any],
+                           status_col: Optional[str] = None) -> Dict[str, Any]:
         """Analyze runs for a specific user"""
         
         runs_data = {}
         
-        # Collect run data
-        for _, row in user_data.iterrows():
-            run = str(row[run_col])
-            stage = str(row[stage_col])
-            
+        # Collect run data column-wise (iterrows builds a Series per row)
+        run_values = user_data[run_col].astype(str).tolist()
+        stage_values = user_data[stage_col].astype(str).tolist()
+        if status_col and status_col in user_data.columns:
+            status_values = user_data[status_col].astype(str).tolist()
+        else:
+            status_values = None
+        
+        for row_idx, (run, stage) in enumerate(zip(run_values, stage_values)):
             if stage not in stages_config:
                 continue
             
@@ -413,12 +476,17 @@ class EnhancedLayoutGenerator:
                     'stages': [],
                     'first_stage': None,
                     'last_stage': None,
-                    'stage_orders': []
+                    'stage_orders': [],
+                    'statuses': {}
                 }
             
             if stage not in runs_data[run]['stages']:
                 runs_data[run]['stages'].append(stage)
                 runs_data[run]['stage_orders'].append(stages_config[stage]['order'])
+            
+            # Latest status wins when a stage is reported more than once
+            if status_values is not None:
+                runs_data[run]['statuses'][stage] = status_values[row_idx]
         
         # Sort stages within each run and determine first/last
         for run in runs_data:
@@ -464,6 +532,12 @@ class EnhancedLayoutGenerator:
         sorted_runs = runs_analysis["sorted_runs"]
         
         user = user_key.split('_', 1)[1]  # Extract user name from user_key
+        tree_id = f"tree_{sheet_name}_{user}"
+        nodes = layout_data["nodes"]
+        connections = layout_data["connections"]
+        
+        # Style records are shared by all nodes of a stage instead of rebuilt per node
+        stage_styles = {}
         
         # Track previous run's last node for inter-run connections
         prev_run_last_node = None
@@ -499,8 +573,9 @@ class EnhancedLayoutGenerator:
                     "run_index": run_idx,
                     "stage_index": stage_idx,
                     "sheet": sheet_name,
-                    "tree_id": f"tree_{sheet_name}_{user}",
-                    "style": {
+                    "tree_id": tree_id,
+                    "status": run_data['statuses'].get(stage),
+                    "style": stage_styles.get(stage) or stage_styles.setdefault(stage, {
                         "width": node_width,
                         "height": node_height,
                         "fill": stage_config["color"],
@@ -509,9 +584,9 @@ class EnhancedLayoutGenerator:
                         "cornerRadius": 5,
                         "fontSize": font_size,
                         "textColor": "white"
-                    }
+                    })
                 }
-                layout_data["nodes"].append(node)
+                nodes.append(node)
                 
                 # Track first and last nodes of this run
                 if stage_idx == 0:
@@ -521,50 +596,37 @@ class EnhancedLayoutGenerator:
                 
                 # INTRA-RUN CONNECTIONS: Connect to previous stage in same run
                 if prev_stage_node:
-                    layout_data["connections"].append({
+                    connections.append({
                         "from": prev_stage_node["id"],
                         "to": node["id"],
                         "type": "straight",
                         "connection_category": "intra_run",
-                        "tree_id": f"tree_{sheet_name}_{user}",
-                        "style": {
-                            "stroke": "white",
-                            "strokeWidth": 2,
-                            "arrowSize": 8
-                        }
+                        "tree_id": tree_id,
+                        "style": STRAIGHT_CONNECTION_STYLE
                     })
                 
                 # BLOCK CONNECTION: First stage of first run connects to block
                 elif run_idx == 0 and stage_idx == 0 and starting_block:
-                    layout_data["connections"].append({
+                    connections.append({
                         "from": f"block_{sheet_name}",
                         "to": node["id"],
                         "type": "straight",
                         "connection_category": "block_to_first",
-                        "tree_id": f"tree_{sheet_name}_{user}",
-                        "style": {
-                            "stroke": "white",
-                            "strokeWidth": 2,
-                            "arrowSize": 8
-                        }
+                        "tree_id": tree_id,
+                        "style": STRAIGHT_CONNECTION_STYLE
                     })
                 
                 prev_stage_node = node
             
             # INTER-RUN CONNECTIONS: Connect last stage of previous run to first stage of current run
             if prev_run_last_node and run_first_node:
-                layout_data["connections"].append({
+                connections.append({
                     "from": prev_run_last_node["id"],
                     "to": run_first_node["id"],
                     "type": "curved",
                     "connection_category": "inter_run",
-                    "tree_id": f"tree_{sheet_name}_{user}",
-                    "style": {
-                        "stroke": "#FFD700",  # Gold color for inter-run connections
-                        "strokeWidth": 3,
-                        "arrowSize": 10,
-                        "strokeDasharray": "5,5"  # Dashed line to distinguish
-                    }
+                    "tree_id": tree_id,
+                    "style": INTER_RUN_CONNECTION_STYLE
                 })
             
             # Update previous run's last node
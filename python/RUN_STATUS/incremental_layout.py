@@ -0,0 +1,425 @@
+"""
+Incremental Layout Manager - builds RunStatus layouts directly from the runstatus database
+Keeps the last layout per table/view in memory and on every refresh only recomputes what changed:
+1. Flow view: only the user lanes whose rows changed are regenerated (unchanged lanes are reused/shifted)
+2. Branch view: branch patterns of the unchanged prefix of runs are reused
+3. RTL view: only the RTL versions whose rows changed are regenerated
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+import pandas as pd
+from psycopg2 import sql
+
+from data_analyzer import DataStructureAnalyzer
+from enhanced_layout_generator import EnhancedLayoutGenerator
+from simple_branch_analyzer import SimpleBranchAnalyzer
+from rtl_analyzer import RTLViewAnalyzer
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_VIEWS = ('flow', 'branch', 'rtl')
+DEFAULT_TABLE = 'runstatus_runs'
+
+# Tables the /db-layout endpoint may read (comma separated RUNSTATUS_TABLES overrides the default)
+ALLOWED_TABLES = tuple(name.strip() for name in os.environ.get('RUNSTATUS_TABLES', DEFAULT_TABLE).split(',')
+                       if name.strip())
+
+# Sheet name used for database rows (same as the CSV path of the layout generator)
+DB_SHEET_NAME = 'main'
+
+# Number of previous layout versions kept per table/view so clients can ask for deltas
+HISTORY_SIZE = 5
+
+
+def fetch_run_rows(conn, table: str, updated_column: Optional[str] = None, since: Any = None,
+                   order_column: Optional[str] = None) -> pd.DataFrame:
+    """Read run rows from a RunStatus table, optionally only the rows updated after ``since``"""
+
+    # Identifiers are quoted by psycopg2 so table/column names coming from the request are safe
+    query = sql.SQL("SELECT * FROM {}").format(sql.Identifier(*table.split('.')))
+    params = []
+
+    if updated_column and since is not None:
+        query = sql.SQL("{} WHERE {} > %s").format(query, sql.Identifier(updated_column))
+        params.append(since)
+
+    if order_column:
+        query = sql.SQL("{} ORDER BY {}").format(query, sql.Identifier(order_column))
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        columns = [desc[0] for desc in cursor.description]
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    df = pd.DataFrame(rows, columns=columns)
+
+    # Same cleanup as uploaded files: stripped strings and no nulls (watermark column kept as is)
+    for col in df.columns:
+        if col != updated_column:
+            df[col] = df[col].where(df[col].notna(), '').astype(str).str.strip()
+
+    logger.info(f"Fetched {len(df)} rows from {table}" + (f" updated after {since}" if params else ""))
+    return df
+
+
+def _fingerprint(df: pd.DataFrame) -> int:
+    """Order independent fingerprint of the given rows"""
+    if df.empty:
+        return 0
+    return int(pd.util.hash_pandas_object(df.astype(str), index=False).sum())
+
+
+def _flow_columns(analysis: Dict[str, Any]) -> List[str]:
+    """Columns a flow analysis depends on"""
+    return [col for col in (analysis.get('user_column'), analysis.get('run_column'),
+                            analysis.get('stage_column'), analysis.get('status_column')) if col]
+
+
+def _python_value(value: Any) -> Any:
+    """Convert pandas/numpy scalars so psycopg2 can adapt them as query parameters"""
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if not isinstance(value, datetime) and hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+class IncrementalLayoutManager:
+    """Caches layouts built from database rows and refreshes them incrementally"""
+
+    def __init__(self):
+        self.data_analyzer = DataStructureAnalyzer()
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_layout(self, conn, table: str = DEFAULT_TABLE, view: str = 'flow',
+                   columns: Optional[Dict[str, Any]] = None, updated_column: Optional[str] = None,
+                   order_column: Optional[str] = None, full: bool = False) -> Dict[str, Any]:
+        """Return the current layout for a table/view, recomputing only the parts whose rows changed
+
+        ``columns`` optionally maps roles to column names (flow: user/run/stage/status,
+        branch: run/stages, rtl: rtl) for tables where pattern based detection is ambiguous.
+        With ``updated_column`` only rows newer than the last seen value are fetched and merged;
+        deleted rows are only noticed on a ``full`` refresh.
+        """
+        if view not in SUPPORTED_VIEWS:
+            raise ValueError(f"Unsupported view '{view}'. Use one of: {', '.join(SUPPORTED_VIEWS)}")
+        if table not in ALLOWED_TABLES:
+            raise ValueError(f"Table '{table}' is not a RunStatus table. Use one of: {', '.join(ALLOWED_TABLES)}")
+
+        columns = columns or {}
+        key = self._entry_key(table, view, columns, updated_column, order_column)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or full:
+                # Keep counting versions (and history) across full refreshes so clients never see a version twice
+                version = entry['version'] if entry else 0
+                history = entry['history'] if entry else OrderedDict()
+                entry = {'version': version, 'rows': None, 'watermark': None, 'layout': None, 'history': history}
+                self._entries[key] = entry
+
+            df = self._load_rows(conn, table, entry, updated_column, order_column)
+            if df is None:
+                # Delta fetch returned nothing new
+                return self._with_incremental_info(entry, [], [], False)
+
+            analysis_df = df.drop(columns=[updated_column]) if updated_column in df.columns else df
+            if analysis_df.empty:
+                raise ValueError(f"Table {table} contains no data")
+
+            if view == 'flow':
+                changed, removed, rebuilt = self._refresh_flow(entry, analysis_df, columns)
+            elif view == 'branch':
+                changed, removed, rebuilt = self._refresh_branch(entry, analysis_df, columns)
+            else:
+                changed, removed, rebuilt = self._refresh_rtl(entry, analysis_df, columns)
+
+            if changed or removed or rebuilt:
+                entry['version'] += 1
+                entry['history'][entry['version']] = entry['layout']
+                while len(entry['history']) > HISTORY_SIZE:
+                    entry['history'].popitem(last=False)
+                logger.info(f"{view} layout for {table} updated to version {entry['version']}: "
+                            f"{len(changed)} changed, {len(removed)} removed, full rebuild={rebuilt}")
+
+            return self._with_incremental_info(entry, changed, removed, rebuilt)
+
+    def get_version(self, table: str = DEFAULT_TABLE, view: str = 'flow', columns: Optional[Dict[str, Any]] = None,
+                    updated_column: Optional[str] = None, order_column: Optional[str] = None,
+                    version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Return an earlier layout version if it is still in the history (used to build deltas)"""
+        key = self._entry_key(table, view, columns or {}, updated_column, order_column)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return entry['history'].get(version)
+
+    def invalidate(self, table: Optional[str] = None):
+        """Drop cached layouts (all of them or those of one table)"""
+        with self._lock:
+            for key in list(self._entries.keys()):
+                if table is None or key[0] == table:
+                    del self._entries[key]
+
+    @staticmethod
+    def _entry_key(table: str, view: str, columns: Dict[str, Any], updated_column: Optional[str],
+                   order_column: Optional[str]) -> Tuple:
+        return table, view, repr(sorted(columns.items())), updated_column, order_column
+
+    def _with_incremental_info(self, entry: Dict[str, Any], changed: List[str], removed: List[str],
+                               rebuilt: bool) -> Dict[str, Any]:
+        """Attach version and change information to the cached layout"""
+        layout_data = dict(entry['layout'])
+        layout_data['incremental'] = {
+            'version': entry['version'],
+            'changed': changed,
+            'removed': removed,
+            'full_rebuild': rebuilt
+        }
+        return layout_data
+
+    def _load_rows(self, conn, table: str, entry: Dict[str, Any], updated_column: Optional[str],
+                   order_column: Optional[str]) -> Optional[pd.DataFrame]:
+        """Fetch all rows, or only new/updated rows merged into the cached ones"""
+
+        delta = entry['layout'] is not None and updated_column and entry.get('merge_key')
+        df = fetch_run_rows(conn, table, updated_column, entry['watermark'] if delta else None, order_column)
+
+        if delta:
+            if df.empty:
+                return None
+            cached = entry['rows']
+            merge_key = [col for col in entry['merge_key'] if col in df.columns]
+            # Updated rows replace the cached ones in place so run order is kept
+            df = (pd.concat([cached, df], ignore_index=True)
+                  .groupby(merge_key, sort=False, as_index=False)
+                  .last()[cached.columns])
+
+        if updated_column and updated_column in df.columns and not df.empty:
+            entry['watermark'] = _python_value(df[updated_column].max())
+        entry['rows'] = df
+        return df
+
+    def _build_flow_analysis(self, df: pd.DataFrame, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """Identify user/run/stage/status columns for the flow view"""
+
+        analysis = self.data_analyzer.analyze_headers(df)
+
+        stage_col = analysis['stage_column']
+        analysis['user_column'] = columns.get('user', analysis['user_column'])
+        analysis['run_column'] = columns.get('run', analysis['run_column'])
+        analysis['stage_column'] = columns.get('stage', stage_col)
+
+        if analysis['stage_column'] != stage_col:
+            analysis['stages'] = []
+            self._add_new_stages(analysis, df)
+
+        status_col = columns.get('status')
+        if not status_col:
+            roles = (analysis['user_column'], analysis['run_column'], analysis['stage_column'])
+            status_col = next((col for col in df.columns
+                               if col not in roles and ('status' in col.lower() or 'state' in col.lower())), None)
+        analysis['status_column'] = status_col
+
+        missing = [col for col in _flow_columns(analysis) if col not in df.columns]
+        if missing:
+            raise ValueError(f"Columns not found in table: {missing}")
+
+        return analysis
+
+    def _add_new_stages(self, analysis: Dict[str, Any], df: pd.DataFrame) -> bool:
+        """Append stages not seen before, keeping the order (x position) of the known ones"""
+        known = {stage['name'] for stage in analysis['stages']}
+        added = False
+        for stage in df[analysis['stage_column']].unique():
+            if stage not in known:
+                analysis['stages'].append({
+                    "name": stage,
+                    "order": len(analysis['stages']),
+                    "color": self.data_analyzer._generate_color(len(analysis['stages'])),
+                    "description": f"Stage: {stage}"
+                })
+                known.add(stage)
+                added = True
+        return added
+
+    @staticmethod
+    def _starting_block(analysis: Dict[str, Any], block_rows: pd.DataFrame, stage_col: str) -> Dict[str, Any]:
+        """Starting block of the flow: the analysed one, else the first 'block' row of the table"""
+        if analysis.get('starting_block'):
+            return dict(analysis['starting_block'], sheet=DB_SHEET_NAME)
+        if block_rows.empty:
+            return {}
+        label = block_rows[stage_col].iloc[0] if stage_col in block_rows.columns else None
+        block = {'sheet': DB_SHEET_NAME}
+        if pd.notna(label):
+            block['label'] = str(label)
+        return block
+
+    def _refresh_flow(self, entry: Dict[str, Any], df: pd.DataFrame,
+                      columns: Dict[str, Any]) -> Tuple[List[str], List[str], bool]:
+        """Regenerate only the user lanes whose rows changed since the previous refresh"""
+
+        generator = entry.setdefault('generator', EnhancedLayoutGenerator())
+        analysis = entry.get('analysis')
+        rebuilt = False
+
+        if analysis is None or any(col not in df.columns for col in _flow_columns(analysis)):
+            analysis = self._build_flow_analysis(df, columns)
+            entry['analysis'] = analysis
+            entry['lanes'] = {}
+            entry['merge_key'] = [analysis['user_column'], analysis['run_column'], analysis['stage_column']]
+            rebuilt = True
+        elif self._add_new_stages(analysis, df):
+            rebuilt = True  # stage colors changed, lanes themselves are still valid
+
+        user_col = analysis['user_column']
+        run_col = analysis['run_column']
+        stage_col = analysis['stage_column']
+        status_col = analysis.get('status_column')
+        stages_config = {s["name"]: s for s in analysis["stages"]}
+        sheets_data = {DB_SHEET_NAME: df}
+
+        layout_metrics = generator.calculate_enhanced_layout_metrics(sheets_data, analysis)
+        node_width = layout_metrics["node_sizing"]["width"]
+        node_height = layout_metrics["node_sizing"]["height"]
+        font_size = layout_metrics["node_sizing"]["font_size"]
+        spacing_x = layout_metrics["spacing"]["x"]
+        spacing_y = layout_metrics["spacing"]["y"]
+        user_separation = layout_metrics["spacing"]["user_separation"]
+
+        # Node sizing depends on the longest text in the whole table; if it moves every lane is redrawn.
+        # So does the starting block, because the first stage of every lane connects to it
+        block_rows = df[user_col].astype(str).str.lower().str.startswith('block')
+        starting_block = self._starting_block(analysis, df[block_rows], stage_col)
+        sizing = (node_width, node_height, font_size, spacing_x, spacing_y, user_separation,
+                  starting_block.get('label'))
+        if entry.get('sizing') != sizing:
+            entry['sizing'] = sizing
+            if entry['lanes']:
+                entry['lanes'] = {}
+                rebuilt = True
+
+        lane_rows = df[~block_rows]
+        fingerprint_cols = [col for col in (run_col, stage_col, status_col) if col]
+
+        lanes = entry['lanes']
+        new_lanes = {}
+        changed = []
+
+        for user_idx, (user, user_data) in enumerate(lane_rows.groupby(user_col, sort=True)):
+            user_y_offset = 100 + (user_idx * user_separation)
+            fingerprint = _fingerprint(user_data[fingerprint_cols])
+            lane = lanes.get(user)
+
+            if lane and lane['fingerprint'] == fingerprint:
+                # Unchanged lane: only move it when users were added/removed above it.
+                # Nodes are copied, not modified, because older versions in the history share them
+                shift = user_y_offset - lane['y_offset']
+                if shift:
+                    lane = dict(lane, y_offset=user_y_offset,
+                                nodes=[dict(node, y=node['y'] + shift) for node in lane['nodes']])
+                new_lanes[user] = lane
+                continue
+
+            flow = {"nodes": [], "connections": []}
+            runs_analysis = generator._analyze_user_runs(user_data, run_col, stage_col, stages_config, status_col)
+            generator._generate_user_flow(
+                flow, f"{DB_SHEET_NAME}_{user}", runs_analysis, stages_config,
+                user_y_offset, spacing_x, spacing_y, node_width, node_height, font_size,
+                starting_block, DB_SHEET_NAME
+            )
+            new_lanes[user] = {
+                'fingerprint': fingerprint,
+                'y_offset': user_y_offset,
+                'nodes': flow['nodes'],
+                'connections': flow['connections']
+            }
+            changed.append(str(user))
+
+        removed = [str(user) for user in lanes if user not in new_lanes]
+        entry['lanes'] = new_lanes
+
+        if not (changed or removed or rebuilt) and entry['layout'] is not None:
+            return changed, removed, rebuilt
+
+        connection_analysis = generator.analyze_connection_patterns(sheets_data, analysis)
+        layout_data = generator._create_layout_data(analysis, connection_analysis, layout_metrics)
+        if starting_block:
+            layout_data["nodes"].append(generator._create_block_node(DB_SHEET_NAME, starting_block, 100,
+                                                                     node_width, node_height, font_size))
+        for lane in new_lanes.values():
+            layout_data["nodes"].extend(lane['nodes'])
+            layout_data["connections"].extend(lane['connections'])
+
+        entry['layout'] = layout_data
+        logger.info(f"Incremental flow layout: {len(changed)} of {len(new_lanes)} user lanes regenerated")
+        return changed, removed, rebuilt
+
+    def _refresh_branch(self, entry: Dict[str, Any], df: pd.DataFrame,
+                        columns: Dict[str, Any]) -> Tuple[List[str], List[str], bool]:
+        """Regenerate the branch view, reusing the patterns of runs before the first change"""
+
+        fingerprint = _fingerprint(df)
+        if entry['layout'] is not None and entry.get('fingerprint') == fingerprint:
+            return [], [], False
+        entry['fingerprint'] = fingerprint
+
+        # Same convention as CSV uploads: first column is the run name, the rest are stages
+        run_column = columns.get('run', df.columns[0])
+        stage_columns = list(columns.get('stages') or [col for col in df.columns if col != run_column])
+        entry['merge_key'] = [run_column]
+
+        analyzer = SimpleBranchAnalyzer()
+        previous = entry.get('branch_analysis')
+        all_data = df[[run_column] + stage_columns].to_dict('records')
+
+        username = analyzer._extract_username([row[run_column] for row in all_data])
+        branch_analysis = analyzer._analyze_branching_patterns(all_data, run_column, stage_columns, previous=previous)
+        entry['layout'] = analyzer._generate_layout(branch_analysis, stage_columns, username)
+        entry['branch_analysis'] = branch_analysis
+
+        previous_patterns = previous['branch_patterns'] if previous else {}
+        patterns = branch_analysis['branch_patterns']
+        changed = [run for run in branch_analysis['sorted_runs'] if previous_patterns.get(run) is not patterns[run]]
+        removed = [run for run in previous_patterns if run not in patterns]
+        return changed, removed, previous is None
+
+    def _refresh_rtl(self, entry: Dict[str, Any], df: pd.DataFrame,
+                     columns: Dict[str, Any]) -> Tuple[List[str], List[str], bool]:
+        """Regenerate only the RTL versions whose rows changed"""
+
+        fingerprint = _fingerprint(df)
+        if entry['layout'] is not None and entry.get('fingerprint') == fingerprint:
+            return [], [], False
+        entry['fingerprint'] = fingerprint
+
+        rtl_column = columns.get('rtl')
+        if not rtl_column:
+            rtl_column = next((col for col in df.columns
+                               if col.lower().replace('_', '').replace(' ', '') == 'rtlversion'), None)
+        if not rtl_column or rtl_column not in df.columns:
+            raise ValueError("RTL_version column not found in the data. Please ensure your data has an RTL_version column.")
+
+        analyzer = entry.setdefault('rtl_analyzer', RTLViewAnalyzer())
+        previous_versions = set(analyzer.version_analyses.keys())
+
+        sheets_data = {DB_SHEET_NAME: df}
+        data_analysis = analyzer._analyze_data_structure(sheets_data, rtl_column)
+        rtl_versions = analyzer._extract_rtl_versions(sheets_data, data_analysis)
+        entry['layout'] = analyzer._generate_rtl_layout(sheets_data, data_analysis, rtl_versions)
+        entry['merge_key'] = [rtl_column, data_analysis['run_column']]
+
+        removed = [version for version in previous_versions if version not in analyzer.version_analyses]
+        return list(analyzer.changed_versions), removed, not previous_versions
@@ -8,10 +8,14 @@ import json
 import csv
 import sys
 import os
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
 from collections import defaultdict, Counter
+from itertools import islice
 import re
 
+# Only the first rows are shown in the tabular flow
+MAX_DISPLAY_ROWS = 10
+
 class IntelligentSimpleFlowAnalyzer:
     def __init__(self):
         # EDA flow patterns and keywords
@@ -37,6 +41,15 @@ class IntelligentSimpleFlowAnalyzer:
             'pending': ['pending', 'wait', 'queue', 'scheduled', 'ready']
         }
 
+    def iter_csv_data(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """Stream CSV rows one at a time"""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                for row in csv.DictReader(file):
+                    yield row
+        except Exception as e:
+            raise ValueError(f"Error reading CSV file: {str(e)}")
+
     def read_csv_data(self, file_path: str) -> List[Dict[str, Any]]:
         """Read CSV data safely"""
         data = []
@@ -120,36 +133,40 @@ class IntelligentSimpleFlowAnalyzer:
         
         return 'unknown'
 
-    def create_intelligent_flow_structure(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Create tabular flow structure matching SimpleFlowVisualization format"""
+    def create_intelligent_flow_structure(self, data: List[Dict[str, Any]], total_rows: Optional[int] = None) -> Dict[str, Any]:
+        """Create tabular flow structure matching SimpleFlowVisualization format
+        
+        ``data`` may hold just the leading rows when ``total_rows`` gives the row count of the whole file.
+        """
         if not data:
             return self._create_empty_structure()
         
         columns = list(data[0].keys())
         table_name = "Database Table"
+        total_rows = len(data) if total_rows is None else total_rows
         
-        print(f"Creating tabular flow structure with {len(columns)} columns and {len(data)} rows", file=sys.stderr)
+        print(f"Creating tabular flow structure with {len(columns)} columns and {total_rows} rows", file=sys.stderr)
         
         # Create header flow - shows column names as flow steps
         header_flow = self._create_header_flow(columns)
         
         # Create data rows - each row becomes a flow showing values across columns
         data_rows = []
-        for row_idx, row in enumerate(data[:10]):  # Limit to first 10 rows for performance
+        for row_idx, row in enumerate(data[:MAX_DISPLAY_ROWS]):  # Limit to first 10 rows for performance
             data_row = self._create_data_row_flow(row, columns, row_idx)
             data_rows.append(data_row)
         
         return {
             'table_name': table_name,
             'total_columns': len(columns),
-            'total_rows': len(data),
+            'total_rows': total_rows,
             'header_flow': header_flow,
             'data_rows': data_rows,
             'metadata': {
                 'analyzed_at': self._get_current_timestamp(),
-                'total_rows_analyzed': len(data),
+                'total_rows_analyzed': total_rows,
                 'analysis_type': 'intelligent_tabular_flow',
-                'description': f'Tabular flow analysis of {len(data)} rows across {len(columns)} columns'
+                'description': f'Tabular flow analysis of {total_rows} rows across {len(columns)} columns'
             }
         }
 
@@ -296,12 +313,14 @@ class IntelligentSimpleFlowAnalyzer:
         try:
             print(f"Starting intelligent analysis of: {file_path}", file=sys.stderr)
             
-            # Read data
-            data = self.read_csv_data(file_path)
-            print(f"Read {len(data)} rows of data", file=sys.stderr)
+            # Stream the file: only the rows that are displayed are kept, the rest are counted
+            rows = self.iter_csv_data(file_path)
+            data = list(islice(rows, MAX_DISPLAY_ROWS))
+            total_rows = len(data) + sum(1 for _ in rows)
+            print(f"Read {total_rows} rows of data", file=sys.stderr)
             
             # Create flow structure
-            result = self.create_intelligent_flow_structure(data)
+            result = self.create_intelligent_flow_structure(data, total_rows)
             print(f"Created tabular flow with {result['total_columns']} columns and {len(result['data_rows'])} data rows", file=sys.stderr)
             
             return result
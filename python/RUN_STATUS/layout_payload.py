@@ -0,0 +1,337 @@
+"""
+Layout Payload - compact encoding, deltas and compression for layout responses
+1. Compact format: node/connection fields stored column-wise, repeated values (styles, stages,
+   users, tree ids...) stored once in a table and referenced by index
+2. Numeric columns (coordinates, indexes) sent as base64 typed arrays (little endian)
+3. Deltas: only added/changed/removed nodes and connections against an older layout version
+4. Response compression negotiated from Accept-Encoding (brotli when installed, otherwise gzip)
+"""
+
+import base64
+import gzip
+import json
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+# brotli is optional - gzip is always available
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    brotli = None
+    HAS_BROTLI = False
+
+logger = logging.getLogger(__name__)
+
+COMPACT_FORMAT = 'runstatus-compact-v1'
+DELTA_FORMAT = 'runstatus-delta-v1'
+
+# Blocks that describe how a layout was computed; the client does not need them to draw it
+DIAGNOSTIC_KEYS = ('connection_analysis', 'layout_metrics')
+
+# Responses smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+
+
+def encode_typed_array(values: List[Any]) -> Dict[str, str]:
+    """Encode numbers as a base64 little endian typed array (int32 when possible, else float32)"""
+    array = np.asarray(values)
+    if np.issubdtype(array.dtype, np.integer) and (not len(array) or
+                                                   (array.min() >= -2**31 and array.max() < 2**31)):
+        dtype = 'int32'
+    else:
+        dtype = 'float32'
+    return {
+        'dtype': dtype,
+        'data': base64.b64encode(array.astype('<' + ('i4' if dtype == 'int32' else 'f4')).tobytes()).decode('ascii')
+    }
+
+
+def decode_typed_array(encoded: Dict[str, str]) -> List[Any]:
+    """Decode a typed array produced by encode_typed_array"""
+    dtype = '<i4' if encoded['dtype'] == 'int32' else '<f4'
+    return np.frombuffer(base64.b64decode(encoded['data']), dtype=dtype).tolist()
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_))
+
+
+def _encode_column(values: List[Any]) -> Dict[str, Any]:
+    """Pick the smallest representation for one field of all records"""
+    if values and all(_is_number(value) for value in values):
+        return {'typed': encode_typed_array(values)}
+
+    try:
+        table = {}
+        indexes = [table.setdefault(value, len(table)) for value in values]
+    except TypeError:
+        # Unhashable values (lists/dicts) are sent as they are
+        return {'values': values}
+
+    if len(table) * 2 <= len(values):
+        return {'table': list(table.keys()), 'index': encode_typed_array(indexes)}
+    return {'values': values}
+
+
+def _decode_column(column: Dict[str, Any], refs: Optional[Dict[str, List[Any]]] = None) -> List[Any]:
+    if 'typed' in column:
+        return decode_typed_array(column['typed'])
+    if 'table' in column:
+        table = column['table']
+        return [table[i] for i in decode_typed_array(column['index'])]
+    if 'ref' in column:
+        ref_values = refs[column['ref']]
+        return [ref_values[i] for i in decode_typed_array(column['index'])]
+    return column['values']
+
+
+def compact_records(records: List[Dict[str, Any]], styles: List[Dict[str, Any]], style_index: Dict[str, int],
+                    refs: Optional[Dict[str, Dict[Any, int]]] = None) -> Dict[str, Any]:
+    """Store records column-wise; styles go into the shared style table, ``refs`` lets a field
+    (e.g. connection from/to) point into another record set by position"""
+
+    keys = []
+    for record in records:
+        for key in record:
+            if key not in keys:
+                keys.append(key)
+
+    columns = {}
+    id_values = [record.get('id') for record in records] if 'id' in keys else None
+    for key in keys:
+        values = [record.get(key) for record in records]
+
+        # Flow layouts label nodes with their id - send those strings once
+        if key != 'id' and values == id_values:
+            columns[key] = {'same_as': 'id'}
+            continue
+
+        if key == 'style':
+            # Style records are usually shared objects, so look them up by identity first
+            seen = {}
+            indexes = []
+            for style in values:
+                idx = seen.get(id(style))
+                if idx is None:
+                    style_key = json.dumps(style, sort_keys=True, default=str)
+                    idx = style_index.get(style_key)
+                    if idx is None:
+                        idx = style_index[style_key] = len(styles)
+                        styles.append(style)
+                    seen[id(style)] = idx
+                indexes.append(idx)
+            columns[key] = {'styles': encode_typed_array(indexes)}
+            continue
+
+        if refs and key in refs:
+            positions = refs[key]
+            try:
+                if all(value in positions for value in values):
+                    columns[key] = {'ref': 'id', 'index': encode_typed_array([positions[value] for value in values])}
+                    continue
+            except TypeError:
+                pass
+
+        columns[key] = _encode_column(values)
+
+    return {'count': len(records), 'columns': columns}
+
+
+def expand_records(block: Dict[str, Any], styles: List[Dict[str, Any]],
+                   refs: Optional[Dict[str, List[Any]]] = None) -> List[Dict[str, Any]]:
+    """Inverse of compact_records (reference decoder, also used to apply deltas)"""
+    records = [{} for _ in range(block['count'])]
+    for key, column in block['columns'].items():
+        if 'same_as' in column:
+            values = [record[column['same_as']] for record in records]
+        elif 'styles' in column:
+            values = [styles[i] for i in decode_typed_array(column['styles'])]
+        else:
+            values = _decode_column(column, refs)
+        for record, value in zip(records, values):
+            record[key] = value
+    return records
+
+
+def _compact_graph(graph: Dict[str, Any], styles: List[Dict[str, Any]], style_index: Dict[str, int]) -> Dict[str, Any]:
+    """Compact the nodes/connections of one layout (flow, branch or one RTL version)"""
+    nodes = graph.get('nodes', [])
+    node_positions = {}
+    for position, node in enumerate(nodes):
+        node_positions.setdefault(node.get('id'), position)
+
+    compact = {key: value for key, value in graph.items()
+               if key not in ('nodes', 'connections') and key not in DIAGNOSTIC_KEYS}
+    compact['nodes'] = compact_records(nodes, styles, style_index)
+    compact['connections'] = compact_records(graph.get('connections', []), styles, style_index,
+                                             refs={'from': node_positions, 'to': node_positions})
+    return compact
+
+
+def compact_layout(layout_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a layout into the compact format"""
+    styles = []
+    style_index = {}
+
+    if 'version_analyses' in layout_data:
+        # RTL view: every version carries its own branch layout
+        compact = {key: value for key, value in layout_data.items() if key != 'version_analyses'}
+        compact['version_analyses'] = {}
+        for version, version_analysis in layout_data['version_analyses'].items():
+            compact_version = dict(version_analysis)
+            if 'branch_layout' in version_analysis:
+                compact_version['branch_layout'] = _compact_graph(version_analysis['branch_layout'], styles, style_index)
+            compact['version_analyses'][version] = compact_version
+    else:
+        compact = _compact_graph(layout_data, styles, style_index)
+
+    compact['format'] = COMPACT_FORMAT
+    compact['styles'] = styles
+    return compact
+
+
+def _expand_graph(graph: Dict[str, Any], styles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    expanded = {key: value for key, value in graph.items() if key not in ('nodes', 'connections')}
+    expanded['nodes'] = expand_records(graph['nodes'], styles)
+    ids = [node.get('id') for node in expanded['nodes']]
+    expanded['connections'] = expand_records(graph['connections'], styles, refs={'id': ids})
+    return expanded
+
+
+def expand_compact_layout(compact: Dict[str, Any]) -> Dict[str, Any]:
+    """Reference decoder for the compact format (diagnostic blocks are not restored)"""
+    styles = compact['styles']
+    if 'version_analyses' in compact:
+        expanded = {key: value for key, value in compact.items() if key not in ('format', 'styles', 'version_analyses')}
+        expanded['version_analyses'] = {}
+        for version, version_analysis in compact['version_analyses'].items():
+            expanded_version = dict(version_analysis)
+            if 'branch_layout' in version_analysis:
+                expanded_version['branch_layout'] = _expand_graph(version_analysis['branch_layout'], styles)
+            expanded['version_analyses'][version] = expanded_version
+        return expanded
+
+    expanded = _expand_graph(compact, styles)
+    expanded.pop('format', None)
+    expanded.pop('styles', None)
+    return expanded
+
+
+def _connection_key(connection: Dict[str, Any]) -> Tuple[Any, Any, Any]:
+    return connection.get('from'), connection.get('to'), connection.get('connection_category')
+
+
+def layout_delta(previous: Dict[str, Any], current: Dict[str, Any],
+                 base_version: int, version: int) -> Optional[Dict[str, Any]]:
+    """Build a delta that turns ``previous`` into ``current``; None when the layouts cannot be diffed"""
+    if 'nodes' not in previous or 'nodes' not in current:
+        return None
+
+    previous_nodes = {node.get('id'): node for node in previous['nodes']}
+    current_ids = set()
+    changed_nodes = []
+    nodes_added = False
+    for node in current['nodes']:
+        node_id = node.get('id')
+        current_ids.add(node_id)
+        previous_node = previous_nodes.get(node_id)
+        if previous_node != node:
+            changed_nodes.append(node)
+            nodes_added = nodes_added or previous_node is None
+    removed_nodes = [node_id for node_id in previous_nodes if node_id not in current_ids]
+
+    previous_connections = {_connection_key(conn): conn for conn in previous.get('connections', [])}
+    current_keys = set()
+    changed_connections = []
+    for connection in current.get('connections', []):
+        key = _connection_key(connection)
+        current_keys.add(key)
+        if previous_connections.get(key) != connection:
+            changed_connections.append(connection)
+    removed_connections = [list(key) for key in previous_connections if key not in current_keys]
+
+    styles = []
+    style_index = {}
+    delta = {
+        'format': DELTA_FORMAT,
+        'base_version': base_version,
+        'version': version,
+        # Full id order is only needed when nodes were added; removals and updates keep the order
+        'node_order': [node.get('id') for node in current['nodes']] if nodes_added else None,
+        'nodes': compact_records(changed_nodes, styles, style_index),
+        'removed_nodes': removed_nodes,
+        'connections': compact_records(changed_connections, styles, style_index),
+        'removed_connections': removed_connections,
+        'styles': styles,
+        # Other top level blocks (canvas size, stage colors, ...) only when they changed
+        'changed': {key: value for key, value in current.items()
+                    if key not in ('nodes', 'connections') and key not in DIAGNOSTIC_KEYS
+                    and previous.get(key) != value}
+    }
+
+    logger.info(f"Layout delta {base_version} -> {version}: {len(changed_nodes)} nodes changed, "
+                f"{len(removed_nodes)} removed, {len(changed_connections)} connections changed")
+    return delta
+
+
+def apply_layout_delta(previous: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Reference implementation of how a client applies a delta to the layout it already has"""
+    styles = delta['styles']
+    nodes = {node.get('id'): node for node in previous['nodes']}
+    for node in expand_records(delta['nodes'], styles):
+        nodes[node.get('id')] = node
+    for node_id in delta['removed_nodes']:
+        nodes.pop(node_id, None)
+    node_order = delta['node_order'] or [node.get('id') for node in previous['nodes']]
+
+    connections = {_connection_key(conn): conn for conn in previous.get('connections', [])}
+    removed = {tuple(key) for key in delta['removed_connections']}
+    connections = {key: conn for key, conn in connections.items() if key not in removed}
+    for connection in expand_records(delta['connections'], styles):
+        connections[_connection_key(connection)] = connection
+
+    layout = {key: value for key, value in previous.items() if key not in ('nodes', 'connections')}
+    layout.update(delta['changed'])
+    layout['nodes'] = [nodes[node_id] for node_id in node_order]
+    layout['connections'] = list(connections.values())
+    return layout
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Quality value per content coding of an Accept-Encoding header (q=0 means not acceptable)"""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, *params = [item.strip() for item in part.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.lower()] = quality
+    return accepted
+
+
+def compress_body(body: bytes, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+    """Compress a response body with the best encoding the client accepts"""
+    if len(body) < MIN_COMPRESS_SIZE or not accept_encoding:
+        return body, None
+
+    accepted = _accepted_encodings(accept_encoding)
+    wildcard = accepted.get('*', 0.0)
+    # Highest client quality wins; on a tie brotli is preferred over gzip
+    candidates = [(accepted.get(coding, wildcard), -rank, coding)
+                  for rank, coding in enumerate(('br', 'gzip')) if coding != 'br' or HAS_BROTLI]
+    quality, _, coding = max(candidates)
+    if quality <= 0:
+        return body, None
+    if coding == 'br':
+        return brotli.compress(body, quality=5), 'br'
+    return gzip.compress(body, compresslevel=6), 'gzip'
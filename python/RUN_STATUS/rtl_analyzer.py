@@ -33,6 +33,8 @@ class RTLViewAnalyzer:
         self.rtl_versions = {}
         self.version_data = {}
         self.branch_patterns = {}
+        self.version_analyses = {}
+        self.changed_versions = []
     
     def _read_csv_fallback(self, file_path: str) -> Dict[str, List[Dict[str, str]]]:
         """Fallback CSV reader when pandas is not available"""
@@ -344,6 +346,7 @@ class RTLViewAnalyzer:
         
         # Generate branch analysis for each RTL version
         version_analyses = {}
+        changed_versions = []
         for version in rtl_versions:
             if version in version_data:
                 # Import branch analyzer for individual version analysis
@@ -352,9 +355,19 @@ class RTLViewAnalyzer:
                 
                 # Convert version data to the format expected by SimpleBranchAnalyzer
                 version_rows = version_data[version]
+                previous_analysis = self.branch_patterns.get(version)
+                
+                # Versions whose rows did not change since the last call keep their layout
+                if (previous_analysis is not None
+                        and self.version_data.get(version) == version_rows
+                        and previous_analysis.get('stage_columns') == stage_columns
+                        and self.version_analyses.get(version, {}).get('branch_layout', {}).get('metadata', {}).get('username') == username):
+                    version_analyses[version] = self.version_analyses[version]
+                    continue
                 
                 # Analyze branching patterns for this version
-                branch_analysis = analyzer._analyze_branching_patterns(version_rows, run_column, stage_columns)
+                branch_analysis = analyzer._analyze_branching_patterns(version_rows, run_column, stage_columns,
+                                                                       previous=previous_analysis)
                 
                 # Generate branch layout for this version
                 branch_layout = analyzer._generate_layout(branch_analysis, stage_columns, username)
@@ -364,6 +377,17 @@ class RTLViewAnalyzer:
                     'copy_patterns': branch_analysis.get('branch_patterns', {}),
                     'branch_layout': branch_layout
                 }
+                self.version_data[version] = version_rows
+                self.branch_patterns[version] = branch_analysis
+                changed_versions.append(version)
+        
+        # Forget versions that are no longer present
+        for version in list(self.version_data.keys()):
+            if version not in version_analyses:
+                self.version_data.pop(version, None)
+                self.branch_patterns.pop(version, None)
+        self.version_analyses = version_analyses
+        self.changed_versions = changed_versions
         
         return {
             'type': 'rtl_view',
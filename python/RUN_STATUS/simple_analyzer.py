@@ -9,8 +9,9 @@ import csv
 import sys
 import os
 import re
+import itertools
 # Removed requests import - no longer needed for AI calls
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Iterator
 
 # Ollama configuration
 # Removed AI/Ollama dependencies - using pattern-based analysis instead
@@ -27,7 +28,16 @@ def read_csv_data(file_path: str) -> List[Dict[str, Any]]:
     except Exception as e:
         raise ValueError(f"Error reading CSV file: {str(e)}")
 
-def extract_usernames_from_data(data: List[Dict[str, Any]]) -> str:
+def iter_csv_data(file_path: str) -> Iterator[Dict[str, Any]]:
+    """Stream CSV rows one at a time instead of building the whole list"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                yield row
+    except Exception as e:
+        raise ValueError(f"Error reading CSV file: {str(e)}")
+
+def extract_usernames_from_data(data: Iterable[Dict[str, Any]]) -> str:
     """Extract usernames from run_name columns with enhanced pattern matching"""
     usernames = set()
     
@@ -88,20 +98,22 @@ def extract_usernames_from_data(data: List[Dict[str, Any]]) -> str:
     else:
         return "Unknown User"
 
-def analyze_data_structure(data: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Analyze data structure using pattern-based approach (no AI)"""
-    if not data:
+def analyze_data_structure(data: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Analyze data structure using pattern-based approach (no AI); rows may be a stream"""
+    rows = iter(data)
+    first_row = next(rows, None)
+    if first_row is None:
         raise ValueError("No data to analyze")
     
     # Get column information
-    columns = list(data[0].keys()) if data else []
+    columns = list(first_row.keys())
     
     print("Using pattern-based analysis for data structure identification...", file=sys.stderr)
-    return create_intelligent_fallback_analysis(data, columns)
+    return create_intelligent_fallback_analysis(itertools.chain([first_row], rows), columns)
 
 # Removed AI parsing function - no longer needed
 
-def create_intelligent_fallback_analysis(data: List[Dict[str, Any]], columns: List[str]) -> Dict[str, Any]:
+def create_intelligent_fallback_analysis(data: Iterable[Dict[str, Any]], columns: List[str]) -> Dict[str, Any]:
     """Create intelligent fallback analysis with proper EDA flow structure"""
     
     # Intelligent column detection
@@ -134,8 +146,7 @@ def create_intelligent_fallback_analysis(data: List[Dict[str, Any]], columns: Li
         
         users[user][run].append({
             "stage": stage,
-            "status": status,
-            "row_data": row
+            "status": status
         })
     
     # Create nodes and connections
@@ -480,14 +491,12 @@ def create_empty_layout():
 def analyze_and_generate_layout(file_path: str) -> Dict[str, Any]:
     """Main function to analyze data and generate flow chart layout"""
     try:
-        # Read data
-        data = read_csv_data(file_path)
+        # Read data as a stream - each pass re-reads the file instead of keeping all rows
+        # Analyze structure
+        analysis = analyze_data_structure(iter_csv_data(file_path))
         
         # Extract username from data
-        extracted_username = extract_usernames_from_data(data)
-        
-        # Analyze structure
-        analysis = analyze_data_structure(data)
+        extracted_username = extract_usernames_from_data(iter_csv_data(file_path))
         
         # Generate layout
         layout = generate_flow_chart_layout(analysis)
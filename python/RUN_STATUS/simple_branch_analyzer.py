@@ -152,8 +152,14 @@ class SimpleBranchAnalyzer:
             logger.warning("Simple Branch: No usernames could be extracted from run names")
             return "System User"  # More professional than "Unknown User"
     
-    def _analyze_branching_patterns(self, all_data: List[Dict], run_column: str, stage_columns: List[str]) -> Dict[str, Any]:
-        """Analyze branching patterns using user's exact logic"""
+    def _analyze_branching_patterns(self, all_data: List[Dict], run_column: str, stage_columns: List[str],
+                                    previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analyze branching patterns using user's exact logic
+        
+        A run's pattern only depends on the runs before it, so when ``previous`` (an earlier
+        result for the same stage columns) covers an unchanged prefix of the runs, those
+        patterns are reused and only the runs after the prefix are analyzed.
+        """
         
         runs_data = {}
         branch_patterns = {}
@@ -169,9 +175,25 @@ class SimpleBranchAnalyzer:
         sorted_runs = list(runs_data.keys())
         logger.info(f"Processing runs in order: {sorted_runs}")
         
+        # Reuse patterns for the unchanged prefix of a previous analysis
+        reused = 0
+        if previous and previous.get('stage_columns') == stage_columns:
+            prev_runs = previous['sorted_runs']
+            prev_data = previous['runs_data']
+            while (reused < len(prev_runs) and reused < len(sorted_runs)
+                   and prev_runs[reused] == sorted_runs[reused]
+                   and prev_data[prev_runs[reused]] == runs_data[sorted_runs[reused]]):
+                branch_patterns[sorted_runs[reused]] = previous['branch_patterns'][sorted_runs[reused]]
+                reused += 1
+            if reused:
+                logger.info(f"Reusing branch patterns for {reused} unchanged runs")
+        
         # Analyze each run using user's logic
         for i, current_run in enumerate(sorted_runs):
             
+            if i < reused:
+                continue
+            
             if i == 0:
                 # First run: display all stages (starting run)
                 logger.info(f"{current_run}: First run - display all stages")
@@ -0,0 +1,198 @@
+"""
+Stream Reader - chunked reading of large tracker exports for the flow view
+1. Column roles (user, run, stage, status) are inferred from a small sample of the file
+2. The rest of the file is streamed in chunks, reading only those columns as plain strings
+3. Rows are collapsed while streaming to one row per user/run/stage (latest status wins),
+   so memory follows the number of distinct nodes instead of the file size
+"""
+
+import logging
+import os
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+import pandas as pd
+import openpyxl
+
+from data_analyzer import DataStructureAnalyzer
+from enhanced_layout_generator import EnhancedLayoutGenerator
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_ROWS = 1000
+DEFAULT_CHUNK_SIZE = 50000
+
+# Files at least this large are streamed by /upload unless the client asks otherwise
+STREAMING_THRESHOLD_MB = float(os.getenv('RUNSTATUS_STREAMING_THRESHOLD_MB', '50'))
+
+STATUS_PATTERNS = ['status', 'state', 'result', 'outcome', 'condition']
+
+
+def should_stream(file_path: str, mode: Optional[str] = None) -> bool:
+    """Decide between streaming and full DataFrame reading (mode: 'stream', 'full' or None for automatic)
+
+    Only CSV and .xlsx files can be streamed; legacy .xls files (which openpyxl cannot
+    read) always take the full read path.
+    """
+    if not file_path.lower().endswith(('.csv', '.xlsx')):
+        return False
+    if mode == 'stream':
+        return True
+    if mode == 'full':
+        return False
+    return os.path.getsize(file_path) >= STREAMING_THRESHOLD_MB * 1024 * 1024
+
+
+def _is_excel(file_path: str) -> bool:
+    return file_path.lower().endswith('.xlsx')
+
+
+def read_sample(file_path: str, nrows: int = SAMPLE_ROWS) -> Dict[str, pd.DataFrame]:
+    """Read the first rows of every sheet (CSV files have a single 'main' sheet)"""
+    if _is_excel(file_path):
+        return {sheet_name: chunk for sheet_name, chunk in _iter_excel_chunks(file_path, None, nrows, limit=nrows)}
+
+    df = pd.read_csv(file_path, nrows=nrows, dtype=str, keep_default_na=False)
+    df.columns = [col.strip() for col in df.columns]
+    return {'main': df}
+
+
+def infer_column_roles(sample_df: pd.DataFrame) -> Dict[str, Any]:
+    """Identify user/run/stage/status columns from a sample, same rules as the full analysis"""
+    analysis = DataStructureAnalyzer().analyze_headers(sample_df)
+
+    roles = (analysis['user_column'], analysis['run_column'], analysis['stage_column'])
+    analysis['status_column'] = next(
+        (col for col in sample_df.columns
+         if col not in roles and any(pattern in col.lower() for pattern in STATUS_PATTERNS)),
+        None
+    )
+    logger.info(f"Column roles from {len(sample_df)} sample rows: user={roles[0]}, run={roles[1]}, "
+                f"stage={roles[2]}, status={analysis['status_column']}")
+    return analysis
+
+
+def _iter_csv_chunks(file_path: str, columns: List[str], chunksize: int) -> Iterator[Tuple[str, pd.DataFrame]]:
+    # Header names are stripped everywhere else, so map them back to the raw names for usecols
+    header = pd.read_csv(file_path, nrows=0).columns
+    raw_names = {col.strip(): col for col in header}
+    usecols = [raw_names[col] for col in columns]
+
+    reader = pd.read_csv(file_path, usecols=usecols, dtype=str, keep_default_na=False, chunksize=chunksize)
+    for chunk in reader:
+        chunk.columns = [col.strip() for col in chunk.columns]
+        for col in chunk.columns:
+            chunk[col] = chunk[col].str.strip()
+        yield 'main', chunk
+
+
+def _iter_excel_chunks(file_path: str, columns: Optional[List[str]], chunksize: int,
+                       limit: Optional[int] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+    # read_only mode streams rows from the sheet XML instead of building the whole workbook
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                continue
+            header = [str(col).strip() if col is not None else '' for col in header]
+            wanted = columns or [col for col in header if col]
+            if any(col not in header for col in wanted):
+                logger.warning(f"Skipping sheet {ws.title}: missing columns {[c for c in wanted if c not in header]}")
+                continue
+            positions = [header.index(col) for col in wanted]
+
+            buffer = []
+            read = 0
+            for row in rows:
+                if limit is not None and read >= limit:
+                    break
+                values = [str(row[i]).strip() if i < len(row) and row[i] is not None else '' for i in positions]
+                if not any(values):
+                    continue  # Same as dropna(how='all') on the full read
+                buffer.append(values)
+                read += 1
+                if len(buffer) >= chunksize:
+                    yield ws.title, pd.DataFrame(buffer, columns=wanted)
+                    buffer = []
+            if buffer:
+                yield ws.title, pd.DataFrame(buffer, columns=wanted)
+    finally:
+        wb.close()
+
+
+def iter_row_chunks(file_path: str, columns: List[str],
+                    chunksize: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Yield (sheet name, chunk) pairs holding only the requested columns as stripped strings"""
+    if _is_excel(file_path):
+        yield from _iter_excel_chunks(file_path, columns, chunksize)
+    else:
+        yield from _iter_csv_chunks(file_path, columns, chunksize)
+
+
+def collapse_run_rows(file_path: str, analysis: Dict[str, Any],
+                      chunksize: int = DEFAULT_CHUNK_SIZE) -> Dict[str, pd.DataFrame]:
+    """Stream the file and keep one row per user/run/stage with its latest status"""
+    user_col = analysis['user_column']
+    run_col = analysis['run_column']
+    stage_col = analysis['stage_column']
+    status_col = analysis.get('status_column')
+    columns = [user_col, run_col, stage_col] + ([status_col] if status_col else [])
+
+    collapsed = {}
+    total_rows = 0
+    for sheet_name, chunk in iter_row_chunks(file_path, columns, chunksize):
+        total_rows += len(chunk)
+        sheet_rows = collapsed.setdefault(sheet_name, {})
+        statuses = chunk[status_col].tolist() if status_col else [''] * len(chunk)
+        # Insertion order of the dict keeps first appearance order (used for stage order)
+        for key, status in zip(zip(chunk[user_col].tolist(), chunk[run_col].tolist(), chunk[stage_col].tolist()), statuses):
+            sheet_rows[key] = status
+
+    sheets_data = {}
+    for sheet_name, sheet_rows in collapsed.items():
+        df = pd.DataFrame([key + (status,) for key, status in sheet_rows.items()],
+                          columns=[user_col, run_col, stage_col, status_col or '_status'])
+        if not status_col:
+            df = df.drop(columns=['_status'])
+        sheets_data[sheet_name] = df
+
+    logger.info(f"Streamed {total_rows} rows into {sum(len(df) for df in sheets_data.values())} distinct run stages")
+    return sheets_data
+
+
+def generate_streaming_layout(file_path: str, chunksize: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """Flow view layout for large files: roles from a sample, then a single streaming pass"""
+    try:
+        sample = read_sample(file_path)
+        if not sample:
+            raise ValueError("File contains no data")
+        analysis = infer_column_roles(next(iter(sample.values())))
+
+        sheets_data = collapse_run_rows(file_path, analysis, chunksize)
+        if not sheets_data:
+            raise ValueError("File contains no data")
+
+        # Stages come from the whole file, in order of first appearance like the full analysis
+        stage_col = analysis['stage_column']
+        seen_stages = {}
+        for df in sheets_data.values():
+            seen_stages.update(dict.fromkeys(df[stage_col].unique()))
+        data_analyzer = DataStructureAnalyzer()
+        analysis['stages'] = [{
+            "name": stage,
+            "order": i,
+            "color": data_analyzer._generate_color(i),
+            "description": f"Stage: {stage}"
+        } for i, stage in enumerate(seen_stages)]
+
+        layout_data = EnhancedLayoutGenerator().generate_layout_from_sheets(sheets_data, analysis)
+        layout_data["streaming"] = {
+            "chunk_size": chunksize,
+            "distinct_run_stages": sum(len(df) for df in sheets_data.values())
+        }
+        return layout_data
+
+    except Exception as e:
+        logger.error(f"Error in streaming layout generation: {e}")
+        raise ValueError(f"Failed to generate streaming layout: {str(e)}")
@@ -11,6 +11,7 @@ from typing import Dict, Any
 DEFAULT_CONFIG = {
     'monitoring': {
         'interval': 30,
+        'snapshot_interval': 2,
         'cpu_threshold': 80.0,
         'memory_threshold': 80.0,
         'history_size': 1000
@@ -1,53 +1,205 @@
 #!/usr/bin/env python3.12
 """
 Alert management module for resource monitoring
+Rules are evaluated on rolling-window aggregates (avg or p95 over N seconds) rather than
+single samples, with separate fire and clear levels, and raise one alert per host and
+rule until it clears.
 """
 
 import os
+import time
 import logging
+import threading
 from datetime import datetime
 from collections import deque
 from typing import Dict, List
 
 logger = logging.getLogger('ResourceManager')
 
+# A window needs this many samples before its rules are evaluated, so one spike at startup cannot fire
+MIN_SAMPLES = 3
+
+# p95 is read from a histogram of HISTOGRAM_BINS bins over 0..HISTOGRAM_MAX (larger values land in the last bin)
+HISTOGRAM_BINS = 200
+HISTOGRAM_MAX = 100.0
+
+
+class AlertRule:
+    """Fires when the windowed aggregate of a metric reaches ``fire`` and clears at or below ``clear``"""
+
+    def __init__(self, name: str, metric: str, fire: float, clear: float, window: int = 60,
+                 aggregate: str = 'avg', severity: str = 'warning', label: str = None):
+        if aggregate not in ('avg', 'p95'):
+            raise ValueError(f"Unsupported aggregate: {aggregate}")
+        self.name = name
+        self.metric = metric
+        self.fire = fire
+        self.clear = clear
+        self.window = window
+        self.aggregate = aggregate
+        self.severity = severity
+        self.label = label or metric.upper()
+
+
+def default_rules(cpu_threshold: float = 80.0, memory_threshold: float = 80.0,
+                  disk_threshold: float = 90.0, load_threshold: float = 10.0) -> List[AlertRule]:
+    """CPU, memory, disk and load rules; each clears a little below its fire level"""
+    return [
+        AlertRule('cpu_high', 'cpu', cpu_threshold, cpu_threshold - 10, window=60, label='CPU usage'),
+        AlertRule('memory_high', 'memory', memory_threshold, memory_threshold - 5, window=60, label='memory usage'),
+        AlertRule('disk_high', 'disk', disk_threshold, disk_threshold - 5, window=60, label='disk usage'),
+        AlertRule('load_high', 'load', load_threshold, load_threshold * 0.8, window=300, label='load average')
+    ]
+
+
+class RollingWindow:
+    """Samples of one metric of one host over the last ``seconds`` seconds
+
+    Adding a sample and expiring old ones is O(1) per sample: the average comes from a
+    running sum and p95 from a fixed-size histogram.
+    """
+
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.samples = deque()  # (timestamp, value, bin)
+        self.total = 0.0
+        self.histogram = [0] * HISTOGRAM_BINS
+
+    @staticmethod
+    def _bin(value: float) -> int:
+        return min(max(int(value / HISTOGRAM_MAX * HISTOGRAM_BINS), 0), HISTOGRAM_BINS - 1)
+
+    def add(self, value: float, timestamp: float):
+        index = self._bin(value)
+        self.samples.append((timestamp, value, index))
+        self.total += value
+        self.histogram[index] += 1
+        while self.samples and self.samples[0][0] <= timestamp - self.seconds:
+            _, old_value, old_index = self.samples.popleft()
+            self.total -= old_value
+            self.histogram[old_index] -= 1
+
+    def __len__(self):
+        return len(self.samples)
+
+    def avg(self) -> float:
+        return self.total / len(self.samples) if self.samples else 0.0
+
+    def p95(self) -> float:
+        """Upper edge of the histogram bin holding the 95th percentile"""
+        rank = 0.95 * len(self.samples)
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= rank:
+                return (index + 1) * HISTOGRAM_MAX / HISTOGRAM_BINS
+        return 0.0
+
+
+class AlertEngine:
+    """Evaluates alert rules for any number of hosts from one set of shared windows"""
+
+    def __init__(self, rules: List[AlertRule] = None, history_size: int = 100):
+        self.rules = rules if rules is not None else default_rules()
+        self.rules_by_metric = {}
+        for rule in self.rules:
+            self.rules_by_metric.setdefault(rule.metric, []).append(rule)
+        self.windows = {}  # {(host, metric, seconds): RollingWindow}, shared by rules with the same window
+        self.active = {}  # {(host, rule name): alert}
+        self.history = deque(maxlen=history_size)  # Fired and resolved events only
+        self.lock = threading.Lock()
+
+    def _alert(self, host: str, rule: AlertRule, value: float, timestamp: float) -> Dict:
+        return {
+            'id': f'{host}:{rule.name}',
+            'type': rule.severity,
+            'rule': rule.name,
+            'host': host,
+            'metric': rule.metric,
+            'value': round(value, 1),
+            'threshold': rule.fire,
+            'message': f"High {rule.label} on {host}: {value:.1f} ({rule.aggregate} over {rule.window}s)",
+            'timestamp': datetime.fromtimestamp(timestamp).isoformat(),
+            'state': 'firing'
+        }
+
+    def observe(self, host: str, metrics: Dict[str, float], timestamp: float = None) -> List[Dict]:
+        """Add one sample per metric for a host; returns the alerts that fired or resolved"""
+        timestamp = timestamp or time.time()
+        events = []
+        with self.lock:
+            for metric, value in metrics.items():
+                rules = self.rules_by_metric.get(metric)
+                if not rules or not isinstance(value, (int, float)):
+                    continue
+                updated = set()
+                for rule in rules:
+                    key = (host, metric, rule.window)
+                    window = self.windows.get(key)
+                    if window is None:
+                        window = self.windows[key] = RollingWindow(rule.window)
+                    if key not in updated:
+                        window.add(float(value), timestamp)
+                        updated.add(key)
+                    if len(window) < MIN_SAMPLES:
+                        continue
+
+                    aggregate = window.avg() if rule.aggregate == 'avg' else window.p95()
+                    alert_key = (host, rule.name)
+                    alert = self.active.get(alert_key)
+                    if alert is None and aggregate >= rule.fire:
+                        alert = self.active[alert_key] = self._alert(host, rule, aggregate, timestamp)
+                        self.history.append(dict(alert))
+                        events.append(alert)
+                    elif alert is not None and aggregate <= rule.clear:
+                        del self.active[alert_key]
+                        resolved = dict(alert, state='resolved', value=round(aggregate, 1),
+                                        resolved_at=datetime.fromtimestamp(timestamp).isoformat())
+                        self.history.append(resolved)
+                        events.append(resolved)
+                    elif alert is not None:
+                        # Still firing: update in place instead of raising it again
+                        alert['value'] = round(aggregate, 1)
+                        alert['last_seen'] = datetime.fromtimestamp(timestamp).isoformat()
+        return events
+
+    def active_alerts(self, host: str = None) -> List[Dict]:
+        """Alerts that are currently firing (for one host or all), oldest first"""
+        with self.lock:
+            return [dict(alert) for (alert_host, _), alert in self.active.items()
+                    if host is None or alert_host == host]
+
+    def retain_hosts(self, hosts):
+        """Drop windows and alerts of hosts that are no longer monitored"""
+        hosts = set(hosts)
+        with self.lock:
+            for key in [key for key in self.windows if key[0] not in hosts]:
+                del self.windows[key]
+            for key in [key for key in self.active if key[0] not in hosts]:
+                del self.active[key]
+
+
 class AlertManager:
     """Handle alerting for resource thresholds"""
 
-    def __init__(self, cpu_threshold: float = 80.0, memory_threshold: float = 80.0):
+    def __init__(self, cpu_threshold: float = 80.0, memory_threshold: float = 80.0, host: str = 'localhost'):
         self.cpu_threshold = cpu_threshold
         self.memory_threshold = memory_threshold
-        self.alert_history = deque(maxlen=100)
+        self.host = host
+        self.engine = AlertEngine([rule for rule in default_rules(cpu_threshold, memory_threshold)
+                                   if rule.metric in ('cpu', 'memory')])
+        self.alert_history = self.engine.history
 
     def check_thresholds(self, metrics: Dict) -> List[Dict]:
-        """Check if metrics exceed thresholds and generate alerts"""
-        alerts = []
-
-        # Check CPU threshold
-        if metrics.get('cpu', {}).get('percent', 0) > self.cpu_threshold:
-            alert = {
-                'type': 'cpu_high',
-                'timestamp': datetime.now().isoformat(),
-                'value': metrics['cpu']['percent'],
-                'threshold': self.cpu_threshold,
-                'message': f"High CPU usage: {metrics['cpu']['percent']:.1f}%"
-            }
-            alerts.append(alert)
-            self.alert_history.append(alert)
-
-        # Check memory threshold
-        if metrics.get('memory', {}).get('percent', 0) > self.memory_threshold:
-            alert = {
-                'type': 'memory_high',
-                'timestamp': datetime.now().isoformat(),
-                'value': metrics['memory']['percent'],
-                'threshold': self.memory_threshold,
-                'message': f"High memory usage: {metrics['memory']['percent']:.1f}%"
-            }
-            alerts.append(alert)
-            self.alert_history.append(alert)
-
-        return alerts
+        """Feed metrics to the rule engine and return the alerts that newly fired
+
+        An alert is returned once when it fires, not again on every check while it lasts.
+        """
+        events = self.engine.observe(self.host, {
+            'cpu': metrics.get('cpu', {}).get('percent'),
+            'memory': metrics.get('memory', {}).get('percent')
+        })
+        return [event for event in events if event['state'] == 'firing']
 
     def send_alert(self, alert: Dict):
         """Send alert notification"""
@@ -1,76 +1,225 @@
 #!/usr/bin/env python3.12
 """
 Cgroup management module for resource control
+Supports the cgroup v1 hierarchy (cpu, cpuacct, memory) and the unified v2 hierarchy
+(cpu.max, cpu.weight, memory.max, memory.high, io.max); the version is detected automatically.
 """
 
 import os
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Union
 
 logger = logging.getLogger('ResourceManager')
 
+# v2 groups are created under this group, which holds no processes itself
+V2_PARENT = 'resource-manager'
+V2_CONTROLLERS = ('cpu', 'memory', 'io')
+
+CPU_PERIOD_US = 100000
+
+_SIZE_UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(size: Union[str, int]) -> int:
+    """Bytes from an int or a string such as '512M' or '2G'"""
+    if isinstance(size, int):
+        return size
+    size = size.strip().upper().rstrip('B')
+    if size and size[-1] in _SIZE_UNITS:
+        return int(float(size[:-1]) * _SIZE_UNITS[size[-1]])
+    return int(size)
+
+
+def shares_to_weight(shares: int) -> int:
+    """cgroup v1 cpu.shares (2..262144, default 1024) to v2 cpu.weight (1..10000, default 100)
+
+    Proportional like systemd's conversion, so a group keeps the same ratio to the default
+    on both hierarchies (512 shares = weight 50, half the CPU of a default group).
+    """
+    return min(max(shares * 100 // 1024, 1), 10000)
+
+
+def _device_id(device: str) -> str:
+    """'MAJ:MIN' for a block device path (or an id that is already MAJ:MIN)"""
+    if ':' in device:
+        return device
+    rdev = os.stat(device).st_rdev
+    return f'{os.major(rdev)}:{os.minor(rdev)}'
+
+
+def _read_keyed(path: str) -> Dict[str, int]:
+    """Parse flat keyed files such as cpu.stat, memory.stat and memory.events"""
+    values = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, value = line.partition(' ')
+                try:
+                    values[key] = int(value)
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return values
+
+
+def _read_value(path: str) -> Optional[int]:
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    if value == 'max':
+        return 0  # No limit
+    return int(value)
+
+
+def _write(path: str, value: str):
+    with open(path, 'w') as f:
+        f.write(value)
+
+
 class CgroupManager:
     """Manage cgroups for resource control"""
 
-    def __init__(self):
-        self.cgroup_root = "/sys/fs/cgroup"
+    def __init__(self, cgroup_root: str = "/sys/fs/cgroup"):
+        self.cgroup_root = cgroup_root
         self.custom_groups = {}
+        self.version = 2 if os.path.exists(f"{cgroup_root}/cgroup.controllers") else 1
+        self.v2_parent = f"{cgroup_root}/{V2_PARENT}"
+
+    def _enable_v2_controllers(self):
+        """Delegate cpu, memory and io from the root down to our parent group"""
+        os.makedirs(self.v2_parent, exist_ok=True)
+        for path in (self.cgroup_root, self.v2_parent):
+            with open(f"{path}/cgroup.controllers") as f:
+                available = f.read().split()
+            wanted = ' '.join(f'+{controller}' for controller in V2_CONTROLLERS if controller in available)
+            if wanted:
+                _write(f"{path}/cgroup.subtree_control", wanted)
 
-    def create_cgroup(self, name: str, cpu_limit: Optional[int] = None, 
-                     memory_limit: Optional[str] = None) -> bool:
-        """Create a new cgroup with specified limits"""
+    def create_cgroup(self, name: str, cpu_limit: Optional[int] = None,
+                     memory_limit: Optional[str] = None, cpu_max: Optional[float] = None,
+                     memory_high: Optional[str] = None, io_max: Optional[Dict[str, Dict[str, int]]] = None) -> bool:
+        """Create a new cgroup with specified limits
+
+        cpu_limit is a relative weight in cpu.shares units (converted to cpu.weight on v2),
+        cpu_max a hard cap in CPUs (e.g. 2.5), memory_limit the hard memory limit and
+        memory_high the throttling point, both like '4G'. io_max maps a device ('/dev/sda' or
+        '8:0') to limits such as {'rbps': ..., 'wbps': ..., 'riops': ..., 'wiops': ...}.
+        cpu_max, memory_high and io_max need cgroup v2.
+        """
         try:
-            # Create cgroup directories
-            cpu_path = f"{self.cgroup_root}/cpu/{name}"
-            memory_path = f"{self.cgroup_root}/memory/{name}"
-
-            os.makedirs(cpu_path, exist_ok=True)
-            os.makedirs(memory_path, exist_ok=True)
-
-            # Set CPU limit (CPU shares)
-            if cpu_limit:
-                with open(f"{cpu_path}/cpu.shares", 'w') as f:
-                    f.write(str(cpu_limit))
-
-            # Set memory limit
-            if memory_limit:
-                with open(f"{memory_path}/memory.limit_in_bytes", 'w') as f:
-                    f.write(memory_limit)
-
-                # Disable swap for this cgroup
-                with open(f"{memory_path}/memory.swappiness", 'w') as f:
-                    f.write("0")
-
-            self.custom_groups[name] = {
-                'cpu_path': cpu_path,
-                'memory_path': memory_path,
+            if self.version == 2:
+                group = self._create_v2(name, cpu_limit, memory_limit, cpu_max, memory_high, io_max)
+            else:
+                if cpu_max or memory_high or io_max:
+                    logger.warning(f"cpu_max, memory_high and io_max need cgroup v2; ignored for '{name}'")
+                group = self._create_v1(name, cpu_limit, memory_limit)
+
+            group.update({
                 'cpu_limit': cpu_limit,
-                'memory_limit': memory_limit
-            }
+                'memory_limit': memory_limit,
+                'cpu_max': cpu_max,
+                'memory_high': memory_high,
+                'io_max': io_max
+            })
+            self.custom_groups[name] = group
 
-            logger.info(f"Created cgroup '{name}' with CPU: {cpu_limit}, Memory: {memory_limit}")
+            logger.info(f"Created cgroup '{name}' (v{self.version}) with CPU: {cpu_limit}, CPU max: {cpu_max}, "
+                        f"Memory: {memory_limit}, Memory high: {memory_high}")
             return True
 
         except Exception as e:
             logger.error(f"Error creating cgroup '{name}': {e}")
             return False
 
+    def _create_v1(self, name: str, cpu_limit: Optional[int], memory_limit: Optional[str]) -> Dict:
+        # Create cgroup directories
+        cpu_path = f"{self.cgroup_root}/cpu/{name}"
+        memory_path = f"{self.cgroup_root}/memory/{name}"
+
+        os.makedirs(cpu_path, exist_ok=True)
+        os.makedirs(memory_path, exist_ok=True)
+
+        # Set CPU limit (CPU shares)
+        if cpu_limit:
+            _write(f"{cpu_path}/cpu.shares", str(cpu_limit))
+
+        # Set memory limit
+        if memory_limit:
+            _write(f"{memory_path}/memory.limit_in_bytes", str(parse_size(memory_limit)))
+
+            # Disable swap for this cgroup
+            _write(f"{memory_path}/memory.swappiness", "0")
+
+        return {'cpu_path': cpu_path, 'memory_path': memory_path}
+
+    def _create_v2(self, name: str, cpu_limit: Optional[int], memory_limit: Optional[str],
+                   cpu_max: Optional[float], memory_high: Optional[str],
+                   io_max: Optional[Dict[str, Dict[str, int]]]) -> Dict:
+        self._enable_v2_controllers()
+        path = f"{self.v2_parent}/{name}"
+        os.makedirs(path, exist_ok=True)
+
+        if cpu_limit:
+            _write(f"{path}/cpu.weight", str(shares_to_weight(cpu_limit)))
+        if cpu_max:
+            _write(f"{path}/cpu.max", f"{int(cpu_max * CPU_PERIOD_US)} {CPU_PERIOD_US}")
+        if memory_limit:
+            _write(f"{path}/memory.max", str(parse_size(memory_limit)))
+            # Same intent as swappiness 0 on v1: no swapping around the limit
+            if os.path.exists(f"{path}/memory.swap.max"):
+                _write(f"{path}/memory.swap.max", "0")
+        if memory_high:
+            _write(f"{path}/memory.high", str(parse_size(memory_high)))
+        for device, limits in (io_max or {}).items():
+            settings = ' '.join(f'{key}={value}' for key, value in limits.items())
+            _write(f"{path}/io.max", f"{_device_id(device)} {settings}")
+
+        # One unified directory; both keys point at it so callers need not care about the version
+        return {'path': path, 'cpu_path': path, 'memory_path': path}
+
+    def _group(self, cgroup_name: str) -> Optional[Dict]:
+        group = self.custom_groups.get(cgroup_name)
+        if group:
+            return group
+        # Groups created by an earlier run are still on disk
+        if self.version == 2:
+            path = f"{self.v2_parent}/{cgroup_name}"
+            if os.path.isdir(path):
+                return {'path': path, 'cpu_path': path, 'memory_path': path}
+        elif os.path.isdir(f"{self.cgroup_root}/cpu/{cgroup_name}"):
+            return {'cpu_path': f"{self.cgroup_root}/cpu/{cgroup_name}",
+                    'memory_path': f"{self.cgroup_root}/memory/{cgroup_name}"}
+        return None
+
+    def has_cgroup(self, cgroup_name: str) -> bool:
+        return self._group(cgroup_name) is not None
+
+    def list_cgroups(self) -> List[str]:
+        """Groups created by this manager; on v2 also every group on disk under the parent group"""
+        names = set(self.custom_groups)
+        if self.version == 2 and os.path.isdir(self.v2_parent):
+            names.update(entry.name for entry in os.scandir(self.v2_parent) if entry.is_dir())
+        return sorted(names)
+
     def add_process_to_cgroup(self, cgroup_name: str, pid: int) -> bool:
         """Add a process to a cgroup"""
         try:
-            if cgroup_name not in self.custom_groups:
+            group = self._group(cgroup_name)
+            if not group:
                 logger.error(f"Cgroup '{cgroup_name}' does not exist")
                 return False
 
-            group = self.custom_groups[cgroup_name]
+            if self.version == 2:
+                _write(f"{group['path']}/cgroup.procs", str(pid))
+            else:
+                # Add to CPU cgroup
+                _write(f"{group['cpu_path']}/cgroup.procs", str(pid))
 
-            # Add to CPU cgroup
-            with open(f"{group['cpu_path']}/cgroup.procs", 'w') as f:
-                f.write(str(pid))
-
-            # Add to memory cgroup
-            with open(f"{group['memory_path']}/cgroup.procs", 'w') as f:
-                f.write(str(pid))
+                # Add to memory cgroup
+                _write(f"{group['memory_path']}/cgroup.procs", str(pid))
 
             logger.info(f"Added process {pid} to cgroup '{cgroup_name}'")
             return True
@@ -80,36 +229,49 @@ class CgroupManager:
             return False
 
     def get_cgroup_stats(self, cgroup_name: str) -> Dict:
-        """Get statistics for a cgroup"""
+        """Get statistics for a cgroup
+
+        cpu_usage_ns, memory_usage_bytes and memory_limit_bytes (0 = unlimited) on both versions;
+        v2 adds throttling, memory breakdown and OOM kill counts.
+        """
         try:
-            if cgroup_name not in self.custom_groups:
+            group = self._group(cgroup_name)
+            if not group:
                 return {}
 
-            group = self.custom_groups[cgroup_name]
+            if self.version == 2:
+                return self._stats_v2(group['path'])
+
             stats = {}
 
             # CPU stats
-            try:
-                with open(f"{group['cpu_path']}/cpuacct.usage", 'r') as f:
-                    stats['cpu_usage_ns'] = int(f.read().strip())
-            except:
-                stats['cpu_usage_ns'] = 0
+            stats['cpu_usage_ns'] = _read_value(f"{group['cpu_path']}/cpuacct.usage") or 0
 
             # Memory stats
-            try:
-                with open(f"{group['memory_path']}/memory.usage_in_bytes", 'r') as f:
-                    stats['memory_usage_bytes'] = int(f.read().strip())
-            except:
-                stats['memory_usage_bytes'] = 0
-
-            try:
-                with open(f"{group['memory_path']}/memory.limit_in_bytes", 'r') as f:
-                    stats['memory_limit_bytes'] = int(f.read().strip())
-            except:
-                stats['memory_limit_bytes'] = 0
+            stats['memory_usage_bytes'] = _read_value(f"{group['memory_path']}/memory.usage_in_bytes") or 0
+            stats['memory_limit_bytes'] = _read_value(f"{group['memory_path']}/memory.limit_in_bytes") or 0
 
             return stats
 
         except Exception as e:
             logger.error(f"Error getting cgroup stats for '{cgroup_name}': {e}")
-            return {} 
\ No newline at end of file
+            return {}
+
+    def _stats_v2(self, path: str) -> Dict:
+        cpu = _read_keyed(f"{path}/cpu.stat")
+        memory = _read_keyed(f"{path}/memory.stat")
+        events = _read_keyed(f"{path}/memory.events")
+        return {
+            'cpu_usage_ns': cpu.get('usage_usec', 0) * 1000,
+            'cpu_user_ns': cpu.get('user_usec', 0) * 1000,
+            'cpu_system_ns': cpu.get('system_usec', 0) * 1000,
+            'cpu_throttled_count': cpu.get('nr_throttled', 0),
+            'cpu_throttled_ns': cpu.get('throttled_usec', 0) * 1000,
+            'memory_usage_bytes': _read_value(f"{path}/memory.current") or 0,
+            'memory_limit_bytes': _read_value(f"{path}/memory.max") or 0,
+            'memory_high_bytes': _read_value(f"{path}/memory.high") or 0,
+            'memory_anon_bytes': memory.get('anon', 0),
+            'memory_file_bytes': memory.get('file', 0),
+            'memory_high_events': events.get('high', 0),
+            'oom_kills': events.get('oom_kill', 0)
+        }
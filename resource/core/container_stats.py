@@ -0,0 +1,265 @@
+#!/usr/bin/env python3.12
+"""
+Docker container statistics
+Containers are listed with one Docker Engine API request over the unix socket (or one
+`docker ps` when the socket is not accessible). CPU and memory come straight from each
+container's cgroup (v1 or v2 layout), with CPU usage computed from the delta since the
+previous collection, so all containers are sampled in one pass without `docker stats`.
+"""
+
+import os
+import json
+import time
+import socket
+import logging
+import subprocess
+import http.client
+import threading
+from typing import Dict, List, Optional
+
+import psutil
+
+logger = logging.getLogger('ResourceManager')
+
+DOCKER_SOCKET = '/var/run/docker.sock'
+CGROUP_ROOT = os.environ.get('RESOURCE_CGROUP_ROOT', '/sys/fs/cgroup')
+
+# Short baseline when a container is seen for the first time, instead of reporting 0% CPU
+BASELINE_INTERVAL = 0.25
+
+# Where Docker puts a container's cgroup, for the systemd and cgroupfs drivers
+_V2_DIRS = ('system.slice/docker-{id}.scope', 'docker/{id}')
+_V1_CPU_DIRS = ('cpuacct/docker/{id}', 'cpuacct/system.slice/docker-{id}.scope',
+                'cpu,cpuacct/docker/{id}', 'cpu,cpuacct/system.slice/docker-{id}.scope')
+_V1_MEMORY_DIRS = ('memory/docker/{id}', 'memory/system.slice/docker-{id}.scope')
+
+# memory.max / memory.limit_in_bytes values meaning "no limit" are at least this large
+_UNLIMITED = 1 << 60
+
+
+def format_bytes(num_bytes: float) -> str:
+    """Size in the style of docker stats (e.g. 512.3MiB, 1.944GiB)"""
+    for unit in ['B', 'KiB', 'MiB', 'GiB']:
+        if num_bytes < 1024 or unit == 'GiB':
+            break
+        num_bytes /= 1024
+    if unit == 'B':
+        return f'{int(num_bytes)}B'
+    return f'{num_bytes:.4g}{unit}'
+
+
+def _read_int(path: str) -> Optional[int]:
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    return _UNLIMITED if value == 'max' else int(value)
+
+
+def _read_stat(path: str) -> Dict[str, int]:
+    stats = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, value = line.partition(' ')
+                stats[key] = int(value)
+    except (OSError, ValueError):
+        pass
+    return stats
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection to the Docker daemon socket"""
+
+    def __init__(self, socket_path: str, timeout: float = 5):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ContainerStatsCollector:
+    """Lists running containers and samples their CPU and memory in one pass"""
+
+    def __init__(self, docker_socket: str = DOCKER_SOCKET, cgroup_root: str = CGROUP_ROOT):
+        self.docker_socket = docker_socket
+        self.cgroup_root = cgroup_root
+        self.cgroup_v2 = os.path.exists(os.path.join(cgroup_root, 'cgroup.controllers'))
+        self.cgroup_dirs = {}  # {container id: (cpu dir, memory dir)}
+        self.previous = {}  # {container id: (cpu usage ns, monotonic ns)}
+        self.connection = None
+        self.lock = threading.Lock()
+
+    # Docker Engine API
+
+    def _api_get(self, path: str):
+        """GET from the Engine API over one kept-alive connection (reconnects once on failure)"""
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = _UnixHTTPConnection(self.docker_socket)
+            try:
+                self.connection.request('GET', path)
+                response = self.connection.getresponse()
+                body = response.read()
+                if response.status != 200:
+                    raise RuntimeError(f"Docker API {path} returned {response.status}")
+                return json.loads(body)
+            except (OSError, http.client.HTTPException):
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+    def list_containers(self) -> List[Dict]:
+        """Running containers as {id, name, image, status}"""
+        if os.access(self.docker_socket, os.R_OK | os.W_OK):
+            try:
+                return [{
+                    'id': container['Id'],
+                    'name': container['Names'][0].lstrip('/') if container.get('Names') else 'Unknown',
+                    'image': container.get('Image', 'Unknown'),
+                    'status': container.get('Status', 'Unknown')
+                } for container in self._api_get('/containers/json')]
+            except (OSError, RuntimeError, ValueError, http.client.HTTPException) as e:
+                logger.warning(f"Docker API not available, falling back to docker ps: {e}")
+
+        result = subprocess.run(['docker', 'ps', '--no-trunc', '--format', 'json'], stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, universal_newlines=True, timeout=10)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or 'docker ps failed')
+        containers = []
+        for line in result.stdout.splitlines():
+            if line.strip():
+                container = json.loads(line)
+                containers.append({
+                    'id': container.get('ID', ''),
+                    'name': container.get('Names', 'Unknown'),
+                    'image': container.get('Image', 'Unknown'),
+                    'status': container.get('Status', 'Unknown')
+                })
+        return containers
+
+    # cgroup counters
+
+    def _find_cgroup(self, container_id: str):
+        if container_id in self.cgroup_dirs:
+            return self.cgroup_dirs[container_id]
+
+        def first_existing(patterns):
+            for pattern in patterns:
+                path = os.path.join(self.cgroup_root, pattern.format(id=container_id))
+                if os.path.isdir(path):
+                    return path
+            return None
+
+        if self.cgroup_v2:
+            path = first_existing(_V2_DIRS)
+            dirs = (path, path) if path else None
+        else:
+            cpu_dir, memory_dir = first_existing(_V1_CPU_DIRS), first_existing(_V1_MEMORY_DIRS)
+            dirs = (cpu_dir, memory_dir) if cpu_dir and memory_dir else None
+        if dirs:
+            self.cgroup_dirs[container_id] = dirs
+        return dirs
+
+    def _read_cgroup(self, container_id: str) -> Optional[Dict]:
+        """CPU usage (ns) and memory usage/limit (bytes) from the container's cgroup"""
+        dirs = self._find_cgroup(container_id)
+        if not dirs:
+            return None
+        cpu_dir, memory_dir = dirs
+        if self.cgroup_v2:
+            cpu_usage = _read_stat(os.path.join(cpu_dir, 'cpu.stat')).get('usage_usec')
+            cpu_usage = cpu_usage * 1000 if cpu_usage is not None else None
+            memory = _read_int(os.path.join(memory_dir, 'memory.current'))
+            limit = _read_int(os.path.join(memory_dir, 'memory.max'))
+            inactive_file = _read_stat(os.path.join(memory_dir, 'memory.stat')).get('inactive_file', 0)
+        else:
+            cpu_usage = _read_int(os.path.join(cpu_dir, 'cpuacct.usage'))
+            memory = _read_int(os.path.join(memory_dir, 'memory.usage_in_bytes'))
+            limit = _read_int(os.path.join(memory_dir, 'memory.limit_in_bytes'))
+            inactive_file = _read_stat(os.path.join(memory_dir, 'memory.stat')).get('total_inactive_file', 0)
+
+        if cpu_usage is None or memory is None:
+            # The container stopped (or was recreated) since its directory was found
+            self.cgroup_dirs.pop(container_id, None)
+            return None
+        return {'cpu_usage': cpu_usage, 'memory': memory, 'limit': limit, 'inactive_file': inactive_file}
+
+    def _read_api(self, container_id: str) -> Optional[Dict]:
+        """Same counters from the Engine API (one-shot, no second sample) when the cgroup is not visible"""
+        try:
+            stats = self._api_get(f'/containers/{container_id}/stats?stream=false&one-shot=true')
+        except (OSError, RuntimeError, ValueError, http.client.HTTPException):
+            return None
+        memory_stats = stats.get('memory_stats', {})
+        memory_details = memory_stats.get('stats', {})
+        return {
+            'cpu_usage': stats.get('cpu_stats', {}).get('cpu_usage', {}).get('total_usage', 0),
+            'memory': memory_stats.get('usage', 0),
+            'limit': memory_stats.get('limit', _UNLIMITED),
+            'inactive_file': memory_details.get('inactive_file', memory_details.get('total_inactive_file', 0))
+        }
+
+    def _read_counters(self, container_ids: List[str]) -> Dict[str, Dict]:
+        counters = {}
+        use_api = os.access(self.docker_socket, os.R_OK | os.W_OK)
+        for container_id in container_ids:
+            sample = self._read_cgroup(container_id) or (self._read_api(container_id) if use_api else None)
+            if sample:
+                sample['time'] = time.monotonic_ns()
+                counters[container_id] = sample
+        return counters
+
+    def collect(self) -> List[Dict]:
+        """Current stats of every running container
+
+        Returns {id, name, image, status, cpu_percent, memory_percent, memory_usage, memory_used_bytes,
+        memory_limit_bytes} per container; cpu_percent is relative to one CPU, like docker stats.
+        """
+        with self.lock:
+            containers = self.list_containers()
+            ids = [container['id'] for container in containers]
+            counters = self._read_counters(ids)
+
+            new = [container_id for container_id in counters if container_id not in self.previous]
+            if new:
+                # One short baseline for all newly seen containers together
+                self.previous.update({container_id: counters[container_id] for container_id in new})
+                time.sleep(BASELINE_INTERVAL)
+                counters.update(self._read_counters(new))
+
+            host_memory = psutil.virtual_memory().total
+            results = []
+            for container in containers:
+                sample = counters.get(container['id'])
+                cpu_percent = memory_percent = 0.0
+                memory_usage = 'Unknown'
+                used = limit = None
+                if sample:
+                    previous = self.previous.get(container['id'])
+                    elapsed = sample['time'] - previous['time'] if previous else 0
+                    if elapsed > 0 and sample['cpu_usage'] >= previous['cpu_usage']:
+                        cpu_percent = (sample['cpu_usage'] - previous['cpu_usage']) / elapsed * 100
+
+                    # Same as docker stats: page cache that can be reclaimed is not counted
+                    used = max(sample['memory'] - sample['inactive_file'], 0)
+                    limit = sample['limit'] if sample['limit'] and sample['limit'] < _UNLIMITED else host_memory
+                    limit = min(limit, host_memory)
+                    memory_percent = used / limit * 100 if limit else 0.0
+                    memory_usage = f'{format_bytes(used)} / {format_bytes(limit)}'
+
+                results.append(dict(container, cpu_percent=round(cpu_percent, 2),
+                                    memory_percent=round(memory_percent, 2), memory_usage=memory_usage,
+                                    memory_used_bytes=used, memory_limit_bytes=limit))
+
+            # Forget containers that are gone
+            self.previous = counters
+            for container_id in list(self.cgroup_dirs):
+                if container_id not in counters:
+                    del self.cgroup_dirs[container_id]
+            return results
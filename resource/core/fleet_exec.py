@@ -0,0 +1,235 @@
+#!/usr/bin/env python3.12
+"""
+Fleet-wide command execution
+Runs one shell command on many connected servers at once. Each host runs in its own worker
+(at most ``max_concurrency`` at a time) with its own timeout, and its output is reported
+line by line as it arrives. The per-host results are aggregated into one response.
+Running arbitrary commands is off unless a token or a command allowlist is configured.
+"""
+
+import os
+import hmac
+import time
+import ipaddress
+import signal
+import selectors
+import subprocess
+import concurrent.futures
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_CONCURRENCY = 16
+MAX_CONCURRENCY = 64
+DEFAULT_TIMEOUT = 30
+MAX_TIMEOUT = 3600
+# Output kept per host and stream; streamed lines are not limited
+MAX_OUTPUT_BYTES = 64 * 1024
+
+_READ_SIZE = 65536
+
+# Access to the fleet endpoint: a bearer token, and/or a file with the commands that may run
+# (one per line). With neither configured the endpoint is disabled
+FLEET_TOKEN = os.environ.get('RESOURCE_FLEET_TOKEN')
+FLEET_COMMANDS_FILE = os.environ.get('RESOURCE_FLEET_COMMANDS_FILE')
+# Only loopback clients are served unless remote clients are explicitly allowed
+FLEET_ALLOW_REMOTE = os.environ.get('RESOURCE_FLEET_ALLOW_REMOTE', '').lower() in ('1', 'true', 'yes')
+# localhost targets run the command in a local shell only when enabled
+FLEET_LOCAL_SHELL = os.environ.get('RESOURCE_FLEET_LOCAL_SHELL', '').lower() in ('1', 'true', 'yes')
+
+
+def load_allowed_commands(path: Optional[str]) -> frozenset:
+    """Commands of an allowlist file (one per line, '#' starts a comment line)"""
+    if not path:
+        return frozenset()
+    with open(path) as f:
+        return frozenset(line.strip() for line in f if line.strip() and not line.lstrip().startswith('#'))
+
+
+class FleetAccess:
+    """Who may run which command on the fleet
+
+    A request is allowed when it comes from loopback (or remote clients are allowed) and
+    either carries the token as 'Authorization: Bearer <token>' or runs a command from the
+    allowlist exactly as listed.
+    """
+
+    def __init__(self, token: Optional[str] = FLEET_TOKEN, allowed_commands: Optional[frozenset] = None,
+                 allow_remote: bool = FLEET_ALLOW_REMOTE, local_shell: bool = FLEET_LOCAL_SHELL):
+        self.token = token
+        self.allowed_commands = (allowed_commands if allowed_commands is not None
+                                 else load_allowed_commands(FLEET_COMMANDS_FILE))
+        self.allow_remote = allow_remote
+        self.local_shell = local_shell
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token or self.allowed_commands)
+
+    def check(self, client_ip: str, authorization: Optional[str], command: str) -> Optional[Tuple[int, str]]:
+        """None when the request may run, otherwise the HTTP status and reason to refuse it with"""
+        if not self.enabled:
+            return 403, 'Fleet execution is disabled (set RESOURCE_FLEET_TOKEN or RESOURCE_FLEET_COMMANDS_FILE)'
+        if not self.allow_remote:
+            try:
+                loopback = ipaddress.ip_address(client_ip).is_loopback
+            except ValueError:
+                loopback = False
+            if not loopback:
+                return 403, 'Fleet execution is only available from loopback'
+        scheme, _, credentials = (authorization or '').partition(' ')
+        if self.token and scheme.lower() == 'bearer' and hmac.compare_digest(
+                credentials.strip().encode('utf-8'), self.token.encode('utf-8')):
+            return None
+        if command.strip() in self.allowed_commands:
+            return None
+        return 401, 'Fleet token required for commands that are not in the allowlist'
+
+
+def run_streaming(argv: List[str], timeout: float, on_line: Callable[[str, str], None] = None,
+                  max_output: int = MAX_OUTPUT_BYTES) -> Dict:
+    """Run a command, passing each output line to ``on_line(stream, line)`` as it is read
+
+    The process (and everything it started) is killed when it runs longer than ``timeout``.
+    Returns exit_code (None after a timeout), timed_out, stdout, stderr and truncated.
+    """
+    process = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, start_new_session=True)
+    selector = selectors.DefaultSelector()
+    selector.register(process.stdout, selectors.EVENT_READ, 'stdout')
+    selector.register(process.stderr, selectors.EVENT_READ, 'stderr')
+
+    pending = {'stdout': b'', 'stderr': b''}  # Partial line per stream
+    captured = {'stdout': bytearray(), 'stderr': bytearray()}
+    truncated = False
+    timed_out = False
+
+    def emit(stream: str, line: bytes):
+        if on_line:
+            on_line(stream, line.decode('utf-8', errors='replace'))
+
+    deadline = time.monotonic() + timeout
+    try:
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            for key, _ in selector.select(remaining):
+                stream = key.data
+                data = os.read(key.fd, _READ_SIZE)
+                if not data:
+                    selector.unregister(key.fileobj)
+                    if pending[stream]:
+                        emit(stream, pending[stream])
+                        pending[stream] = b''
+                    continue
+
+                room = max_output - len(captured[stream])
+                if len(data) > room:
+                    truncated = True
+                captured[stream] += data[:room]
+
+                *lines, pending[stream] = (pending[stream] + data).split(b'\n')
+                for line in lines:
+                    emit(stream, line)
+    finally:
+        selector.close()
+        if not timed_out:
+            # Both pipes are closed, but the command may still be running
+            try:
+                process.wait(max(0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                timed_out = True
+        if process.poll() is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+        process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+    return {
+        'exit_code': None if timed_out else process.returncode,
+        'timed_out': timed_out,
+        'stdout': captured['stdout'].decode('utf-8', errors='replace'),
+        'stderr': captured['stderr'].decode('utf-8', errors='replace'),
+        'truncated': truncated
+    }
+
+
+class FleetExecutor:
+    """Fans one command out to many hosts and aggregates the results
+
+    ``targets`` maps each host to a function that turns the command into the argv to run
+    for that host (ssh over its session, docker exec, or a local shell). Building the argv
+    may raise (e.g. ConnectionError when the SSH session cannot be opened); the host is then
+    reported with status 'error'.
+
+    ``on_event`` receives one dict per event, from the worker threads:
+    {'event': 'start', 'host'}, {'event': 'output', 'host', 'stream', 'line'} and
+    {'event': 'done', 'host', 'status', 'exit_code', 'duration'}.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_CONCURRENCY, max_output: int = MAX_OUTPUT_BYTES):
+        self.max_concurrency = min(max(1, max_concurrency), MAX_CONCURRENCY)
+        self.max_output = max_output
+
+    def run(self, command: str, targets: Dict[str, Callable[[str], List[str]]],
+            timeout: float = DEFAULT_TIMEOUT, on_event: Callable[[Dict], None] = None) -> Dict:
+        """Run ``command`` on every target; each host gets ``timeout`` seconds from its own start"""
+        timeout = min(max(1, timeout), MAX_TIMEOUT)
+        started = time.monotonic()
+        results = {}
+
+        if targets:
+            workers = min(self.max_concurrency, len(targets))
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fleet') as executor:
+                futures = {executor.submit(self._run_host, host, build, command, timeout, on_event): host
+                           for host, build in targets.items()}
+                for future in concurrent.futures.as_completed(futures):
+                    results[futures[future]] = future.result()
+
+        summary = {'total': len(results), 'ok': 0, 'failed': 0, 'timeout': 0, 'error': 0}
+        for result in results.values():
+            summary[result['status']] += 1
+
+        return {
+            'success': bool(results) and summary['ok'] == len(results),
+            'command': command,
+            'timeout': timeout,
+            'max_concurrency': self.max_concurrency,
+            'duration': round(time.monotonic() - started, 3),
+            'summary': summary,
+            'hosts': {host: results[host] for host in targets}
+        }
+
+    def _run_host(self, host: str, build: Callable[[str], List[str]], command: str, timeout: float,
+                  on_event: Optional[Callable[[Dict], None]]) -> Dict:
+        def notify(event: Dict):
+            if on_event:
+                try:
+                    on_event(event)
+                except Exception:
+                    # A listener that went away (closed stream) must not fail the host
+                    pass
+
+        notify({'event': 'start', 'host': host})
+        started = time.monotonic()
+        try:
+            argv = build(command)
+            result = run_streaming(argv, timeout, max_output=self.max_output,
+                                   on_line=lambda stream, line: notify({'event': 'output', 'host': host,
+                                                                        'stream': stream, 'line': line}))
+            if result['timed_out']:
+                result['status'] = 'timeout'
+                result['error'] = f"No result within {timeout}s"
+            else:
+                result['status'] = 'ok' if result['exit_code'] == 0 else 'failed'
+        except Exception as e:
+            result = {'status': 'error', 'exit_code': None, 'timed_out': False, 'stdout': '', 'stderr': '',
+                      'truncated': False, 'error': str(e)}
+
+        result['duration'] = round(time.monotonic() - started, 3)
+        notify({'event': 'done', 'host': host, 'status': result['status'], 'exit_code': result['exit_code'],
+                'duration': result['duration']})
+        return result
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3.12
+"""
+Metrics history store
+Every series (cpu, memory, ... per host) is a memory-mapped file of fixed-size ring buffers,
+one per resolution (1s, 1m, 1h). Each slot is a min/max/avg rollup of its time bucket, so
+the files never grow and history survives restarts.
+"""
+
+import os
+import re
+import mmap
+import time
+import struct
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger('ResourceManager')
+
+DEFAULT_METRICS_DIR = os.environ.get('RESOURCE_METRICS_DIR',
+                                     os.path.expanduser('~/.cache/resource-manager/metrics'))
+
+# (seconds per bucket, slots): 15 minutes of 1s samples, 1 day of minutes, 30 days of hours
+RESOLUTIONS = ((1, 900), (60, 1440), (3600, 720))
+
+MAX_POINTS = 500
+
+_MAGIC = b'RMTS'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHH' + 'II' * len(RESOLUTIONS))
+# bucket number, min, max, avg, sample count
+_SLOT = struct.Struct('<IfffH')
+
+
+class RingSeries:
+    """One metric of one host, mapped from its file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.offsets = []
+        offset = _HEADER.size
+        for _, slots in RESOLUTIONS:
+            self.offsets.append(offset)
+            offset += slots * _SLOT.size
+        size = offset
+
+        header = _HEADER.pack(_MAGIC, _VERSION, len(RESOLUTIONS),
+                              *[value for resolution in RESOLUTIONS for value in resolution])
+        with os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b') as f:
+            existing = f.read(_HEADER.size)
+            if existing != header or os.path.getsize(path) != size:
+                # New file, or written with other resolutions: start over with empty rings
+                if existing:
+                    logger.warning(f"Resetting metrics file {path} (layout changed)")
+                f.truncate(0)
+                f.truncate(size)
+                f.seek(0)
+                f.write(header)
+                f.flush()
+            self.map = mmap.mmap(f.fileno(), size)
+
+    def record(self, value: float, timestamp: float):
+        with self.lock:
+            for (resolution, slots), offset in zip(RESOLUTIONS, self.offsets):
+                bucket = int(timestamp // resolution)
+                position = offset + (bucket % slots) * _SLOT.size
+                stored, low, high, avg, count = _SLOT.unpack_from(self.map, position)
+                if stored != bucket or count == 0:
+                    _SLOT.pack_into(self.map, position, bucket, value, value, value, 1)
+                elif count < 0xFFFF:
+                    count += 1
+                    _SLOT.pack_into(self.map, position, bucket, min(low, value), max(high, value),
+                                    avg + (value - avg) / count, count)
+
+    def query(self, start: float, end: float, level: int) -> Dict[str, List]:
+        resolution, slots = RESOLUTIONS[level]
+        offset = self.offsets[level]
+        first = int(start // resolution)
+        last = int(end // resolution)
+        # Buckets older than one lap of the ring have been overwritten
+        first = max(first, last - slots + 1)
+
+        points = {'timestamps': [], 'min': [], 'max': [], 'avg': []}
+        with self.lock:
+            for bucket in range(first, last + 1):
+                stored, low, high, avg, count = _SLOT.unpack_from(self.map, offset + (bucket % slots) * _SLOT.size)
+                if stored == bucket and count:
+                    points['timestamps'].append(bucket * resolution)
+                    points['min'].append(round(low, 2))
+                    points['max'].append(round(high, 2))
+                    points['avg'].append(round(avg, 2))
+        return points
+
+    def flush(self):
+        with self.lock:
+            self.map.flush()
+
+    def close(self):
+        with self.lock:
+            self.map.close()
+
+
+class MetricsStore:
+    """Metric history for all hosts, stored as ``<metrics_dir>/<host>/<series>.ring``"""
+
+    def __init__(self, metrics_dir: str = DEFAULT_METRICS_DIR):
+        self.metrics_dir = metrics_dir
+        self.series = {}  # {(host, name): RingSeries}
+        self.lock = threading.Lock()
+        os.makedirs(metrics_dir, exist_ok=True)
+
+    def _path(self, host: str, name: str) -> str:
+        # Host and series names end up in file names, so keep them to a safe character set
+        safe_host = re.sub(r'[^A-Za-z0-9_.-]', '_', host)
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+        return os.path.join(self.metrics_dir, safe_host, f'{safe_name}.ring')
+
+    def _get(self, host: str, name: str, create: bool = True) -> Optional[RingSeries]:
+        key = (host, name)
+        series = self.series.get(key)
+        if series:
+            return series
+        with self.lock:
+            series = self.series.get(key)
+            if series:
+                return series
+            path = self._path(host, name)
+            if not create and not os.path.exists(path):
+                return None
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            series = self.series[key] = RingSeries(path)
+            return series
+
+    def record(self, host: str, values: Dict[str, float], timestamp: float = None):
+        """Add one sample for several series of a host; non-numeric values are skipped"""
+        timestamp = timestamp or time.time()
+        for name, value in values.items():
+            if isinstance(value, (int, float)):
+                try:
+                    self._get(host, name).record(float(value), timestamp)
+                except OSError as e:
+                    logger.error(f"Could not record metric {host}/{name}: {e}")
+
+    def query(self, host: str, name: str, start: float, end: float = None,
+              max_points: int = MAX_POINTS) -> Dict:
+        """Samples of one series between start and end (epoch seconds)
+
+        Uses the finest resolution that still covers ``start`` and returns at most about
+        ``max_points`` points: {'resolution', 'timestamps', 'min', 'max', 'avg'}.
+        """
+        end = end or time.time()
+        now = time.time()
+        level = len(RESOLUTIONS) - 1
+        for index, (resolution, slots) in enumerate(RESOLUTIONS):
+            if now - start <= resolution * slots and (end - start) / resolution <= max_points:
+                level = index
+                break
+
+        series = self._get(host, name, create=False)
+        if not series:
+            points = {'timestamps': [], 'min': [], 'max': [], 'avg': []}
+        else:
+            points = series.query(start, end, level)
+        points['resolution'] = RESOLUTIONS[level][0]
+        return points
+
+    def hosts(self) -> List[str]:
+        """Hosts that have history on disk"""
+        try:
+            return sorted(entry for entry in os.listdir(self.metrics_dir)
+                          if os.path.isdir(os.path.join(self.metrics_dir, entry)))
+        except OSError:
+            return []
+
+    def flush(self):
+        """Write dirty pages to disk (the OS does this on its own as well)"""
+        for series in list(self.series.values()):
+            series.flush()
+
+    def close(self):
+        with self.lock:
+            for series in self.series.values():
+                series.close()
+            self.series = {}
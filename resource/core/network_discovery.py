@@ -16,6 +16,8 @@ import concurrent.futures
 import paramiko
 import psutil
 
+from .scan_engine import ScanEngine, iter_network_hosts
+
 logger = logging.getLogger('NetworkDiscovery')
 
 class NetworkDiscovery:
@@ -41,20 +43,17 @@ class NetworkDiscovery:
         """Discover servers in the network range"""
         logger.info(f"Starting network discovery for range: {network_range}")
         
-        # Parse network range
-        base_ip = network_range.split('/')[0]
-        base_parts = base_ip.split('.')
+        # Same /24 as before: the last octet of the given address is ignored
+        base_parts = network_range.split('/')[0].split('.')
         base_parts[-1] = '0'  # Start from .0
         
-        discovered = []
+        def log_result(result):
+            logger.info(f"Discovered server: {result['ip']}")
         
-        # Scan common ranges
-        for i in range(1, 255):
-            ip = f"{base_parts[0]}.{base_parts[1]}.{base_parts[2]}.{i}"
-            
-            if self._ping_host(ip, timeout):
-                discovered.append(ip)
-                logger.info(f"Discovered server: {ip}")
+        # SSH port probe first, ping for hosts that do not answer on it
+        engine = ScanEngine(timeout=timeout, ping_fallback=True)
+        results = engine.scan(iter_network_hosts(f"{'.'.join(base_parts)}/24"), on_result=log_result)
+        discovered = [result['ip'] for result in results]
         
         self.discovered_servers = {ip: {'discovered_at': datetime.now()} for ip in discovered}
         logger.info(f"Network discovery completed. Found {len(discovered)} servers")
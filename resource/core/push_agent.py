@@ -0,0 +1,414 @@
+#!/usr/bin/env python3.12
+"""
+Push agent for remote hosts
+The agent runs on each monitored host, samples it with SystemMonitor and pushes batches of
+samples to the resource server over one kept-alive HTTP connection, so the server only
+ingests instead of polling every host over SSH. Samples are delta encoded (a batch carries
+one full sample, then only the values that changed) and packed with msgpack when it is
+installed, JSON otherwise. Samples are buffered locally while the server is unreachable.
+"""
+
+import os
+import hmac
+import json
+import time
+import socket
+import logging
+import itertools
+import threading
+import http.client
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import psutil
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+try:
+    from .system_monitor import SystemMonitor
+    from .remote_collector import format_size
+except ImportError:
+    # Fallback for direct execution
+    from system_monitor import SystemMonitor
+    from remote_collector import format_size
+
+logger = logging.getLogger('ResourceManager')
+
+PROTOCOL_VERSION = 1
+INGEST_PATH = '/api/agent/ingest'
+JSON_CONTENT_TYPE = 'application/json'
+MSGPACK_CONTENT_TYPE = 'application/msgpack'
+
+DEFAULT_INTERVAL = 5  # Seconds between samples
+DEFAULT_FLUSH_INTERVAL = 15  # Seconds between pushes
+DEFAULT_BUFFER_SIZE = 2880  # Samples kept while disconnected (4 hours at 5s)
+MAX_BATCH = 240  # Samples per request when catching up after a disconnect
+MAX_BACKOFF = 60
+
+# Server side: agents without a push for this long are stale, and are forgotten after AGENT_EXPIRY
+MIN_STALE_AFTER = 30
+AGENT_EXPIRY = 3600
+DEFAULT_MAX_CONNECTIONS = 256
+
+# Shared secret agents send as 'Authorization: Bearer <token>'; the server refuses agents without it
+AGENT_TOKEN = os.environ.get('RESOURCE_AGENT_TOKEN')
+
+_REMOVED = '_removed'
+_MIB = 1024 * 1024
+
+
+def flatten(sample: Dict, prefix: str = '') -> Dict:
+    """{'cpu': {'percent': 3.0}} -> {'cpu.percent': 3.0}; lists and scalars are kept as values"""
+    flat = {}
+    for key, value in sample.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{name}.'))
+        else:
+            flat[name] = list(value) if isinstance(value, tuple) else value
+    return flat
+
+
+def delta_encode(samples: List[Dict]) -> List[Dict]:
+    """First sample in full, every following one as the keys that changed since the one before"""
+    encoded = []
+    previous = None
+    for sample in samples:
+        if previous is None:
+            encoded.append(sample)
+        else:
+            changes = {key: value for key, value in sample.items() if key not in previous or previous[key] != value}
+            removed = [key for key in previous if key not in sample]
+            if removed:
+                changes[_REMOVED] = removed
+            encoded.append(changes)
+        previous = sample
+    return encoded
+
+
+def delta_decode(encoded: List[Dict]) -> List[Dict]:
+    """Inverse of delta_encode"""
+    samples = []
+    current = {}
+    for changes in encoded:
+        if not isinstance(changes, dict):
+            raise ValueError('Samples must be objects')
+        current = dict(current)
+        for key in changes.get(_REMOVED, ()):
+            current.pop(key, None)
+        current.update((key, value) for key, value in changes.items() if key != _REMOVED)
+        samples.append(current)
+    return samples
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_sample(sample: Dict):
+    """ValueError unless every metric of a decoded sample is a number
+
+    The process list is the only structured value; its entries need numeric usage values.
+    Missing (None) metrics are allowed; ingest drops them.
+    """
+    for key, value in sample.items():
+        if value is None:
+            continue
+        if key == 'processes':
+            if not isinstance(value, list) or not all(
+                    isinstance(process, dict) and _is_number(process.get('cpu_percent', 0))
+                    and _is_number(process.get('memory_percent', 0)) for process in value):
+                raise ValueError('processes must be a list of objects with numeric usage')
+        elif isinstance(value, list):
+            if not all(_is_number(item) for item in value):
+                raise ValueError(f'{key} must be a list of numbers')
+        elif not _is_number(value):
+            raise ValueError(f'{key} must be a number')
+
+
+def encode_batch(batch: Dict, use_msgpack: bool = HAS_MSGPACK) -> Tuple[bytes, str]:
+    """Request body and content type for a batch"""
+    if use_msgpack:
+        return msgpack.packb(batch, use_bin_type=True), MSGPACK_CONTENT_TYPE
+    return json.dumps(batch, separators=(',', ':')).encode('utf-8'), JSON_CONTENT_TYPE
+
+
+def decode_batch(body: bytes, content_type: str) -> Dict:
+    """Batch from a request body; ValueError for bodies that cannot be read"""
+    content_type = (content_type or JSON_CONTENT_TYPE).split(';')[0].strip().lower()
+    if content_type == MSGPACK_CONTENT_TYPE:
+        if not HAS_MSGPACK:
+            raise NotImplementedError('msgpack is not installed on the server')
+        try:
+            batch = msgpack.unpackb(body, raw=False)
+        except Exception as e:
+            raise ValueError(f'Invalid msgpack body: {e}')
+    else:
+        batch = json.loads(body.decode('utf-8'))
+    if not isinstance(batch, dict) or not isinstance(batch.get('samples'), list):
+        raise ValueError('Batch must be an object with a list of samples')
+    return batch
+
+
+class PushAgent:
+    """Samples this host and pushes the samples to a resource server"""
+
+    def __init__(self, server_url: str, name: str = None, interval: float = DEFAULT_INTERVAL,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 process_limit: int = 5, use_msgpack: bool = HAS_MSGPACK, timeout: float = 10,
+                 token: str = AGENT_TOKEN):
+        url = urlparse(server_url if '://' in server_url else f'http://{server_url}')
+        self.https = url.scheme == 'https'
+        self.address = (url.hostname, url.port or (443 if self.https else 8005))
+        self.name = name or socket.gethostname()
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.process_limit = process_limit
+        self.use_msgpack = use_msgpack
+        self.timeout = timeout
+        self.token = token
+
+        self.monitor = SystemMonitor(history_size=1)
+        self.buffer = deque(maxlen=buffer_size)
+        self.connection = None
+        self.running = False
+        self.dropped = 0  # Samples lost because the buffer was full
+        self.sent = 0
+
+        # Baseline so the first sample reports usage since startup instead of 0
+        psutil.cpu_percent(interval=None)
+
+    def sample(self) -> Optional[Dict]:
+        """One flattened sample of this host"""
+        metrics = self.monitor.collect_system_metrics(cpu_interval=None)
+        if not metrics:
+            return None
+        metrics.pop('timestamp', None)
+        disk = psutil.disk_usage('/')
+        metrics['disk'] = {'total': disk.total, 'used': disk.used, 'free': disk.free, 'percent': disk.percent}
+        if self.process_limit:
+            metrics['processes'] = [{
+                'pid': process['pid'],
+                'name': (process['name'] or '')[:20],
+                'cpu_percent': round(process['cpu_percent'], 1),
+                'memory_percent': round(process['memory_percent'], 1),
+                'status': process['status']
+            } for process in self.monitor.process_sampler.sample(self.process_limit, 'cpu')]
+
+        # Metrics psutil cannot read on this host (cpu frequency on many VMs, io counters) are left out
+        sample = {key: value for key, value in flatten(metrics).items() if value is not None}
+        sample['ts'] = round(time.time(), 3)
+        return sample
+
+    def collect(self):
+        sample = self.sample()
+        if sample:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(sample)
+
+    def _post(self, body: bytes, content_type: str) -> http.client.HTTPResponse:
+        """POST over the kept-alive connection (reconnects once when the server closed it)"""
+        for attempt in range(2):
+            if self.connection is None:
+                connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+                self.connection = connection_class(*self.address, timeout=self.timeout)
+            headers = {'Content-Type': content_type, 'Connection': 'keep-alive'}
+            if self.token:
+                headers['Authorization'] = f'Bearer {self.token}'
+            try:
+                self.connection.request('POST', INGEST_PATH, body=body, headers=headers)
+                response = self.connection.getresponse()
+                response.read()
+                return response
+            except (OSError, http.client.HTTPException):
+                self.close()
+                if attempt:
+                    raise
+
+    def flush(self) -> bool:
+        """Push the buffered samples; False when the server could not be reached (they stay buffered)"""
+        while self.buffer:
+            samples = list(itertools.islice(self.buffer, MAX_BATCH))
+            batch = {
+                'version': PROTOCOL_VERSION,
+                'host': self.name,
+                'interval': self.interval,
+                'flush_interval': self.flush_interval,
+                'dropped': self.dropped,
+                'samples': delta_encode(samples)
+            }
+            try:
+                body, content_type = encode_batch(batch, self.use_msgpack)
+                response = self._post(body, content_type)
+                if response.status == 415 and self.use_msgpack:
+                    # The server has no msgpack, use JSON from now on
+                    logger.info("Server does not accept msgpack, switching to JSON")
+                    self.use_msgpack = False
+                    continue
+                if 400 <= response.status < 500 and response.status not in (401, 403):
+                    # The server will reject this batch every time; drop it instead of retrying forever
+                    logger.error(f"Server rejected {len(samples)} samples with {response.status}, dropping them")
+                    for _ in samples:
+                        self.buffer.popleft()
+                    self.dropped += len(samples)
+                    continue
+                if response.status != 200:
+                    raise RuntimeError(f"Server returned {response.status}")
+            except (OSError, RuntimeError, http.client.HTTPException) as e:
+                logger.warning(f"Push to {self.address[0]}:{self.address[1]} failed, "
+                               f"{len(self.buffer)} samples buffered: {e}")
+                return False
+
+            for _ in samples:
+                self.buffer.popleft()
+            self.sent += len(samples)
+        return True
+
+    def run(self):
+        """Sample every interval and push every flush_interval until stop() is called"""
+        self.running = True
+        logger.info(f"Push agent '{self.name}' sending to {self.address[0]}:{self.address[1]} "
+                    f"every {self.flush_interval}s ({'msgpack' if self.use_msgpack else 'JSON'})")
+        next_sample = next_flush = time.monotonic()
+        backoff = 0
+        while self.running:
+            now = time.monotonic()
+            if now >= next_sample:
+                self.collect()
+                next_sample = max(next_sample + self.interval, now)
+            if now >= next_flush:
+                if self.flush():
+                    backoff = 0
+                    next_flush = now + self.flush_interval
+                else:
+                    backoff = min(max(backoff * 2, self.interval), MAX_BACKOFF)
+                    next_flush = now + backoff
+            time.sleep(max(0, min(next_sample, next_flush) - time.monotonic()))
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+
+class AgentRegistry:
+    """Server side of the push agents: the latest sample of every agent host"""
+
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS, token: str = AGENT_TOKEN):
+        self.agents = {}  # {host: state}
+        self.token = token
+        self.max_connections = max_connections
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def authenticate(self, authorization: Optional[str]) -> bool:
+        """Whether an Authorization header carries the agent token (always False without a token)"""
+        scheme, _, credentials = (authorization or '').partition(' ')
+        if not self.token or scheme.lower() != 'bearer':
+            return False
+        return hmac.compare_digest(credentials.strip().encode('utf-8'), self.token.encode('utf-8'))
+
+    def acquire_connection(self) -> bool:
+        """Reserve one of the persistent agent connections; False when all are taken"""
+        with self.lock:
+            if self.connections >= self.max_connections:
+                return False
+            self.connections += 1
+            return True
+
+    def release_connection(self):
+        with self.lock:
+            self.connections -= 1
+
+    def ingest(self, batch: Dict, address: str) -> Tuple[str, List[Dict]]:
+        """Store a decoded batch; returns the host and its new samples
+
+        Samples at or before the newest one already stored are skipped, so a batch the
+        agent resends after a lost response is not counted twice. A batch with a non-numeric
+        metric is rejected as a whole (ValueError) before anything is stored.
+        """
+        host = str(batch.get('host') or address)
+        for key in ('interval', 'flush_interval', 'dropped'):
+            if key in batch and not _is_number(batch[key]):
+                raise ValueError(f'{key} must be a number')
+        samples = delta_decode(batch['samples'])
+        for sample in samples:
+            validate_sample(sample)
+        samples = [{key: value for key, value in sample.items() if value is not None}
+                   for sample in samples if sample.get('ts') is not None]
+        now = time.time()
+        with self.lock:
+            agent = self.agents.get(host)
+            if agent is None:
+                agent = self.agents[host] = {'host': host, 'first_seen': now, 'last_ts': 0, 'sample': None,
+                                             'samples': 0}
+            new = [sample for sample in samples if sample['ts'] > agent['last_ts']]
+            if new:
+                agent['last_ts'] = new[-1]['ts']
+                agent['sample'] = new[-1]
+                agent['samples'] += len(new)
+            agent.update(address=address, last_seen=now, dropped=batch.get('dropped', 0),
+                         interval=batch.get('interval', DEFAULT_INTERVAL),
+                         flush_interval=batch.get('flush_interval', DEFAULT_FLUSH_INTERVAL))
+        return host, new
+
+    def servers(self) -> Dict[str, Dict]:
+        """Agent hosts as entries in the format of ServerDiscovery.update_connected_servers"""
+        now = time.time()
+        servers = {}
+        with self.lock:
+            for host in [host for host, agent in self.agents.items() if now - agent['last_seen'] > AGENT_EXPIRY]:
+                del self.agents[host]
+            agents = list(self.agents.values())
+        for agent in agents:
+            if not agent['sample']:
+                continue
+            stale_after = max(MIN_STALE_AFTER, 3 * agent['flush_interval'])
+            servers[agent['host']] = {
+                'name': agent['host'],
+                'ip': agent['address'],
+                'status': 'Online',
+                'ssh_connected': False,
+                'agent': True,
+                'system_info': to_system_info(agent['sample']),
+                'last_check': datetime.fromtimestamp(agent['last_ts']).isoformat(),
+                'stale': now - agent['last_seen'] > stale_after
+            }
+        return servers
+
+
+def to_system_info(sample: Dict) -> Dict:
+    """Convert an agent sample to the system info structure used by the dashboards"""
+    total = sample.get('memory.total', 0)
+    used = total - sample.get('memory.available', 0)
+    disk_usage = {
+        'total': format_size(sample.get('disk.total', 0)),
+        'used': format_size(sample.get('disk.used', 0)),
+        'available': format_size(sample.get('disk.free', 0)),
+        'percent': sample.get('disk.percent', 0)
+    }
+    return {
+        'cpu_percent': sample.get('cpu.percent', 0),
+        'memory_percent': sample.get('memory.percent', 0),
+        'disk_percent': sample.get('disk.percent', 0),
+        'load_avg': (sample.get('cpu.load_avg') or [0])[0],
+        'memory_info': {
+            'total_mb': total // _MIB,
+            'used_mb': used // _MIB,
+            'free_mb': sample.get('memory.free', 0) // _MIB,
+            'percent': sample.get('memory.percent', 0)
+        },
+        'disk_info': disk_usage,
+        'disk_partitions': [],
+        'processes': sample.get('processes', [])
+    }
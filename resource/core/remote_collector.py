@@ -0,0 +1,296 @@
+#!/usr/bin/env python3.12
+"""
+Remote metrics collector
+A small Python script is pushed once to every monitored host and then run with a
+single exec per sample. It reads /proc and statvfs directly and prints compact JSON,
+so a sample costs one round trip instead of one SSH command per metric.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import subprocess
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger('ResourceManager')
+
+# Runs on the monitored host with whatever python3 it has (RHEL 8 platform-python is 3.6),
+# so only the standard library and no syntax newer than 3.6.
+COLLECTOR_SCRIPT = r'''
+import heapq
+import json
+import os
+import sys
+import time
+
+STATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'collector.state')
+TOP_PROCESSES = 10
+MAX_PARTITIONS = 5
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+CPU_COUNT = os.sysconf('SC_NPROCESSORS_ONLN')
+
+
+def read_cpu():
+    with open('/proc/stat') as f:
+        values = [int(v) for v in f.readline().split()[1:]]
+    # user..steal; guest time is already counted in user
+    return sum(values[:8]), values[3]
+
+
+def read_processes():
+    processes = {}
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open('/proc/' + pid + '/stat') as f:
+                data = f.read()
+        except (IOError, OSError):
+            continue
+        # The command name may contain spaces and parentheses
+        end = data.rfind(')')
+        fields = data[end + 2:].split()
+        processes[pid] = (data[data.find('(') + 1:end], fields[0], int(fields[11]) + int(fields[12]), int(fields[21]))
+    return processes
+
+
+def read_meminfo():
+    meminfo = {}
+    with open('/proc/meminfo') as f:
+        for line in f:
+            key, value = line.split(':', 1)
+            meminfo[key] = int(value.split()[0])
+    return meminfo
+
+
+def read_disks():
+    disks = []
+    seen = set()
+    with open('/proc/mounts') as f:
+        mounts = [line.split()[:3] for line in f]
+    for device, mountpoint, fstype in mounts:
+        if mountpoint != '/' and (not device.startswith('/dev/') or len(disks) >= MAX_PARTITIONS):
+            continue
+        if device in seen:
+            continue
+        try:
+            st = os.statvfs(mountpoint)
+        except OSError:
+            continue
+        seen.add(device)
+        disks.append({
+            'device': device,
+            'mountpoint': mountpoint.replace('\\040', ' '),
+            'fstype': fstype,
+            'total': st.f_blocks * st.f_frsize,
+            'used': (st.f_blocks - st.f_bfree) * st.f_frsize,
+            'available': st.f_bavail * st.f_frsize
+        })
+    return disks
+
+
+def read_os_name():
+    try:
+        with open('/etc/os-release') as f:
+            for line in f:
+                if line.startswith('PRETTY_NAME='):
+                    return line.split('=', 1)[1].strip().strip('"')
+    except (IOError, OSError):
+        pass
+    return 'Unknown'
+
+
+def load_state():
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def save_state(state):
+    tmp = STATE_FILE + '.' + str(os.getpid())
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.rename(tmp, STATE_FILE)
+
+
+def main():
+    cpu_total, cpu_idle = read_cpu()
+    processes = read_processes()
+
+    previous = load_state()
+    if not previous or cpu_total <= previous['cpu'][0]:
+        # First sample on this host: take a short baseline instead of a full second
+        previous = {'cpu': [cpu_total, cpu_idle], 'processes': dict((pid, p[2]) for pid, p in processes.items())}
+        time.sleep(0.25)
+        cpu_total, cpu_idle = read_cpu()
+        processes = read_processes()
+
+    delta_total = cpu_total - previous['cpu'][0]
+    delta_idle = cpu_idle - previous['cpu'][1]
+    cpu_percent = 100.0 * (delta_total - delta_idle) / delta_total if delta_total > 0 else 0.0
+
+    meminfo = read_meminfo()
+    mem_total = meminfo.get('MemTotal', 0)
+
+    # Per process CPU like ps/top: percent of one CPU over the interval
+    previous_ticks = previous['processes']
+    per_cpu_ticks = float(delta_total) / CPU_COUNT if delta_total > 0 else 0.0
+    rows = []
+    for pid, (name, state, ticks, rss) in processes.items():
+        cpu = (ticks - previous_ticks.get(pid, ticks)) / per_cpu_ticks * 100.0 if per_cpu_ticks else 0.0
+        rows.append((cpu, rss, int(pid), name, state))
+    top = heapq.nlargest(TOP_PROCESSES, rows)
+
+    save_state({'cpu': [cpu_total, cpu_idle], 'processes': dict((pid, p[2]) for pid, p in processes.items())})
+
+    sample = {
+        'hostname': os.uname()[1],
+        'os': read_os_name(),
+        'cpu_cores': CPU_COUNT,
+        'cpu_percent': round(cpu_percent, 2),
+        'memory': {
+            'total_kb': mem_total,
+            'free_kb': meminfo.get('MemFree', 0),
+            'available_kb': meminfo.get('MemAvailable', meminfo.get('MemFree', 0))
+        },
+        'load_avg': [float(v) for v in open('/proc/loadavg').read().split()[:3]],
+        'disks': read_disks(),
+        'processes': [{
+            'pid': pid,
+            'name': name[:20],
+            'cpu_percent': round(cpu, 1),
+            'memory_percent': round(rss * PAGE_SIZE * 100.0 / (mem_total * 1024), 1) if mem_total else 0.0,
+            'status': state
+        } for cpu, rss, pid, name, state in top]
+    }
+    sys.stdout.write(json.dumps(sample, separators=(',', ':')))
+
+
+main()
+'''
+
+# The file name carries the script hash, so a changed collector is pushed again automatically
+COLLECTOR_VERSION = hashlib.sha1(COLLECTOR_SCRIPT.encode('utf-8')).hexdigest()[:10]
+COLLECTOR_DIR = '$HOME/.cache/resource-manager'
+COLLECTOR_PATH = f'{COLLECTOR_DIR}/collector-{COLLECTOR_VERSION}.py'
+
+# Exit code of the run command when the script has not been pushed yet
+NOT_INSTALLED = 97
+
+_RUN_SCRIPT = (
+    f'[ -f "{COLLECTOR_PATH}" ] || exit {NOT_INSTALLED}; '
+    f'for py in python3 /usr/libexec/platform-python python; do '
+    f'command -v $py >/dev/null 2>&1 && exec $py "{COLLECTOR_PATH}"; done; '
+    f'echo "no python interpreter found" >&2; exit 98'
+)
+
+_INSTALL_SCRIPT = (
+    f'mkdir -p "{COLLECTOR_DIR}" && rm -f "{COLLECTOR_DIR}"/collector-*.py && '
+    f'echo {base64.b64encode(COLLECTOR_SCRIPT.encode("utf-8")).decode("ascii")} | base64 -d > "{COLLECTOR_PATH}"'
+)
+
+
+def collector_command(install: bool = False) -> str:
+    """Shell command that runs the collector; with install=True it pushes the script first"""
+    if install:
+        return f'{_INSTALL_SCRIPT} && {{ {_RUN_SCRIPT}; }}'
+    return _RUN_SCRIPT
+
+
+def format_size(num_bytes: float) -> str:
+    """Human readable size in the style of df -h (e.g. 512M, 9.8G, 120G)"""
+    for unit in ['B', 'K', 'M', 'G', 'T']:
+        if num_bytes < 1024 or unit == 'T':
+            break
+        num_bytes /= 1024
+    if unit == 'B':
+        return f'{int(num_bytes)}B'
+    return f'{num_bytes:.1f}{unit}' if num_bytes < 10 else f'{num_bytes:.0f}{unit}'
+
+
+def _disk_percent(disk: Dict) -> int:
+    # Same rounding as df: used share of the space available to users, rounded up
+    usable = disk['used'] + disk['available']
+    if usable <= 0:
+        return 0
+    return -(-disk['used'] * 100 // usable)
+
+
+class RemoteCollector:
+    """Runs the collector script on remote hosts through a caller supplied command runner"""
+
+    def __init__(self):
+        self.installed_hosts = set()
+
+    def collect(self, ip: str, run: Callable[[str], subprocess.CompletedProcess]) -> Dict:
+        """Take one sample; ``run`` executes a shell command on the host and returns the result"""
+        install = ip not in self.installed_hosts
+        result = run(collector_command(install=install))
+
+        # The script can disappear (home cleanup, reinstall) - push it again once
+        if result.returncode == NOT_INSTALLED:
+            result = run(collector_command(install=True))
+
+        if result.returncode != 0:
+            self.installed_hosts.discard(ip)
+            raise RuntimeError(f"Collector failed on {ip} (exit {result.returncode}): {result.stderr.strip()}")
+
+        self.installed_hosts.add(ip)
+        return json.loads(result.stdout)
+
+
+def to_system_info(sample: Dict) -> Dict:
+    """Convert a collector sample to the system info structure used by the dashboards"""
+    memory = sample['memory']
+    total_kb = memory['total_kb']
+    used_kb = total_kb - memory['available_kb']
+    mem_percent = (used_kb / total_kb) * 100 if total_kb > 0 else 0
+
+    partitions = []
+    disk_info = {}
+    for disk in sample['disks']:
+        usage = {
+            'total': format_size(disk['total']),
+            'used': format_size(disk['used']),
+            'available': format_size(disk['available']),
+            'percent': _disk_percent(disk)
+        }
+        if disk['mountpoint'] == '/':
+            disk_info = usage
+        if disk['device'].startswith('/dev/'):
+            partitions.append({
+                'device': disk['device'],
+                'mountpoint': disk['mountpoint'],
+                'fstype': disk['fstype'],
+                'usage': usage
+            })
+
+    return {
+        'cpu_percent': sample['cpu_percent'],
+        'memory_percent': mem_percent,
+        'disk_percent': disk_info.get('percent', 0),
+        'load_avg': sample['load_avg'][0],
+        'memory_info': {
+            'total_mb': total_kb // 1024,
+            'used_mb': used_kb // 1024,
+            'free_mb': memory['free_kb'] // 1024,
+            'percent': mem_percent
+        },
+        'disk_info': disk_info,
+        'disk_partitions': partitions,
+        'processes': sample['processes']
+    }
+
+
+def to_server_info(sample: Dict, ip: str) -> Dict:
+    """Basic host identity (hostname, OS, cores, memory) from a collector sample"""
+    return {
+        'hostname': sample['hostname'],
+        'os': sample['os'],
+        'cpu_cores': str(sample['cpu_cores']),
+        'memory': format_size(sample['memory']['total_kb'] * 1024),
+        'ip': ip
+    }
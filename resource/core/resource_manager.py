@@ -10,7 +10,7 @@ import json
 import logging
 import threading
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
 
 # Import our modular components
 try:
@@ -18,12 +18,14 @@ try:
     from .cgroup_manager import CgroupManager
     from .systemd_manager import SystemdManager
     from .alert_manager import AlertManager
+    from .resource_policy import PolicyManager
 except ImportError:
     # Fallback for direct execution
     from system_monitor import SystemMonitor
     from cgroup_manager import CgroupManager
     from systemd_manager import SystemdManager
     from alert_manager import AlertManager
+    from resource_policy import PolicyManager
 
 # Configure logging
 try:
@@ -55,6 +57,7 @@ class ResourceManager:
         self.cgroup_manager = CgroupManager()
         self.systemd_manager = SystemdManager()
         self.alert_manager = AlertManager()
+        self.policies = PolicyManager(self.cgroup_manager)
         self.running = False
         self.monitor_thread = None
 
@@ -102,10 +105,20 @@ class ResourceManager:
         """Create a new resource group with limits"""
         return self.cgroup_manager.create_cgroup(name, cpu_limit, memory_limit)
 
-    def assign_process_to_group(self, group_name: str, pid: int) -> bool:
-        """Assign a process to a resource group"""
+    def assign_process_to_group(self, group_name: Optional[str], pid: int) -> bool:
+        """Assign a process to a resource group
+
+        Policy groups (training, ocr, pdf) are created with their limits on first use;
+        group_name None picks the policy matching the process command line.
+        """
+        if group_name is None or group_name in self.policies.policies:
+            return self.policies.assign(pid, group_name) is not None
         return self.cgroup_manager.add_process_to_cgroup(group_name, pid)
 
+    def apply_resource_policies(self) -> Dict[int, str]:
+        """Move every running training, OCR and PDF worker into its policy group"""
+        return self.policies.apply()
+
     def set_service_limits(self, service_name: str, cpu_shares: int, memory_limit: str) -> bool:
         """Set resource limits for a systemd service"""
         return self.systemd_manager.set_service_resources(service_name, cpu_shares, memory_limit)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3.12
+"""
+Resource policies for heavy platform jobs
+A policy names a capped cgroup (training, OCR, PDF parsing) and the command lines that
+belong in it. Limits are fractions of the host, so the same policy fits any machine.
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import psutil
+
+try:
+    from .cgroup_manager import CgroupManager
+except ImportError:
+    # Fallback for direct execution
+    from cgroup_manager import CgroupManager
+
+logger = logging.getLogger('ResourceManager')
+
+
+class ResourcePolicy:
+    """Limits for one kind of job and the command line fragments that identify it"""
+
+    def __init__(self, name: str, patterns: List[str], cpu_shares: int = 1024, cpu_fraction: float = None,
+                 memory_high_fraction: float = None, memory_max_fraction: float = None, description: str = ''):
+        self.name = name
+        self.patterns = [pattern.lower() for pattern in patterns]
+        self.cpu_shares = cpu_shares
+        self.cpu_fraction = cpu_fraction
+        self.memory_high_fraction = memory_high_fraction
+        self.memory_max_fraction = memory_max_fraction
+        self.description = description
+
+    def matches(self, cmdline: str) -> bool:
+        cmdline = cmdline.lower()
+        return any(pattern in cmdline for pattern in self.patterns)
+
+    def limits(self, cpu_count: int, memory_total: int) -> Dict:
+        """Keyword arguments for CgroupManager.create_cgroup on a host of this size"""
+        return {
+            'cpu_limit': self.cpu_shares,
+            'cpu_max': round(cpu_count * self.cpu_fraction, 2) if self.cpu_fraction else None,
+            'memory_high': int(memory_total * self.memory_high_fraction) if self.memory_high_fraction else None,
+            'memory_limit': int(memory_total * self.memory_max_fraction) if self.memory_max_fraction else None
+        }
+
+
+# A quarter (training) or half (OCR, PDF) of the CPU weight of the interactive services, which
+# run at the default 1024 shares / weight 100, plus hard caps, so a training run can use idle
+# CPUs but never starve the rest of the box
+DEFAULT_POLICIES = [
+    ResourcePolicy('training', ['keras', 'tensorflow', 'torch', 'PREDICTION-MODULE', 'prediction.py'],
+                   cpu_shares=256, cpu_fraction=0.5, memory_high_fraction=0.5, memory_max_fraction=0.6,
+                   description='Model training (Keras/TensorFlow prediction jobs)'),
+    ResourcePolicy('ocr', ['tesseract', 'easyocr', 'paddleocr', 'image_processor', 'image-processing'],
+                   cpu_shares=512, cpu_fraction=0.5, memory_high_fraction=0.25, memory_max_fraction=0.35,
+                   description='OCR and image extraction workers'),
+    ResourcePolicy('pdf', ['extract_text', 'pdf_image_extractor', 'pdfplumber', 'pdfminer', 'pypdf'],
+                   cpu_shares=512, cpu_fraction=0.25, memory_high_fraction=0.2, memory_max_fraction=0.3,
+                   description='PDF parsing workers')
+]
+
+
+class PolicyManager:
+    """Creates policy groups on demand and places processes in them"""
+
+    def __init__(self, cgroup_manager: CgroupManager, policies: List[ResourcePolicy] = None):
+        self.cgroup_manager = cgroup_manager
+        self.policies = {policy.name: policy for policy in (policies if policies is not None else DEFAULT_POLICIES)}
+
+    def ensure_group(self, name: str) -> bool:
+        """Make sure the group of a policy exists (a no-op for groups that already exist)"""
+        if self.cgroup_manager.has_cgroup(name):
+            return True
+        policy = self.policies.get(name)
+        if not policy:
+            return False
+        limits = policy.limits(psutil.cpu_count() or 1, psutil.virtual_memory().total)
+        return self.cgroup_manager.create_cgroup(name, **limits)
+
+    def classify(self, pid: int) -> Optional[str]:
+        """Name of the first policy whose patterns match the process command line"""
+        try:
+            cmdline = ' '.join(psutil.Process(pid).cmdline())
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+        for policy in self.policies.values():
+            if policy.matches(cmdline):
+                return policy.name
+        return None
+
+    def assign(self, pid: int, name: str = None) -> Optional[str]:
+        """Put a process in its policy group (or the given one); returns the group name on success"""
+        name = name or self.classify(pid)
+        if not name or not self.ensure_group(name):
+            return None
+        return name if self.cgroup_manager.add_process_to_cgroup(name, pid) else None
+
+    def apply(self) -> Dict[int, str]:
+        """Assign every running process that matches a policy; returns {pid: group}"""
+        assigned = {}
+        for proc in psutil.process_iter(['pid', 'cmdline']):
+            cmdline = ' '.join(proc.info.get('cmdline') or [])
+            for policy in self.policies.values():
+                if cmdline and policy.matches(cmdline):
+                    if self.assign(proc.info['pid'], policy.name):
+                        assigned[proc.info['pid']] = policy.name
+                    break
+        if assigned:
+            logger.info(f"Assigned {len(assigned)} processes to policy groups")
+        return assigned
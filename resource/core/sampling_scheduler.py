@@ -0,0 +1,160 @@
+#!/usr/bin/env python3.12
+"""
+Adaptive sampling intervals for monitored servers
+Every host gets its own interval instead of one fixed polling period. Hosts someone is
+looking at and hosts over an alert threshold are sampled every few seconds, hosts whose
+metrics move are sampled at the base interval, and quiet hosts nobody watches back off
+exponentially up to a maximum. A backed-off host is sampled right away once a viewer
+focuses it or it is promoted by an alert.
+"""
+
+import time
+import threading
+from typing import Dict, Iterable, List, Optional
+
+FAST_INTERVAL = 2
+BASE_INTERVAL = 5
+MAX_INTERVAL = 120
+BACKOFF = 2
+
+# Seconds a viewer keeps a host on fast sampling without renewing its interest
+FOCUS_TTL = 30
+# Seconds a host stays on fast sampling after crossing a threshold
+HOT_HOLD = 60
+# Change (in percent points, or load) between two samples that counts as activity
+ACTIVITY_DELTA = 5.0
+
+
+class HostSchedule:
+    """Sampling state of one host"""
+
+    __slots__ = ('interval', 'next_due', 'last_values', 'focus_until', 'hot_until', 'reason')
+
+    def __init__(self, interval: float, now: float):
+        self.interval = interval
+        self.next_due = now
+        self.last_values = None
+        self.focus_until = 0.0
+        self.hot_until = 0.0
+        self.reason = 'new'
+
+
+class AdaptiveScheduler:
+    """Decides which hosts are due for sampling and how long to wait after each sample
+
+    ``thresholds`` maps a metric to the value that promotes a host to fast sampling, usually
+    the fire levels of the alert rules (see thresholds_from_rules). Callers ask ``due()``
+    for the hosts to poll, then report every sample with ``record()``.
+    """
+
+    def __init__(self, fast_interval: float = FAST_INTERVAL, base_interval: float = BASE_INTERVAL,
+                 max_interval: float = MAX_INTERVAL, thresholds: Dict[str, float] = None,
+                 backoff: float = BACKOFF, activity_delta: float = ACTIVITY_DELTA,
+                 focus_ttl: float = FOCUS_TTL, hot_hold: float = HOT_HOLD):
+        self.fast_interval = min(fast_interval, base_interval)
+        self.base_interval = base_interval
+        self.max_interval = max(max_interval, base_interval)
+        self.thresholds = thresholds or {}
+        self.backoff = backoff
+        self.activity_delta = activity_delta
+        self.focus_ttl = focus_ttl
+        self.hot_hold = hot_hold
+        self.hosts = {}  # {host: HostSchedule}
+        self.lock = threading.Lock()
+
+    def _schedule(self, host: str, now: float) -> HostSchedule:
+        schedule = self.hosts.get(host)
+        if schedule is None:
+            schedule = self.hosts[host] = HostSchedule(self.base_interval, now)
+        return schedule
+
+    def _hurry(self, schedule: HostSchedule, now: float):
+        # A host that just became interesting does not wait out a long backed-off interval
+        schedule.interval = self.fast_interval
+        schedule.next_due = min(schedule.next_due, now)
+
+    def focus(self, host: str, ttl: float = None, now: float = None):
+        """A viewer is looking at this host: sample it fast for the next ``ttl`` seconds"""
+        now = now or time.time()
+        with self.lock:
+            schedule = self._schedule(host, now)
+            expired = schedule.focus_until <= now
+            schedule.focus_until = max(schedule.focus_until, now + (ttl or self.focus_ttl))
+            if expired:
+                self._hurry(schedule, now)
+
+    def promote(self, host: str, hold: float = None, now: float = None):
+        """The host is alerting: sample it fast for the next ``hold`` seconds"""
+        now = now or time.time()
+        with self.lock:
+            schedule = self._schedule(host, now)
+            expired = schedule.hot_until <= now
+            schedule.hot_until = max(schedule.hot_until, now + (hold or self.hot_hold))
+            if expired:
+                self._hurry(schedule, now)
+
+    def due(self, hosts: Iterable[str], now: float = None) -> List[str]:
+        """The given hosts whose next sample is due (new hosts are due right away)"""
+        now = now or time.time()
+        with self.lock:
+            return [host for host in hosts if self._schedule(host, now).next_due <= now]
+
+    def record(self, host: str, values: Optional[Dict[str, float]], now: float = None) -> float:
+        """Report a sample of a host (None when polling failed); returns its next interval"""
+        now = now or time.time()
+        with self.lock:
+            schedule = self._schedule(host, now)
+            values = {metric: value for metric, value in (values or {}).items()
+                      if isinstance(value, (int, float))}
+
+            if any(value >= self.thresholds[metric] for metric, value in values.items()
+                   if metric in self.thresholds):
+                schedule.hot_until = max(schedule.hot_until, now + self.hot_hold)
+
+            previous = schedule.last_values
+            active = bool(previous) and any(abs(value - previous[metric]) >= self.activity_delta
+                                            for metric, value in values.items() if metric in previous)
+            if values:
+                schedule.last_values = values
+
+            if schedule.hot_until > now:
+                schedule.interval, schedule.reason = self.fast_interval, 'alert'
+            elif schedule.focus_until > now:
+                schedule.interval, schedule.reason = self.fast_interval, 'viewed'
+            elif active or previous is None:
+                # Backing off starts once two samples showed the host is quiet
+                schedule.interval, schedule.reason = self.base_interval, 'active' if active else 'new'
+            else:
+                schedule.interval = min(self.max_interval, max(self.base_interval, schedule.interval * self.backoff))
+                schedule.reason = 'idle'
+
+            schedule.next_due = now + schedule.interval
+            return schedule.interval
+
+    def retain(self, hosts: Iterable[str]):
+        """Forget hosts that are no longer monitored"""
+        hosts = set(hosts)
+        with self.lock:
+            for host in [host for host in self.hosts if host not in hosts]:
+                del self.hosts[host]
+
+    def stats(self, now: float = None) -> Dict[str, dict]:
+        """Current interval, the reason for it and seconds until the next sample, per host"""
+        now = now or time.time()
+        with self.lock:
+            return {
+                host: {
+                    'interval': schedule.interval,
+                    'reason': schedule.reason,
+                    'next_in': round(max(0.0, schedule.next_due - now), 1)
+                }
+                for host, schedule in self.hosts.items()
+            }
+
+
+def thresholds_from_rules(rules) -> Dict[str, float]:
+    """Lowest fire level per metric of a list of AlertRules"""
+    thresholds = {}
+    for rule in rules:
+        thresholds[rule.metric] = min(rule.fire, thresholds.get(rule.metric, rule.fire))
+    return thresholds
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3.12
+"""
+Network sweep engine shared by every scanner
+Probes hosts with asyncio TCP connects to the SSH port (optionally falling back to ping),
+with a bounded number of probes in flight, results streamed through a callback as they
+arrive and cancellation from another thread.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import threading
+import time
+import weakref
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger('ResourceManager')
+
+DEFAULT_CONCURRENCY = 256
+DEFAULT_TIMEOUT = 1.5
+SSH_PORT = 22
+
+# ping starts a process per host, so it gets a much smaller limit than TCP probes
+PING_CONCURRENCY = 32
+
+_active_scans = weakref.WeakSet()
+
+
+def iter_network_hosts(network_range: str) -> Iterator[str]:
+    """Host addresses of a CIDR range (a single address is a /32)"""
+    return (str(ip) for ip in ipaddress.IPv4Network(network_range, strict=False).hosts())
+
+
+def iter_prefix_hosts(prefix: str, start_ip: int = 1, max_ips: int = 254) -> Iterator[str]:
+    """Addresses ``prefix.start_ip`` .. for a three octet prefix such as "172.16.16" """
+    return (f"{prefix}.{i}" for i in range(start_ip, min(start_ip + max_ips, 255)))
+
+
+def cancel_active_scans() -> int:
+    """Cancel every scan that is currently running; returns how many were cancelled"""
+    scans = list(_active_scans)
+    for scan in scans:
+        scan.cancel()
+    return len(scans)
+
+
+class ScanEngine:
+    """One sweep over a set of addresses; create a new engine per scan"""
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT,
+                 port: int = SSH_PORT, ping_fallback: bool = False):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.port = port
+        self.ping_fallback = ping_fallback
+        self.cancelled = False
+        self.scanned = 0
+        self._loop = None
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Stop the scan; safe to call from any thread"""
+        with self._lock:
+            self.cancelled = True
+            if self._loop and not self._loop.is_closed():
+                for worker in self._workers:
+                    self._loop.call_soon_threadsafe(worker.cancel)
+
+    async def _ping(self, ip: str) -> bool:
+        async with self._ping_limit:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    'ping', '-c', '1', '-W', str(max(1, int(self.timeout))), ip,
+                    stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+            except OSError:
+                return False
+            try:
+                return await asyncio.wait_for(process.wait(), self.timeout + 2) == 0
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                # Also on cancellation (scan stopped): never leave a ping running or unreaped
+                if process.returncode is None:
+                    try:
+                        process.kill()
+                    except ProcessLookupError:
+                        pass
+                    await process.wait()
+
+    async def _probe(self, ip: str) -> Optional[Dict]:
+        """Probe one address; returns None when the host does not answer at all"""
+        started = time.monotonic()
+        result = {'ip': ip, 'alive': True, 'ssh_open': False, 'method': 'tcp', 'banner': None}
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, self.port), self.timeout)
+            result['ssh_open'] = True
+            try:
+                # sshd sends its version string first; it confirms this really is SSH
+                banner = await asyncio.wait_for(reader.readline(), self.timeout)
+                result['banner'] = banner.decode('utf-8', errors='ignore').strip() or None
+            except (asyncio.TimeoutError, OSError):
+                pass
+            writer.close()
+        except ConnectionRefusedError:
+            pass  # The host answered, only the port is closed
+        except (asyncio.TimeoutError, OSError):
+            if not (self.ping_fallback and await self._ping(ip)):
+                return None
+            result['method'] = 'ping'
+
+        result['latency_ms'] = round((time.monotonic() - started) * 1000, 1)
+        return result
+
+    async def _worker(self, targets: Iterator[str], on_result: Optional[Callable[[Dict], None]], results: List[Dict]):
+        # Workers share one iterator, so huge ranges are never expanded into memory
+        for ip in targets:
+            if self.cancelled:
+                return
+            result = await self._probe(ip)
+            self.scanned += 1
+            if result:
+                results.append(result)
+                if on_result:
+                    try:
+                        on_result(result)
+                    except Exception as e:
+                        logger.error(f"Scan result callback failed for {ip}: {e}")
+
+    async def _run(self, targets: Iterator[str], on_result, results: List[Dict]):
+        self._ping_limit = asyncio.Semaphore(PING_CONCURRENCY)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._workers = [asyncio.ensure_future(self._worker(targets, on_result, results))
+                             for _ in range(self.concurrency)]
+            if self.cancelled:
+                for worker in self._workers:
+                    worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def scan(self, targets: Iterable[str], on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Sweep the targets and return the responding hosts (blocking, runs its own event loop)
+
+        ``on_result`` is called for each responding host as soon as it is found.
+        """
+        results = []
+        started = time.time()
+        _active_scans.add(self)
+        try:
+            asyncio.run(self._run(iter(targets), on_result, results))
+        finally:
+            _active_scans.discard(self)
+            with self._lock:
+                self._loop = None
+                self._workers = []
+        results.sort(key=lambda result: ipaddress.IPv4Address(result['ip']))
+
+        logger.info(f"Scanned {self.scanned} addresses in {time.time() - started:.1f}s, "
+                    f"{len(results)} responding{' (cancelled)' if self.cancelled else ''}")
+        return results
@@ -13,12 +13,48 @@ import os
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import ipaddress
+import concurrent.futures
+
+from .ssh_session import SSHSessionManager
+from .remote_collector import RemoteCollector, to_system_info, to_server_info
+from .scan_engine import ScanEngine, iter_network_hosts, cancel_active_scans
+from .container_stats import ContainerStatsCollector
+from .fleet_exec import FleetExecutor, DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT
+from .server_state import ServerStateStore, DEFAULT_STATE_PATH
+
+# Connected servers are polled in parallel; a sweep waits at most HOST_DEADLINE seconds
+POLL_WORKERS = 16
+HOST_DEADLINE = 8
+DOCKER_TASK = '__docker__'
+# Written by earlier versions; imported into the state store once
+LEGACY_CONFIG_FILE = 'server_config.json'
 
 class ServerDiscovery:
-    def __init__(self):
+    def __init__(self, state_path: str = DEFAULT_STATE_PATH):
         self.discovered_servers = {}  # {ip: {'status': 'discovered', 'ssh_connected': False, 'info': {}}}
         self.connected_servers = {}   # {ip: {'ssh_connected': True, 'info': {}, 'last_check': datetime}}
         self.scanning = False
+        self.scan_engine = None
+        
+        # Every change to the two dicts above is written through to the state store
+        try:
+            self.state = ServerStateStore(state_path)
+        except Exception as e:
+            print(f"Warning: Server state store not available ({e}), using {LEGACY_CONFIG_FILE}")
+            self.state = None
+        
+        # One persistent SSH session per connected server, reused by every metrics refresh
+        self.ssh_sessions = SSHSessionManager()
+        self.collector = RemoteCollector()
+        self.container_stats = ContainerStatsCollector()
+        
+        # Concurrent poller and the snapshot it publishes
+        self.poll_executor = concurrent.futures.ThreadPoolExecutor(max_workers=POLL_WORKERS,
+                                                                   thread_name_prefix='server-poll')
+        self.polls_in_flight = {}  # {ip: Future}
+        self.servers_snapshot = {}  # {ip: server info} from the last sweep
+        self.snapshot_time = None
+        self.snapshot_lock = threading.Lock()
         
         # Get dynamic network ranges
         try:
@@ -28,8 +64,12 @@ class ServerDiscovery:
             # Fallback to default ranges
             self.network_ranges = ['192.168.1.0/24', '10.0.0.0/8', '172.16.0.0/12']
         
-    def scan_network(self, network_range: str = None) -> Dict[str, dict]:
-        """Scan network for active servers"""
+    def scan_network(self, network_range: str = None, on_result=None) -> Dict[str, dict]:
+        """Scan network for active servers
+        
+        Hosts are probed on the SSH port with ping as fallback; each one found is added to
+        discovered_servers (and passed to ``on_result``) as soon as it answers.
+        """
         if network_range:
             ranges = [network_range]
         else:
@@ -41,48 +81,33 @@ class ServerDiscovery:
         print(f"🔍 Scanning networks: {ranges}")
         
         for network in ranges:
+            if not self.scanning:  # Allow stopping the scan
+                break
             try:
                 network_obj = ipaddress.IPv4Network(network, strict=False)
                 print(f"📡 Scanning {network} ({network_obj.num_addresses} addresses)")
                 
-                # Use threading to speed up scanning
-                threads = []
-                results = {}
-                
-                def scan_ip(ip):
-                    if self._ping_host(str(ip)):
-                        results[str(ip)] = {
-                            'status': 'discovered',
-                            'ssh_connected': False,
-                            'discovered_at': datetime.now().isoformat(),
-                            'network': network
-                        }
-                
-                # Create threads for each IP
-                for ip in network_obj.hosts():
-                    if not self.scanning:  # Allow stopping the scan
-                        break
-                    thread = threading.Thread(target=scan_ip, args=(ip,))
-                    threads.append(thread)
-                    thread.start()
-                    
-                    # Limit concurrent threads
-                    if len(threads) >= 50:
-                        for t in threads:
-                            t.join()
-                        threads = []
-                
-                # Wait for remaining threads
-                for t in threads:
-                    t.join()
+                def add_result(result, network=network):
+                    entry = {
+                        'status': 'discovered',
+                        'ssh_connected': False,
+                        'ssh_open': result['ssh_open'],
+                        'discovered_at': datetime.now().isoformat(),
+                        'network': network
+                    }
+                    discovered[result['ip']] = entry
+                    self.discovered_servers.setdefault(result['ip'], {}).update(entry)
+                    self._remember_server(result['ip'])
+                    if on_result:
+                        on_result(result['ip'], entry)
                 
-                discovered.update(results)
+                self.scan_engine = ScanEngine(ping_fallback=True)
+                self.scan_engine.scan(iter_network_hosts(network), on_result=add_result)
                 
             except Exception as e:
                 print(f"❌ Error scanning {network}: {e}")
         
         self.scanning = False
-        self.discovered_servers.update(discovered)
         
         print(f"✅ Discovered {len(discovered)} servers")
         return discovered
@@ -207,6 +232,7 @@ class ServerDiscovery:
                         'type': 'docker_container'
                     }
                     
+                    self._remember_server(ip)
                     print(f"✅ Connected to container {container_name} with CPU: {cpu_percent}%, Memory: {memory_percent}%")
                     return True
                 else:
@@ -257,6 +283,7 @@ class ServerDiscovery:
                 if ip in self.discovered_servers:
                     self.discovered_servers[ip]['ssh_connected'] = True
                     self.discovered_servers[ip]['info'] = server_info
+                self._remember_server(ip)
                 
                 print(f"✅ Connected to localhost with CPU: {system_info.get('cpu_percent', 0)}%, Memory: {system_info.get('memory_percent', 0)}%")
                 return True
@@ -265,9 +292,9 @@ class ServerDiscovery:
                 print(f"❌ Failed to connect to localhost: {e}")
                 return False
         
-        # Regular SSH connection for remote servers
-        if self.test_ssh_connection(ip, username, password):
-            print(f"Debug: SSH test passed for {ip}")
+        # Regular SSH connection for remote servers - opening the session also tests authentication
+        if self.ssh_sessions.open(ip, username, password):
+            print(f"Debug: SSH session opened for {ip}")
             # Get server information
             server_info = self._get_server_info(ip, username, password)
             print(f"Debug: Got server info: {server_info}")
@@ -293,6 +320,7 @@ class ServerDiscovery:
             if ip in self.discovered_servers:
                 self.discovered_servers[ip]['ssh_connected'] = True
                 self.discovered_servers[ip]['info'] = server_info
+            self._remember_server(ip)
             
             print(f"✅ Connected to {ip} with CPU: {system_info.get('cpu_percent', 0)}%, Memory: {system_info.get('memory_percent', 0)}%")
             return True
@@ -300,36 +328,21 @@ class ServerDiscovery:
             print(f"❌ Failed to connect to {ip}")
             return False
     
+    def _run_remote(self, ip: str, command: str, username: str, password: str = None,
+                    timeout: int = 10) -> subprocess.CompletedProcess:
+        """Run a command on a remote server over its persistent SSH session"""
+        return self.ssh_sessions.run(ip, command, username, password, timeout=timeout)
+    
+    def _collect_sample(self, ip: str, username: str, password: str = None) -> dict:
+        """Run the remote collector script on a server and return its sample"""
+        return self.collector.collect(ip, lambda command: self._run_remote(ip, command, username, password))
+    
     def _get_server_info(self, ip: str, username: str, password: str = None) -> dict:
         """Get basic server information via SSH"""
         try:
-            if password:
-                ssh_prefix = f'sshpass -p "{password}" ssh -o StrictHostKeyChecking=no {username}@{ip}'
-            else:
-                ssh_prefix = f'ssh -o BatchMode=yes {username}@{ip}'
-            
-            # Get hostname
-            hostname_cmd = f'{ssh_prefix} "hostname"'
-            hostname_result = subprocess.run(hostname_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=10)
-            hostname = hostname_result.stdout.strip() if hostname_result.returncode == 0 else ip
-            
-            # Get OS info
-            os_cmd = f'{ssh_prefix} "cat /etc/os-release | grep PRETTY_NAME | cut -d\\"\\" -f2"'
-            os_result = subprocess.run(os_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=10)
-            os_info = os_result.stdout.strip() if os_result.returncode == 0 else "Unknown"
-            
-            # Get CPU info
-            cpu_cmd = f'{ssh_prefix} "nproc"'
-            cpu_result = subprocess.run(cpu_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=10)
-            cpu_cores = cpu_result.stdout.strip() if cpu_result.returncode == 0 else "Unknown"
-            
-            return {
-                'hostname': hostname,
-                'os': os_info,
-                'cpu_cores': cpu_cores,
-                'ip': ip,
-                'status': 'Online'
-            }
+            server_info = to_server_info(self._collect_sample(ip, username, password), ip)
+            server_info['status'] = 'Online'
+            return server_info
             
         except Exception as e:
             return {
@@ -345,125 +358,218 @@ class ServerDiscovery:
         """Disconnect from a server"""
         if ip in self.connected_servers:
             del self.connected_servers[ip]
+            self.ssh_sessions.close(ip)
             
             if ip in self.discovered_servers:
                 self.discovered_servers[ip]['ssh_connected'] = False
+            self._remember_server(ip)
+            if self.state:
+                self.state.remove_connection(ip)
             
             print(f"✅ Disconnected from {ip}")
             return True
         return False
     
+    def add_discovered_server(self, ip: str, entry: dict):
+        """Add (or replace) a discovered server, e.g. from a scan run outside scan_network"""
+        self.discovered_servers[ip] = entry
+        self._remember_server(ip)
+    
+    def _remember_server(self, ip: str):
+        """Queue the current entries of a server for the state store"""
+        if not self.state:
+            return
+        if ip in self.discovered_servers:
+            self.state.upsert_discovered(ip, self.discovered_servers[ip])
+        if ip in self.connected_servers:
+            self.state.upsert_connection(ip, self.connected_servers[ip])
+    
     def get_connected_servers_info(self) -> dict:
         """Get information from all connected servers"""
-        servers_info = {}
+        return self.update_connected_servers()
+    
+    def update_connected_servers(self, deadline: float = HOST_DEADLINE, hosts: Optional[List[str]] = None,
+                                 containers: bool = True) -> dict:
+        """Poll connected servers concurrently and publish the results as the shared snapshot
         
-        for ip, connection in self.connected_servers.items():
-            try:
-                # Get real-time system information
-                system_info = self._get_system_info(ip, connection['username'], connection.get('password'))
-                
-                servers_info[ip] = {
-                    'name': connection['info'].get('hostname', ip),
-                    'ip': ip,
-                    'status': 'Online',
-                    'ssh_connected': True,
-                    'system_info': system_info,
-                    'last_check': datetime.now().isoformat()
-                }
-                
-                # Update last check time
-                self.connected_servers[ip]['last_check'] = datetime.now().isoformat()
-                
-            except Exception as e:
-                servers_info[ip] = {
-                    'name': connection['info'].get('hostname', ip),
-                    'ip': ip,
-                    'status': 'Error',
-                    'ssh_connected': False,
-                    'error': str(e),
-                    'last_check': datetime.now().isoformat()
-                }
+        Each host (and the Docker container listing) runs as its own task; hosts that miss the
+        deadline keep their previous entry marked as stale, so one dead host cannot stall the sweep.
+        With ``hosts`` only those servers are polled and the others keep their previous entry
+        (see core/sampling_scheduler.py); ``containers=False`` skips the Docker listing.
+        """
+        tasks = {}
+        with self.snapshot_lock:
+            for ip, connection in list(self.connected_servers.items()):
+                if hosts is None or ip in hosts:
+                    tasks[ip] = self._submit_poll(ip, self._poll_server, ip, connection)
+            if containers:
+                tasks[DOCKER_TASK] = self._submit_poll(DOCKER_TASK, self._get_docker_containers_info)
+        
+        concurrent.futures.wait(tasks.values(), timeout=deadline)
         
-        # Add Docker containers information
-        docker_containers = self._get_docker_containers_info()
-        servers_info.update(docker_containers)
+        previous = self.servers_snapshot
+        servers_info = {ip: info for ip, info in previous.items()
+                        if ip in self.connected_servers and ip not in tasks}
+        if not containers:
+            servers_info.update({ip: info for ip, info in previous.items() if info.get('type') == 'docker_container'})
+        for key, future in tasks.items():
+            if future.done() and future.exception() is None:
+                if key == DOCKER_TASK:
+                    servers_info.update(future.result())
+                else:
+                    servers_info[key] = future.result()
+            elif key == DOCKER_TASK:
+                servers_info.update({ip: dict(info, stale=True) for ip, info in previous.items()
+                                     if info.get('type') == 'docker_container'})
+            else:
+                servers_info[key] = self._unresponsive_entry(key, previous.get(key), future, deadline)
         
+        # Replace the snapshot as a whole so readers never see a half updated sweep
+        self.servers_snapshot = servers_info
+        self.snapshot_time = datetime.now().isoformat()
         return servers_info
     
+    def get_servers_snapshot(self) -> dict:
+        """Latest results of update_connected_servers without polling anything"""
+        return {
+            'servers': self.servers_snapshot,
+            'updated_at': self.snapshot_time
+        }
+    
+    def _submit_poll(self, key: str, fn, *args) -> concurrent.futures.Future:
+        # A host whose previous poll is still running is not polled twice
+        future = self.polls_in_flight.get(key)
+        if future is None or future.done():
+            future = self.poll_executor.submit(fn, *args)
+            self.polls_in_flight[key] = future
+        return future
+    
+    def _poll_server(self, ip: str, connection: dict) -> dict:
+        """Poll one connected server (runs on the poller thread pool)"""
+        try:
+            # Get real-time system information
+            system_info = self._get_system_info(ip, connection['username'], connection.get('password'))
+            if 'error' in system_info:
+                # _get_system_info reports a failed collection as zeros; they are not real metrics
+                raise ConnectionError(system_info['error'])
+            
+            server_info = {
+                'name': connection['info'].get('hostname', ip),
+                'ip': ip,
+                'status': 'Online',
+                'ssh_connected': True,
+                'system_info': system_info,
+                'last_check': datetime.now().isoformat()
+            }
+            
+            # Update last check time
+            if ip in self.connected_servers:
+                self.connected_servers[ip]['last_check'] = server_info['last_check']
+            if self.state:
+                self.state.record_metrics(ip, server_info)
+            return server_info
+            
+        except Exception as e:
+            return {
+                'name': connection['info'].get('hostname', ip),
+                'ip': ip,
+                'status': 'Error',
+                'ssh_connected': False,
+                'error': str(e),
+                'last_check': datetime.now().isoformat()
+            }
+    
+    def _unresponsive_entry(self, ip: str, previous: Optional[dict], future: concurrent.futures.Future,
+                            deadline: float) -> dict:
+        """Entry for a host that did not answer within the deadline"""
+        error = str(future.exception()) if future.done() else f"No response within {deadline}s"
+        if previous:
+            return dict(previous, stale=True, error=error)
+        
+        connection = self.connected_servers.get(ip, {})
+        return {
+            'name': connection.get('info', {}).get('hostname', ip),
+            'ip': ip,
+            'status': 'Timeout',
+            'ssh_connected': False,
+            'error': error,
+            'last_check': datetime.now().isoformat()
+        }
+    
+    def run_fleet_command(self, command: str, ips: Optional[List[str]] = None,
+                          max_concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT,
+                          on_event=None, local_shell: bool = False) -> dict:
+        """Run a shell command on connected servers concurrently (all of them by default)
+        
+        Remote servers run it over their persistent SSH session and Docker containers through
+        docker exec; localhost runs it in a local shell only with ``local_shell``. Output lines
+        are passed to ``on_event`` as they arrive (see FleetExecutor); the return value
+        aggregates every host. Servers that are not connected are reported with status 'error'.
+        """
+        if ips is None:
+            ips = list(self.connected_servers)
+        
+        targets = {}
+        for ip in dict.fromkeys(ips):
+            connection = self.connected_servers.get(ip)
+            targets[ip] = (self._fleet_target(ip, connection, local_shell) if connection
+                           else self._refuse(f"{ip} is not connected"))
+        
+        print(f"🚀 Running command on {len(targets)} servers: {command}")
+        return FleetExecutor(max_concurrency).run(command, targets, timeout, on_event)
+    
+    def _fleet_target(self, ip: str, connection: dict, local_shell: bool = False):
+        """Function turning a command into the argv that runs it on a connected server"""
+        if ip.startswith('docker://'):
+            container_id = ip.replace('docker://', '')
+            return lambda command: ['docker', 'exec', container_id, 'sh', '-c', command]
+        if ip in ['127.0.0.1', 'localhost']:
+            if not local_shell:
+                return self._refuse("Local shell execution is disabled (RESOURCE_FLEET_LOCAL_SHELL)")
+            return lambda command: ['sh', '-c', command]
+        return lambda command: self.ssh_sessions.command_args(ip, command, connection['username'],
+                                                             connection.get('password'))
+    
+    @staticmethod
+    def _refuse(reason: str):
+        def build(command):
+            raise ConnectionError(reason)
+        return build
+    
     def _get_docker_containers_info(self) -> dict:
         """Get information about running Docker containers"""
         containers_info = {}
         
         try:
-            import subprocess
-            import json
-            
-            # Get running containers
-            result = subprocess.run([
-                'docker', 'ps', '--format', 'json'
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=10)
-            
-            if result.returncode == 0:
-                containers = []
-                for line in result.stdout.strip().split('\n'):
-                    if line.strip():
-                        try:
-                            container = json.loads(line)
-                            containers.append(container)
-                        except:
-                            continue
-                
-                for container in containers:
-                    container_id = container.get('ID', '')[:12]  # Short ID
-                    container_name = container.get('Names', 'Unknown')
-                    container_status = container.get('Status', 'Unknown')
-                    container_image = container.get('Image', 'Unknown')
-                    
-                    # Get container resource usage
-                    try:
-                        stats_result = subprocess.run([
-                            'docker', 'stats', container_id, '--no-stream', '--format', 'json'
-                        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=5)
-                        
-                        if stats_result.returncode == 0:
-                            stats = json.loads(stats_result.stdout.strip())
-                            cpu_percent = stats.get('CPUPerc', '0%').rstrip('%')
-                            memory_percent = stats.get('MemPerc', '0%').rstrip('%')
-                            memory_usage = stats.get('MemUsage', '0B / 0B')
-                        else:
-                            cpu_percent = 0
-                            memory_percent = 0
-                            memory_usage = 'Unknown'
-                    except:
-                        cpu_percent = 0
-                        memory_percent = 0
-                        memory_usage = 'Unknown'
-                    
-                    # Create container info
-                    container_ip = f"docker://{container_id}"
-                    containers_info[container_ip] = {
-                        'name': f"Container: {container_name}",
-                        'ip': container_ip,
-                        'status': 'Online' if 'Up' in container_status else 'Stopped',
-                        'ssh_connected': False,  # Containers don't use SSH
-                        'container_info': {
-                            'id': container_id,
-                            'name': container_name,
-                            'status': container_status,
-                            'image': container_image,
-                            'cpu_percent': float(cpu_percent) if cpu_percent.isdigit() else 0,
-                            'memory_percent': float(memory_percent) if memory_percent.isdigit() else 0,
-                            'memory_usage': memory_usage
-                        },
-                        'system_info': {
-                            'cpu_percent': float(cpu_percent) if cpu_percent.isdigit() else 0,
-                            'memory_percent': float(memory_percent) if memory_percent.isdigit() else 0,
-                            'disk_percent': 0,
-                            'load_avg': 0
-                        },
-                        'last_check': datetime.now().isoformat(),
-                        'type': 'docker_container'
-                    }
+            # One pass over all containers (Engine API + cgroup counters), no docker stats per container
+            for container in self.container_stats.collect():
+                container_id = container['id'][:12]  # Short ID
+                container_ip = f"docker://{container_id}"
+                containers_info[container_ip] = {
+                    'name': f"Container: {container['name']}",
+                    'ip': container_ip,
+                    'status': 'Online' if 'Up' in container['status'] else 'Stopped',
+                    'ssh_connected': False,  # Containers don't use SSH
+                    'container_info': {
+                        'id': container_id,
+                        'name': container['name'],
+                        'status': container['status'],
+                        'image': container['image'],
+                        'cpu_percent': container['cpu_percent'],
+                        'memory_percent': container['memory_percent'],
+                        'memory_usage': container['memory_usage'],
+                        'memory_used_bytes': container['memory_used_bytes'],
+                        'memory_limit_bytes': container['memory_limit_bytes']
+                    },
+                    'system_info': {
+                        'cpu_percent': container['cpu_percent'],
+                        'memory_percent': container['memory_percent'],
+                        'disk_percent': 0,
+                        'load_avg': 0
+                    },
+                    'last_check': datetime.now().isoformat(),
+                    'type': 'docker_container'
+                }
                     
         except Exception as e:
             print(f"Error getting Docker containers info: {e}")
@@ -473,138 +579,9 @@ class ServerDiscovery:
     def _get_system_info(self, ip: str, username: str, password: str = None) -> dict:
         """Get real-time system information from server"""
         try:
-            if password:
-                ssh_prefix = f'sshpass -p "{password}" ssh -o StrictHostKeyChecking=no {username}@{ip}'
-            else:
-                ssh_prefix = f'ssh -o BatchMode=yes {username}@{ip}'
-            
-            # Get CPU usage - using mpstat for better reliability
-            cpu_cmd = f'{ssh_prefix} "mpstat 1 1 | tail -1"'
-            print(f"Debug: Running CPU command: {cpu_cmd}")
-            cpu_result = subprocess.run(cpu_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=10)
-            print(f"Debug: CPU result stdout: '{cpu_result.stdout.strip()}'")
-            print(f"Debug: CPU result stderr: '{cpu_result.stderr.strip()}'")
-            
-            cpu_usage = 0.0
-            if cpu_result.stdout.strip():
-                # Parse the mpstat output: "Average: all 2.77 8.52 0.82 0.00 0.11 0.15 0.00 0.00 0.00 87.62"
-                parts = cpu_result.stdout.strip().split()
-                print(f"Debug: mpstat parts: {parts}")
-                if len(parts) >= 12:
-                    idle_percent = float(parts[11])  # The last number is idle percentage
-                    cpu_usage = 100.0 - idle_percent
-                    print(f"Debug: Idle percent: {idle_percent}, CPU usage: {cpu_usage}")
-            
-            print(f"Debug: CPU usage: {cpu_usage}")
-            
-            # Get memory usage - using shell=True with simpler command
-            mem_cmd = f'{ssh_prefix} "free | grep Mem"'
-            mem_result = subprocess.run(mem_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=10)
-            print(f"Debug: Memory result stdout: '{mem_result.stdout.strip()}'")
-            print(f"Debug: Memory result stderr: '{mem_result.stderr.strip()}'")
-            
-            memory_info = {}
-            if mem_result.stdout.strip():
-                # Parse manually: "Mem: 263485608 95417240 134056472 0 0 0"
-                parts = mem_result.stdout.strip().split()
-                if len(parts) >= 4:
-                    total = int(parts[1])
-                    used = int(parts[2])
-                    free = int(parts[3])
-                    mem_percent = (used / total) * 100 if total > 0 else 0
-                    memory_info = {
-                        'total_mb': total // 1024 // 1024,  # Convert to MB
-                        'used_mb': used // 1024 // 1024,
-                        'free_mb': free // 1024 // 1024,
-                        'percent': mem_percent
-                    }
-                    print(f"Debug: Memory calculation: {mem_percent:.1f}%")
-            
-            # Get disk usage - using shell=True
-            disk_cmd = f'{ssh_prefix} "df -h / | tail -1"'
-            print(f"Debug: Running disk command: {disk_cmd}")
-            disk_result = subprocess.run(disk_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=10)
-            print(f"Debug: Disk result stdout: '{disk_result.stdout.strip()}'")
-            print(f"Debug: Disk result stderr: '{disk_result.stderr.strip()}'")
-            
-            disk_info = {}
-            if disk_result.stdout.strip():
-                parts = disk_result.stdout.strip().split()
-                if len(parts) >= 5:
-                    disk_info = {
-                        'total': parts[1],
-                        'used': parts[2],
-                        'available': parts[3],
-                        'percent': int(parts[4].rstrip('%')) if parts[4].endswith('%') else 0
-                    }
-            
-            # Get detailed disk information (partitions)
-            disk_partitions_cmd = f'{ssh_prefix} "df -h | grep -E \'^/dev/\' | head -5"'
-            disk_partitions_result = subprocess.run(disk_partitions_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=10)
-            
-            partitions = []
-            if disk_partitions_result.stdout.strip():
-                for line in disk_partitions_result.stdout.strip().split('\n'):
-                    if line.strip():
-                        parts = line.split()
-                        if len(parts) >= 6:
-                            partitions.append({
-                                'device': parts[0],
-                                'mountpoint': parts[5],
-                                'fstype': 'unknown',
-                                'usage': {
-                                    'total': parts[1],
-                                    'used': parts[2],
-                                    'available': parts[3],
-                                    'percent': int(parts[4].rstrip('%')) if parts[4].endswith('%') else 0
-                                }
-                            })
-            
-            # Get top processes
-            processes_cmd = f'{ssh_prefix} "ps aux --sort=-%cpu | head -11 | tail -10"'
-            processes_result = subprocess.run(processes_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=10)
-            
-            processes = []
-            if processes_result.stdout.strip():
-                for line in processes_result.stdout.strip().split('\n'):
-                    if line.strip():
-                        parts = line.split()
-                        if len(parts) >= 11:
-                            try:
-                                processes.append({
-                                    'pid': int(parts[1]),
-                                    'name': parts[10][:20],  # Truncate long process names
-                                    'cpu_percent': float(parts[2]),
-                                    'memory_percent': float(parts[3]),
-                                    'status': 'R'  # Assume running
-                                })
-                            except (ValueError, IndexError):
-                                continue
-            
-            # Get load average - using shell=True with simpler command
-            load_cmd = f'{ssh_prefix} "cat /proc/loadavg | awk \'{{print $1}}\'"'
-            load_result = subprocess.run(load_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=10)
-            print(f"Debug: Load result stdout: '{load_result.stdout.strip()}'")
-            print(f"Debug: Load result stderr: '{load_result.stderr.strip()}'")
-            # Extract just the first number from the loadavg output
-            load_output = load_result.stdout.strip()
-            if load_output:
-                load_parts = load_output.split()
-                load_avg = float(load_parts[0]) if load_parts else 0.0
-            else:
-                load_avg = 0.0
-            print(f"Debug: Load average: {load_avg}")
-            
-            return {
-                'cpu_percent': cpu_usage,
-                'memory_percent': memory_info.get('percent', 0),
-                'disk_percent': disk_info.get('percent', 0),
-                'load_avg': load_avg,
-                'memory_info': memory_info,
-                'disk_info': disk_info,
-                'disk_partitions': partitions,
-                'processes': processes
-            }
+            # One exec of the collector script returns every metric as JSON
+            sample = self._collect_sample(ip, username, password)
+            return to_system_info(sample)
             
         except Exception as e:
             print(f"Debug: Error in _get_system_info: {e}")
@@ -618,8 +595,25 @@ class ServerDiscovery:
                 'error': str(e)
             }
     
-    def save_configuration(self, filename: str = 'server_config.json'):
-        """Save server configuration to file"""
+    def save_configuration(self, filename: str = None):
+        """Write pending changes to the state store
+        
+        Changes are stored as they happen, so this only flushes them. With a filename the
+        configuration is also exported as JSON (without passwords).
+        """
+        try:
+            if self.state:
+                self.state.set_network_ranges(self.network_ranges)
+                self.state.flush()
+                print(f"✅ Configuration saved to {self.state.path}")
+            if filename or not self.state:
+                self._export_configuration(filename or LEGACY_CONFIG_FILE)
+            return True
+        except Exception as e:
+            print(f"❌ Error saving configuration: {e}")
+            return False
+    
+    def _export_configuration(self, filename: str):
         config = {
             'discovered_servers': self.discovered_servers,
             'connected_servers': {ip: {k: v for k, v in info.items() if k != 'password'} 
@@ -628,38 +622,64 @@ class ServerDiscovery:
             'last_updated': datetime.now().isoformat()
         }
         
-        try:
-            with open(filename, 'w') as f:
-                json.dump(config, f, indent=2, default=str)
-            print(f"✅ Configuration saved to {filename}")
-            return True
-        except Exception as e:
-            print(f"❌ Error saving configuration: {e}")
-            return False
+        with open(filename, 'w') as f:
+            json.dump(config, f, indent=2, default=str)
+        print(f"✅ Configuration saved to {filename}")
     
-    def load_configuration(self, filename: str = 'server_config.json'):
-        """Load server configuration from file"""
+    def load_configuration(self, filename: str = None):
+        """Load servers from the state store
+        
+        With a filename, a JSON export is imported into the store first. An empty store
+        imports server_config.json once, if an earlier version left one behind.
+        """
         try:
-            if os.path.exists(filename):
-                with open(filename, 'r') as f:
-                    config = json.load(f)
-                
+            if not self.state:
+                config = self._read_configuration(filename or LEGACY_CONFIG_FILE)
+                if config is None:
+                    return False
                 self.discovered_servers = config.get('discovered_servers', {})
                 self.connected_servers = config.get('connected_servers', {})
                 self.network_ranges = config.get('network_ranges', self.network_ranges)
-                
-                print(f"✅ Configuration loaded from {filename}")
                 return True
-            else:
-                print(f"📄 No configuration file found: {filename}")
-                return False
+            
+            if filename or self.state.is_empty():
+                config = self._read_configuration(filename or LEGACY_CONFIG_FILE)
+                if config is not None:
+                    self.state.import_config(config)
+                elif filename:
+                    return False
+            
+            state = self.state.load()
+            self.discovered_servers = state['discovered_servers']
+            self.connected_servers = state['connected_servers']
+            self.network_ranges = state['network_ranges'] or self.network_ranges
+            # Last known metrics are shown (as stale) until the first poll of each server
+            with self.snapshot_lock:
+                if not self.servers_snapshot:
+                    self.servers_snapshot = {ip: dict(info, stale=True) for ip, info in state['last_metrics'].items()
+                                             if ip in self.connected_servers}
+            
+            print(f"✅ Configuration loaded from {self.state.path} ({len(self.discovered_servers)} discovered, "
+                  f"{len(self.connected_servers)} connected)")
+            return True
         except Exception as e:
             print(f"❌ Error loading configuration: {e}")
             return False
     
+    def _read_configuration(self, filename: str) -> Optional[dict]:
+        if not os.path.exists(filename):
+            print(f"📄 No configuration file found: {filename}")
+            return None
+        with open(filename, 'r') as f:
+            config = json.load(f)
+        print(f"✅ Configuration loaded from {filename}")
+        return config
+    
     def stop_scanning(self):
         """Stop network scanning"""
         self.scanning = False
+        # Also stops scans started by the quick scanner and the API handlers
+        cancel_active_scans()
         print("🛑 Network scanning stopped")
     
     def get_status_summary(self) -> dict:
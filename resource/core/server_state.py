@@ -0,0 +1,254 @@
+#!/usr/bin/env python3.12
+"""
+Persistent state of discovered and connected servers
+A SQLite database in WAL mode with one row per server. Changes are queued as they happen and
+written in one transaction per flush interval, so a large scan costs a handful of commits
+instead of rewriting a JSON file, and a restart loads thousands of hosts without re-scanning.
+Passwords are never written; a connection only records which kind of credential it used.
+"""
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger('ResourceManager')
+
+DEFAULT_STATE_PATH = os.environ.get('RESOURCE_STATE_DB',
+                                    os.path.expanduser('~/.cache/resource-manager/servers.db'))
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS discovered (
+    ip TEXT PRIMARY KEY,
+    status TEXT,
+    ssh_open INTEGER,
+    ssh_connected INTEGER,
+    network TEXT,
+    discovered_at REAL,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS connections (
+    ip TEXT PRIMARY KEY,
+    username TEXT,
+    credential TEXT,
+    type TEXT,
+    connected_at REAL,
+    last_check REAL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS last_metrics (
+    ip TEXT PRIMARY KEY,
+    sampled_at REAL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_DISCOVERED_COLUMNS = ('status', 'ssh_open', 'ssh_connected', 'network', 'discovered_at')
+_CONNECTION_COLUMNS = ('username', 'credential', 'type', 'connected_at', 'last_check')
+
+
+def _to_epoch(value) -> Optional[float]:
+    """Epoch seconds from an ISO timestamp (as kept in memory) or a number"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_iso(value: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(value).isoformat() if value is not None else None
+
+
+def _encode(data: Dict) -> str:
+    return json.dumps(data, separators=(',', ':'), default=str)
+
+
+class ServerStateStore:
+    """Write-behind store for discovered servers, connections and their last metrics"""
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.db = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        # With WAL, NORMAL only syncs at checkpoints: a crash may lose the last flush, never corrupt
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(_SCHEMA)
+        self.db_lock = threading.Lock()
+
+        # {(table, ip): row tuple, or None to delete}; later changes to a server replace earlier ones
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = True
+        self.flush_thread = threading.Thread(target=self._flush_loop, name='server-state', daemon=True)
+        self.flush_thread.start()
+        atexit.register(self.close)
+
+    def _queue(self, table: str, ip: str, row: Optional[tuple]):
+        with self.pending_lock:
+            self.pending[(table, ip)] = row
+
+    def upsert_discovered(self, ip: str, entry: Dict):
+        """Queue the discovered_servers entry of a server"""
+        data = {key: value for key, value in entry.items() if key not in _DISCOVERED_COLUMNS}
+        self._queue('discovered', ip, (
+            ip, entry.get('status'), entry.get('ssh_open'), entry.get('ssh_connected'), entry.get('network'),
+            _to_epoch(entry.get('discovered_at')), time.time(), _encode(data)
+        ))
+
+    def upsert_connection(self, ip: str, connection: Dict):
+        """Queue the connected_servers entry of a server; its password is replaced by a credential reference"""
+        data = {key: value for key, value in connection.items()
+                if key not in _CONNECTION_COLUMNS and key != 'password'}
+        # A connection loaded from the store has no password left, only its reference
+        credential = 'password' if connection.get('password') else connection.get('credential', 'key')
+        self._queue('connections', ip, (
+            ip, connection.get('username'), credential, connection.get('type'),
+            _to_epoch(connection.get('connected_at')), _to_epoch(connection.get('last_check')), _encode(data)
+        ))
+
+    def remove_connection(self, ip: str):
+        self._queue('connections', ip, None)
+        self._queue('last_metrics', ip, None)
+
+    def record_metrics(self, ip: str, server_info: Dict):
+        """Queue the latest polled entry of a connected server"""
+        self._queue('last_metrics', ip, (ip, _to_epoch(server_info.get('last_check')), _encode(server_info)))
+
+    def set_network_ranges(self, ranges: List[str]):
+        self._queue('settings', 'network_ranges', ('network_ranges', _encode(ranges)))
+
+    def flush(self) -> int:
+        """Write every queued change in one transaction; returns the number of rows written"""
+        with self.pending_lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return 0
+
+        upserts = {}
+        deletes = {}
+        for (table, ip), row in pending.items():
+            if row is None:
+                deletes.setdefault(table, []).append((ip,))
+            else:
+                upserts.setdefault(table, []).append(row)
+
+        with self.db_lock:
+            try:
+                self.db.execute('BEGIN')
+                for table, rows in deletes.items():
+                    key = 'key' if table == 'settings' else 'ip'
+                    self.db.executemany(f'DELETE FROM {table} WHERE {key} = ?', rows)
+                for table, rows in upserts.items():
+                    placeholders = ', '.join('?' * len(rows[0]))
+                    self.db.executemany(f'INSERT OR REPLACE INTO {table} VALUES ({placeholders})', rows)
+                self.db.execute('COMMIT')
+            except sqlite3.Error:
+                if self.db.in_transaction:
+                    self.db.execute('ROLLBACK')
+                # Put the changes back unless newer ones for the same servers were queued meanwhile
+                with self.pending_lock:
+                    for key, row in pending.items():
+                        self.pending.setdefault(key, row)
+                raise
+        return len(pending)
+
+    def _flush_loop(self):
+        while self.running:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error(f"Error writing server state to {self.path}: {e}")
+
+    def is_empty(self) -> bool:
+        with self.db_lock:
+            return self.db.execute('SELECT NOT EXISTS (SELECT 1 FROM discovered) '
+                                   'AND NOT EXISTS (SELECT 1 FROM connections)').fetchone()[0] == 1
+
+    def load(self) -> Dict:
+        """Everything stored, in the in-memory format of ServerDiscovery
+
+        Returns discovered_servers, connected_servers (without passwords, with 'credential'),
+        last_metrics ({ip: last polled entry}) and network_ranges (None when never saved).
+        """
+        self.flush()
+        with self.db_lock:
+            discovered_rows = self.db.execute('SELECT ip, status, ssh_open, ssh_connected, network, discovered_at, '
+                                              'data FROM discovered').fetchall()
+            connection_rows = self.db.execute('SELECT ip, username, credential, type, connected_at, last_check, '
+                                              'data FROM connections').fetchall()
+            metrics_rows = self.db.execute('SELECT ip, data FROM last_metrics').fetchall()
+            ranges = self.db.execute("SELECT value FROM settings WHERE key = 'network_ranges'").fetchone()
+
+        discovered = {}
+        for ip, status, ssh_open, ssh_connected, network, discovered_at, data in discovered_rows:
+            entry = json.loads(data)
+            entry.update(status=status, ssh_connected=bool(ssh_connected))
+            if ssh_open is not None:
+                entry['ssh_open'] = bool(ssh_open)
+            if network is not None:
+                entry['network'] = network
+            if discovered_at is not None:
+                entry['discovered_at'] = _to_iso(discovered_at)
+            discovered[ip] = entry
+
+        connected = {}
+        for ip, username, credential, kind, connected_at, last_check, data in connection_rows:
+            connection = json.loads(data)
+            connection.update(username=username, credential=credential)
+            if kind is not None:
+                connection['type'] = kind
+            if connected_at is not None:
+                connection['connected_at'] = _to_iso(connected_at)
+            if last_check is not None:
+                connection['last_check'] = _to_iso(last_check)
+            connected[ip] = connection
+
+        return {
+            'discovered_servers': discovered,
+            'connected_servers': connected,
+            'last_metrics': {ip: json.loads(data) for ip, data in metrics_rows},
+            'network_ranges': json.loads(ranges[0]) if ranges else None
+        }
+
+    def import_config(self, config: Dict):
+        """Store a configuration in the server_config.json format (save_configuration exports)"""
+        for ip, entry in config.get('discovered_servers', {}).items():
+            self.upsert_discovered(ip, entry)
+        for ip, connection in config.get('connected_servers', {}).items():
+            self.upsert_connection(ip, connection)
+        if config.get('network_ranges'):
+            self.set_network_ranges(config['network_ranges'])
+        self.flush()
+
+    def close(self):
+        if not self.running:
+            return
+        self.running = False
+        self.wake.set()
+        self.flush_thread.join(timeout=2)
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            logger.error(f"Error writing server state to {self.path}: {e}")
+        with self.db_lock:
+            self.db.close()
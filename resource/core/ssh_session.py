@@ -0,0 +1,250 @@
+#!/usr/bin/env python3.12
+"""
+Persistent SSH sessions for remote server monitoring
+Keeps one multiplexed OpenSSH connection (ControlMaster) per connected server so
+metric commands reuse it instead of doing a full SSH handshake every time
+"""
+
+import os
+import atexit
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger('ResourceManager')
+
+
+class SSHSession:
+    """State of one multiplexed connection"""
+
+    def __init__(self, ip: str, username: str, password: Optional[str] = None):
+        self.ip = ip
+        self.username = username
+        self.password = password
+        self.opened_at = None
+        self.last_used = time.time()
+        self.reconnects = 0
+        self.lock = threading.Lock()
+
+    @property
+    def target(self) -> str:
+        return f'{self.username}@{self.ip}'
+
+
+class SSHSessionManager:
+    """Opens, reuses, reconnects and evicts persistent SSH sessions"""
+
+    def __init__(self, idle_timeout: int = 600, keepalive_interval: int = 15,
+                 keepalive_count: int = 3, connect_timeout: int = 5):
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_count = keepalive_count
+        self.connect_timeout = connect_timeout
+        self.sessions = {}  # {ip: SSHSession}
+        self.open_locks = {}
+        self.lock = threading.Lock()
+        self.last_eviction = time.time()
+
+        # Control sockets live in a private directory; %C keeps the socket path short
+        self.control_dir = tempfile.mkdtemp(prefix='resource-ssh-')
+        self.control_path = os.path.join(self.control_dir, '%C')
+        atexit.register(self.close_all)
+
+    def _ssh_options(self) -> List[str]:
+        return [
+            '-o', f'ControlPath={self.control_path}',
+            '-o', f'ConnectTimeout={self.connect_timeout}',
+            '-o', f'ServerAliveInterval={self.keepalive_interval}',
+            '-o', f'ServerAliveCountMax={self.keepalive_count}',
+            '-o', 'StrictHostKeyChecking=no'
+        ]
+
+    def _start_master(self, session: SSHSession) -> bool:
+        """Authenticate once and leave the master connection running in the background"""
+        command = ['ssh', '-M', '-N', '-f'] + self._ssh_options()
+        if session.password:
+            command = ['sshpass', '-p', session.password] + command
+        else:
+            command += ['-o', 'BatchMode=yes']
+        command.append(session.target)
+
+        # The backgrounded master keeps its stdio open, so stderr goes to a file instead of a pipe
+        with tempfile.TemporaryFile(mode='w+') as stderr:
+            try:
+                result = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                        stderr=stderr, timeout=self.connect_timeout + 10)
+            except (subprocess.TimeoutExpired, OSError) as e:
+                logger.warning(f"SSH session to {session.target} failed: {e}")
+                return False
+
+            if result.returncode != 0 or not self._check_master(session):
+                stderr.seek(0)
+                logger.warning(f"SSH session to {session.target} failed: {stderr.read().strip()}")
+                return False
+
+        session.opened_at = time.time()
+        logger.info(f"SSH session opened to {session.target}")
+        return True
+
+    def _check_master(self, session: SSHSession) -> bool:
+        try:
+            result = subprocess.run(['ssh', '-O', 'check', '-o', f'ControlPath={self.control_path}', session.target],
+                                    stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.DEVNULL, timeout=5)
+            return result.returncode == 0
+        except (subprocess.TimeoutExpired, OSError):
+            return False
+
+    def _stop_master(self, session: SSHSession):
+        try:
+            subprocess.run(['ssh', '-O', 'exit', '-o', f'ControlPath={self.control_path}', session.target],
+                           stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, timeout=5)
+        except (subprocess.TimeoutExpired, OSError):
+            pass
+        session.opened_at = None
+
+    def _ip_lock(self, ip: str) -> threading.Lock:
+        # Serialises opening per server so two callers never start two masters on one socket
+        with self.lock:
+            return self.open_locks.setdefault(ip, threading.Lock())
+
+    def open(self, ip: str, username: str = 'root', password: str = None) -> bool:
+        """Open (or replace) the session for a server; returns False when authentication fails"""
+        with self._ip_lock(ip):
+            return self._open(ip, username, password)
+
+    def _open(self, ip: str, username: str, password: str = None) -> bool:
+        with self.lock:
+            previous = self.sessions.pop(ip, None)
+        if previous:
+            with previous.lock:
+                self._stop_master(previous)
+
+        session = SSHSession(ip, username, password)
+        with session.lock:
+            if not self._start_master(session):
+                return False
+        with self.lock:
+            self.sessions[ip] = session
+        return True
+
+    def close(self, ip: str) -> bool:
+        """Close the session for a server"""
+        with self.lock:
+            session = self.sessions.pop(ip, None)
+        if not session:
+            return False
+        with session.lock:
+            self._stop_master(session)
+        logger.info(f"SSH session closed to {session.target}")
+        return True
+
+    def close_all(self):
+        """Close every session and remove the control socket directory"""
+        with self.lock:
+            ips = list(self.sessions)
+        for ip in ips:
+            self.close(ip)
+        shutil.rmtree(self.control_dir, ignore_errors=True)
+
+    def is_open(self, ip: str) -> bool:
+        session = self.sessions.get(ip)
+        return bool(session and session.opened_at and self._check_master(session))
+
+    def _get_session(self, ip: str, username: str, password: str = None) -> Optional[SSHSession]:
+        """Existing session, or a new one for servers connected before a restart"""
+        session = self.sessions.get(ip)
+        if session and session.username == username:
+            return session
+        with self._ip_lock(ip):
+            session = self.sessions.get(ip)
+            if session and session.username == username:
+                return session
+            if self._open(ip, username, password):
+                return self.sessions.get(ip)
+        return None
+
+    def _reconnect(self, session: SSHSession) -> bool:
+        with session.lock:
+            # Another thread may have reconnected while we waited for the lock
+            if self._check_master(session):
+                return True
+            self._stop_master(session)
+            session.reconnects += 1
+            logger.info(f"Reconnecting SSH session to {session.target} (attempt {session.reconnects})")
+            return self._start_master(session)
+
+    def _ssh_command(self, session: SSHSession, command: str) -> List[str]:
+        return ['ssh', '-o', f'ControlPath={self.control_path}', '-o', 'ControlMaster=no',
+                '-o', 'BatchMode=yes', session.target, command]
+
+    def run(self, ip: str, command: str, username: str = 'root', password: str = None,
+            timeout: int = 10) -> subprocess.CompletedProcess:
+        """Run a shell command on the server over its persistent session"""
+        self.evict_idle()
+
+        session = self._get_session(ip, username, password)
+        if not session:
+            raise ConnectionError(f"Could not open SSH session to {username}@{ip}")
+        session.last_used = time.time()
+
+        ssh_command = self._ssh_command(session, command)
+        result = subprocess.run(ssh_command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, universal_newlines=True, timeout=timeout)
+
+        # 255 is ssh's own failure code; retry once when the master went away (reboot, network drop)
+        if result.returncode == 255 and not self._check_master(session):
+            if not self._reconnect(session):
+                raise ConnectionError(f"Lost SSH session to {session.target}")
+            result = subprocess.run(ssh_command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE, universal_newlines=True, timeout=timeout)
+        return result
+
+    def command_args(self, ip: str, command: str, username: str = 'root', password: str = None) -> List[str]:
+        """ssh argv that runs a command over the server's session, for callers that stream the output
+
+        The session is checked (and reconnected) first, since a streamed command cannot be retried.
+        """
+        self.evict_idle()
+
+        session = self._get_session(ip, username, password)
+        if not session:
+            raise ConnectionError(f"Could not open SSH session to {username}@{ip}")
+        session.last_used = time.time()
+
+        if not self._check_master(session) and not self._reconnect(session):
+            raise ConnectionError(f"Lost SSH session to {session.target}")
+        return self._ssh_command(session, command)
+
+    def evict_idle(self):
+        """Close sessions that have not been used for idle_timeout seconds"""
+        now = time.time()
+        # Checked at most once a minute, from the callers of run()
+        if now - self.last_eviction < 60:
+            return
+        self.last_eviction = now
+
+        with self.lock:
+            idle = [ip for ip, session in self.sessions.items() if now - session.last_used > self.idle_timeout]
+        for ip in idle:
+            logger.info(f"Evicting idle SSH session to {ip}")
+            self.close(ip)
+
+    def get_status(self) -> Dict[str, dict]:
+        """Session state per server, for status endpoints"""
+        now = time.time()
+        return {
+            ip: {
+                'username': session.username,
+                'open': session.opened_at is not None,
+                'opened_at': session.opened_at,
+                'idle_seconds': round(now - session.last_used, 1),
+                'reconnects': session.reconnects
+            }
+            for ip, session in list(self.sessions.items())
+        }
@@ -8,7 +8,13 @@ import psutil
 import logging
 from datetime import datetime
 from collections import deque
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+try:
+    from .process_sampler import ProcessSampler
+except ImportError:
+    # Fallback for direct execution
+    from process_sampler import ProcessSampler
 
 logger = logging.getLogger('ResourceManager')
 
@@ -20,12 +26,16 @@ class SystemMonitor:
         self.cpu_history = deque(maxlen=history_size)
         self.memory_history = deque(maxlen=history_size)
         self.process_data = {}
+        self.process_sampler = ProcessSampler()
+
+    def collect_system_metrics(self, cpu_interval: Optional[float] = 1) -> Dict:
+        """Collect current system metrics
 
-    def collect_system_metrics(self) -> Dict:
-        """Collect current system metrics"""
+        cpu_interval=None measures CPU usage since the previous call instead of blocking.
+        """
         try:
             # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = psutil.cpu_percent(interval=cpu_interval)
             cpu_count = psutil.cpu_count()
             cpu_freq = psutil.cpu_freq()
             load_avg = os.getloadavg()
@@ -80,18 +90,8 @@ class SystemMonitor:
     def get_top_processes(self, sort_by: str = 'cpu', limit: int = 10) -> List[Dict]:
         """Get top processes by CPU or memory usage"""
         try:
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 'memory_percent', 'create_time']):
-                try:
-                    processes.append(proc.info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-
-            # Sort by specified metric
-            key = 'cpu_percent' if sort_by == 'cpu' else 'memory_percent'
-            processes.sort(key=lambda x: x.get(key, 0), reverse=True)
-
-            return processes[:limit]
+            # CPU usage is measured since the previous call
+            return self.process_sampler.sample(limit, sort_by, attrs=('pid', 'name', 'username', 'create_time'))
 
         except Exception as e:
             logger.error(f"Error getting top processes: {e}")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+PinnacleAi Resource Agent
+Runs on a monitored host and pushes its metrics to the resource server
+"""
+
+import os
+import sys
+import logging
+
+# Add the resource directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.push_agent import (PushAgent, HAS_MSGPACK, AGENT_TOKEN, DEFAULT_INTERVAL, DEFAULT_FLUSH_INTERVAL,
+                             DEFAULT_BUFFER_SIZE)
+
+def start_resource_agent(server, name=None, interval=DEFAULT_INTERVAL, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                         buffer_size=DEFAULT_BUFFER_SIZE, use_json=False, token=AGENT_TOKEN):
+    """Start pushing metrics of this host to the resource server"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    agent = PushAgent(server, name=name, interval=interval, flush_interval=flush_interval,
+                      buffer_size=buffer_size, use_msgpack=HAS_MSGPACK and not use_json, token=token)
+    if not agent.token:
+        print(f"⚠️  No agent token set (--token or RESOURCE_AGENT_TOKEN); the server will refuse the samples")
+
+    print(f"🚀 PinnacleAi Resource Agent '{agent.name}' started")
+    print(f"📡 Pushing to {agent.address[0]}:{agent.address[1]} every {flush_interval}s (samples every {interval}s)")
+    print(f"🔄 Press Ctrl+C to stop the agent")
+
+    try:
+        agent.run()
+    except KeyboardInterrupt:
+        print(f"\n🛑 Stopping PinnacleAi Resource Agent...")
+        agent.stop()
+        # Last push of whatever is still buffered
+        agent.flush()
+        agent.close()
+        print(f"✅ PinnacleAi Resource Agent stopped ({agent.sent} samples sent)")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='PinnacleAi Resource Agent')
+    parser.add_argument('server', help='Resource server, e.g. http://monitor:8005')
+    parser.add_argument('--name', help='Host name reported to the server (default: hostname)')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help=f'Seconds between samples (default: {DEFAULT_INTERVAL})')
+    parser.add_argument('--flush-interval', type=float, default=DEFAULT_FLUSH_INTERVAL,
+                        help=f'Seconds between pushes (default: {DEFAULT_FLUSH_INTERVAL})')
+    parser.add_argument('--buffer-size', type=int, default=DEFAULT_BUFFER_SIZE,
+                        help=f'Samples kept while the server is unreachable (default: {DEFAULT_BUFFER_SIZE})')
+    parser.add_argument('--json', action='store_true', help='Send JSON even when msgpack is installed')
+    parser.add_argument('--token', default=AGENT_TOKEN,
+                        help='Shared agent token of the server (default: $RESOURCE_AGENT_TOKEN)')
+
+    args = parser.parse_args()
+    start_resource_agent(args.server, args.name, args.interval, args.flush_interval, args.buffer_size, args.json,
+                         args.token)
@@ -7,8 +7,11 @@ Dedicated resource monitoring and server management for PinnacleAi
 import json
 import time
 import threading
+import subprocess
+import concurrent.futures
+from collections import defaultdict
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import psutil
 import os
@@ -18,18 +21,229 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from core.server_discovery import ServerDiscovery
+from core.scan_engine import ScanEngine, iter_prefix_hosts
+from core.alert_manager import AlertEngine, default_rules
+from core.cgroup_manager import CgroupManager
+from core.resource_policy import DEFAULT_POLICIES
+from core.push_agent import AgentRegistry, decode_batch
+from core.sampling_scheduler import AdaptiveScheduler, thresholds_from_rules
+from core.fleet_exec import FleetAccess, DEFAULT_CONCURRENCY as FLEET_CONCURRENCY, DEFAULT_TIMEOUT as FLEET_TIMEOUT
 from utils.quick_network_scanner import QuickNetworkScanner
+from utils.http_server import BoundedThreadingHTTPServer, JobManager
+from utils.openmetrics import MetricsRegistry, CONTENT_TYPE as OPENMETRICS_CONTENT_TYPE
 from config.settings import DEFAULT_CONFIG
 
+# Seconds an idle push agent connection is kept open
+AGENT_IDLE_TIMEOUT = 60
+
+# Seconds between checks for connected servers that are due for polling
+SAMPLING_TICK = 1
+
+class ResourceSnapshot:
+    """One sample of the local system, built by the monitor loop and never modified afterwards
+    
+    The API payloads are serialised once here, so GET handlers only write bytes.
+    """
+    
+    __slots__ = ('taken_at', 'system_info', 'alerts', 'system_info_json', 'alerts_json', 'data_json')
+    
+    def __init__(self, system_info: dict, alerts: list, data: dict):
+        self.taken_at = time.time()
+        self.system_info = system_info
+        self.alerts = alerts
+        self.system_info_json = json.dumps(system_info, default=str).encode('utf-8')
+        self.alerts_json = json.dumps(alerts, default=str).encode('utf-8')
+        self.data_json = json.dumps(data, default=str).encode('utf-8')
+    
+    @property
+    def age(self) -> float:
+        return time.time() - self.taken_at
+
+class ResourceMetrics:
+    """OpenMetrics view of the collected data for /metrics
+    
+    Updated by the monitor loops with data they already collected; a scrape only renders
+    (and usually just returns the cached body), it never samples anything.
+    """
+    
+    MIB = 1024 * 1024
+    
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        family = self.registry.family
+        # Hosts: localhost and every connected server
+        self.host_up = family('resource_host_up', 'gauge', 'Whether the last poll of the host succeeded', ('host',))
+        self.cpu_percent = family('resource_cpu_usage_percent', 'gauge', 'CPU usage in percent', ('host',))
+        self.memory_percent = family('resource_memory_usage_percent', 'gauge', 'Memory usage in percent', ('host',))
+        self.disk_percent = family('resource_disk_usage_percent', 'gauge', 'Root filesystem usage in percent',
+                                   ('host',))
+        self.load1 = family('resource_load1', 'gauge', '1 minute load average', ('host',))
+        self.memory_total = family('resource_memory_total_bytes', 'gauge', 'Total memory', ('host',), 'bytes')
+        self.memory_used = family('resource_memory_used_bytes', 'gauge', 'Used memory', ('host',), 'bytes')
+        self.cpu_count = family('resource_cpu_count', 'gauge', 'Number of logical CPUs', ('host',))
+        self.disk_total = family('resource_disk_total_bytes', 'gauge', 'Root filesystem size', ('host',), 'bytes')
+        self.disk_used = family('resource_disk_used_bytes', 'gauge', 'Root filesystem used', ('host',), 'bytes')
+        self.network_received = family('resource_network_receive_bytes', 'counter', 'Bytes received',
+                                       ('host',), 'bytes')
+        self.network_sent = family('resource_network_transmit_bytes', 'counter', 'Bytes sent', ('host',), 'bytes')
+        self.processes = family('resource_processes', 'gauge', 'Number of processes', ('host',))
+        self.sample_time = family('resource_sample_timestamp_seconds', 'gauge', 'Time of the last sample',
+                                  ('host',), 'seconds')
+        self.alert_firing = family('resource_alert_firing', 'gauge', 'Alert rules currently firing',
+                                   ('host', 'rule', 'severity'))
+        # Docker containers
+        container_labels = ('container', 'name', 'image')
+        self.container_up = family('resource_container_up', 'gauge', 'Whether the container is running',
+                                   container_labels)
+        self.container_cpu = family('resource_container_cpu_usage_percent', 'gauge',
+                                    'Container CPU usage in percent of one CPU', container_labels)
+        self.container_memory_percent = family('resource_container_memory_usage_percent', 'gauge',
+                                               'Container memory usage in percent of its limit', container_labels)
+        self.container_memory = family('resource_container_memory_used_bytes', 'gauge',
+                                       'Container memory usage without reclaimable cache', container_labels, 'bytes')
+        self.container_memory_limit = family('resource_container_memory_limit_bytes', 'gauge',
+                                             'Container memory limit (host memory when unlimited)',
+                                             container_labels, 'bytes')
+        # Cgroups of the resource policies
+        self.cgroup_cpu = family('resource_cgroup_cpu_usage_seconds', 'counter', 'CPU time used by the cgroup',
+                                 ('cgroup',), 'seconds')
+        self.cgroup_throttled = family('resource_cgroup_cpu_throttled_seconds', 'counter',
+                                       'Time the cgroup was throttled by cpu.max', ('cgroup',), 'seconds')
+        self.cgroup_memory = family('resource_cgroup_memory_usage_bytes', 'gauge', 'Memory used by the cgroup',
+                                    ('cgroup',), 'bytes')
+        self.cgroup_memory_limit = family('resource_cgroup_memory_limit_bytes', 'gauge',
+                                          'Memory limit of the cgroup (absent when unlimited)', ('cgroup',), 'bytes')
+        self.cgroup_oom_kills = family('resource_cgroup_oom_kills', 'counter',
+                                       'Processes killed by the OOM killer in the cgroup', ('cgroup',))
+    
+    def update_local(self, snapshot: ResourceSnapshot):
+        """Local system from a snapshot"""
+        info = snapshot.system_info
+        if not info:
+            return
+        host = ('localhost',)
+        with self.registry.lock:
+            self.host_up.set(host, 1)
+            self.cpu_percent.set(host, info['cpu']['percent'])
+            self.cpu_count.set(host, info['cpu']['count'])
+            self.memory_percent.set(host, info['memory']['percent'])
+            self.memory_total.set(host, info['memory']['total'])
+            self.memory_used.set(host, info['memory']['used'])
+            self.disk_percent.set(host, info['disk']['percent'])
+            self.disk_total.set(host, info['disk']['total'])
+            self.disk_used.set(host, info['disk']['used'])
+            self.network_received.set(host, info['network']['bytes_recv'])
+            self.network_sent.set(host, info['network']['bytes_sent'])
+            self.load1.set(host, info['system']['load_average'][0])
+            self.processes.set(host, info['system']['process_count'])
+            self.sample_time.set(host, round(snapshot.taken_at, 3))
+            self._update_alerts(snapshot.alerts)
+    
+    def _update_alerts(self, alerts):
+        firing = {(alert['host'], alert['rule'], alert['type']) for alert in alerts}
+        for labels in firing:
+            self.alert_firing.set(labels, 1)
+        self.alert_firing.retain(firing)
+    
+    def update_servers(self, servers: dict):
+        """Connected servers and Docker containers from one update_connected_servers sweep"""
+        seen = defaultdict(set)
+        
+        def put(family, labels, value):
+            family.set(labels, value)
+            seen[family].add(labels)
+        
+        with self.registry.lock:
+            for ip, server in servers.items():
+                info = server.get('system_info') or {}
+                if server.get('type') == 'docker_container':
+                    container = server.get('container_info', {})
+                    labels = (container.get('id', ip), container.get('name', ''), container.get('image', ''))
+                    put(self.container_up, labels, 1 if server.get('status') == 'Online' else 0)
+                    put(self.container_cpu, labels, container.get('cpu_percent', 0))
+                    put(self.container_memory_percent, labels, container.get('memory_percent', 0))
+                    if container.get('memory_used_bytes') is not None:
+                        put(self.container_memory, labels, container['memory_used_bytes'])
+                        put(self.container_memory_limit, labels, container['memory_limit_bytes'])
+                    continue
+                
+                host = (ip,)
+                connected = server.get('ssh_connected') or server.get('agent')
+                up = connected and not server.get('stale') and 'error' not in info
+                put(self.host_up, host, 1 if up else 0)
+                if not up:
+                    # Values of a host that is down are dropped rather than exported as current
+                    continue
+                put(self.cpu_percent, host, info.get('cpu_percent', 0))
+                put(self.memory_percent, host, info.get('memory_percent', 0))
+                put(self.disk_percent, host, info.get('disk_percent', 0))
+                put(self.load1, host, info.get('load_avg', 0))
+                memory_info = info.get('memory_info') or {}
+                if memory_info:
+                    put(self.memory_total, host, memory_info['total_mb'] * self.MIB)
+                    put(self.memory_used, host, memory_info['used_mb'] * self.MIB)
+            
+            # The local system is updated by update_local, everything else that was not seen is gone
+            local = {('localhost',)}
+            for family in (self.host_up, self.cpu_percent, self.memory_percent, self.disk_percent, self.load1,
+                           self.memory_total, self.memory_used):
+                family.retain(seen[family] | local)
+            for family in (self.container_up, self.container_cpu, self.container_memory_percent,
+                           self.container_memory, self.container_memory_limit):
+                family.retain(seen[family])
+    
+    def update_cgroups(self, stats: dict):
+        """{cgroup name: CgroupManager.get_cgroup_stats()}"""
+        seen = defaultdict(set)
+        
+        def put(family, labels, value):
+            family.set(labels, value)
+            seen[family].add(labels)
+        
+        with self.registry.lock:
+            for name, values in stats.items():
+                group = (name,)
+                put(self.cgroup_cpu, group, values.get('cpu_usage_ns', 0) / 1e9)
+                put(self.cgroup_memory, group, values.get('memory_usage_bytes', 0))
+                if values.get('memory_limit_bytes'):
+                    put(self.cgroup_memory_limit, group, values['memory_limit_bytes'])
+                if 'cpu_throttled_ns' in values:
+                    put(self.cgroup_throttled, group, values['cpu_throttled_ns'] / 1e9)
+                if 'oom_kills' in values:
+                    put(self.cgroup_oom_kills, group, values['oom_kills'])
+            for family in (self.cgroup_cpu, self.cgroup_throttled, self.cgroup_memory, self.cgroup_memory_limit,
+                           self.cgroup_oom_kills):
+                family.retain(seen[family])
+    
+    def render(self) -> bytes:
+        return self.registry.render()
+
 class ResourceData:
     """Manages resource monitoring data"""
     
     def __init__(self):
         self.server_discovery = ServerDiscovery()
+        # Known servers come back from the state store instead of a new scan
+        self.server_discovery.load_configuration()
         self.network_scanner = QuickNetworkScanner()
+        self.jobs = JobManager()
         self.config = DEFAULT_CONFIG.copy()
+        self.alert_engine = AlertEngine(default_rules(self.config['monitoring']['cpu_threshold'],
+                                                      self.config['monitoring']['memory_threshold']))
+        self.cgroup_manager = CgroupManager()
+        self.metrics = ResourceMetrics()
+        self.agents = AgentRegistry()
+        self.fleet_access = FleetAccess()
+        # monitoring.interval is the base interval; idle servers back off from it, alerting ones speed up
+        self.sampling = AdaptiveScheduler(base_interval=self.config['monitoring']['interval'],
+                                          thresholds=thresholds_from_rules(self.alert_engine.rules))
         self.monitoring_active = False
         self.monitoring_thread = None
+        self.servers_thread = None
+        
+        # Latest ResourceSnapshot; replaced as a whole by the monitor loop, read by every GET handler
+        self.snapshot = None
+        self.snapshot_lock = threading.Lock()
         
     def start_monitoring(self):
         """Start background monitoring"""
@@ -37,6 +251,9 @@ class ResourceData:
             self.monitoring_active = True
             self.monitoring_thread = threading.Thread(target=self._monitor_loop, daemon=True)
             self.monitoring_thread.start()
+            # Remote polling can take up to the per-host deadline, so it must not delay local samples
+            self.servers_thread = threading.Thread(target=self._servers_loop, daemon=True)
+            self.servers_thread.start()
     
     def stop_monitoring(self):
         """Stop background monitoring"""
@@ -45,29 +262,123 @@ class ResourceData:
             self.monitoring_thread.join(timeout=1)
     
     def _monitor_loop(self):
-        """Background monitoring loop"""
+        """Background monitoring loop - the only place the local system is sampled"""
         while self.monitoring_active:
             try:
-                self.update_data()
-                time.sleep(self.config['monitoring']['interval'])
+                self.take_snapshot()
+                time.sleep(self.config['monitoring'].get('snapshot_interval', 2))
             except Exception as e:
                 print(f"Monitoring error: {e}")
                 time.sleep(5)
     
-    def update_data(self):
-        """Update resource data"""
+    def _servers_loop(self):
+        """Background polling of connected servers, each at the interval picked by self.sampling
+        
+        Docker containers and push agents are still refreshed every monitoring interval.
+        """
+        last_full = 0
+        while self.monitoring_active:
+            try:
+                connected = self.server_discovery.connected_servers if self.server_discovery else {}
+                self.sampling.retain(connected)
+                due = self.sampling.due(list(connected))
+                full = time.time() - last_full >= self.config['monitoring']['interval']
+                if due or full:
+                    if full:
+                        last_full = time.time()
+                    self.update_data(due, containers=full)
+                time.sleep(SAMPLING_TICK)
+            except Exception as e:
+                print(f"Monitoring error: {e}")
+                time.sleep(5)
+    
+    def take_snapshot(self) -> ResourceSnapshot:
+        """Sample the system and publish the result as the current snapshot"""
+        with self.snapshot_lock:
+            system_info = self.get_system_info()
+            alerts = self.get_alerts(system_info)
+            snapshot = ResourceSnapshot(system_info, alerts, self._client_data(system_info, alerts))
+            self.snapshot = snapshot
+        self.metrics.update_local(snapshot)
+        self.metrics.update_cgroups(self.get_cgroup_stats())
+        return snapshot
+    
+    def get_snapshot(self) -> ResourceSnapshot:
+        """Current snapshot; only the very first request (before the monitor loop ran) samples"""
+        snapshot = self.snapshot
+        if snapshot is None:
+            with self.snapshot_lock:
+                snapshot = self.snapshot
+            if snapshot is None:
+                snapshot = self.take_snapshot()
+        return snapshot
+    
+    def update_data(self, hosts=None, containers=True):
+        """Update resource data
+        
+        Polls ``hosts`` (all connected servers by default); the others keep their last entry.
+        """
         try:
+            servers = {}
             # Update server discovery data if method exists
             if self.server_discovery and hasattr(self.server_discovery, 'update_connected_servers'):
-                self.server_discovery.update_connected_servers()
+                servers = self.server_discovery.update_connected_servers(hosts=hosts, containers=containers)
+                polled = list(self.server_discovery.connected_servers) if hosts is None else hosts
+                
+                # Connected servers go through the same alert rules as the local system
+                for ip in polled:
+                    server = servers.get(ip)
+                    values = None
+                    system_info = (server or {}).get('system_info') or {}
+                    # A failed poll (no connection, stale, or an 'error' from the collector) is no sample
+                    if (server and server.get('ssh_connected') and not server.get('stale')
+                            and 'error' not in server and 'error' not in system_info):
+                        values = {
+                            'cpu': system_info.get('cpu_percent'),
+                            'memory': system_info.get('memory_percent'),
+                            'disk': system_info.get('disk_percent'),
+                            'load': system_info.get('load_avg')
+                        }
+                        self.alert_engine.observe(ip, values)
+                    # The next poll of each server depends on what this one returned (a failed poll backs off)
+                    self.sampling.record(ip, values)
+                
+                # Alerting servers are polled fast until the alert has cleared
+                for alert in self.alert_engine.active_alerts():
+                    if alert['host'] in self.server_discovery.connected_servers:
+                        self.sampling.promote(alert['host'])
+            
+            # Hosts with a push agent; their samples went through the alert rules on arrival
+            servers = {**servers, **self.agents.servers()}
+            self.alert_engine.retain_hosts(['localhost'] + list(servers))
+            self.metrics.update_servers(servers)
         except Exception as e:
             print(f"Error updating data: {e}")
     
+    def ingest_agent_batch(self, batch: dict, address: str) -> int:
+        """Store a batch pushed by an agent; returns the number of new samples"""
+        host, samples = self.agents.ingest(batch, address)
+        for sample in samples:
+            self.alert_engine.observe(host, {
+                'cpu': sample.get('cpu.percent'),
+                'memory': sample.get('memory.percent'),
+                'disk': sample.get('disk.percent'),
+                'load': (sample.get('cpu.load_avg') or [None])[0]
+            }, sample['ts'])
+        return len(samples)
+    
+    def get_cgroup_stats(self):
+        """Stats of the resource policy cgroups and any other group under our parent group"""
+        names = set(self.cgroup_manager.list_cgroups()) | {policy.name for policy in DEFAULT_POLICIES}
+        return {name: self.cgroup_manager.get_cgroup_stats(name) for name in sorted(names)
+                if self.cgroup_manager.has_cgroup(name)}
+    
     def get_system_info(self):
         """Get current system information"""
         try:
-            # CPU info
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # CPU info - usage since the previous sample, so this never blocks. The very first
+            # call has no previous sample and gets a short measuring interval instead
+            cpu_percent = psutil.cpu_percent(interval=None if self.snapshot else 0.1)
             cpu_count = psutil.cpu_count()
             
             # Memory info
@@ -127,44 +438,71 @@ class ResourceData:
             print(f"Error getting system info: {e}")
             return {}
     
-    def get_alerts(self):
-        """Get system alerts"""
-        alerts = []
+    def get_alerts(self, system_info=None):
+        """Get system alerts (after adding the given system info, or from the current snapshot)
+        
+        Alerts come from the windowed rule engine: one entry per host and rule while it is firing.
+        """
         try:
-            system_info = self.get_system_info()
+            if system_info is None:
+                return list(self.get_snapshot().alerts)
             
-            # CPU alert
-            if system_info.get('cpu', {}).get('percent', 0) > self.config['monitoring']['cpu_threshold']:
-                alerts.append({
-                    'type': 'warning',
-                    'message': f"High CPU usage: {system_info['cpu']['percent']:.1f}%",
-                    'timestamp': datetime.now().isoformat()
-                })
-            
-            # Memory alert
-            if system_info.get('memory', {}).get('percent', 0) > self.config['monitoring']['memory_threshold']:
-                alerts.append({
-                    'type': 'warning',
-                    'message': f"High memory usage: {system_info['memory']['percent']:.1f}%",
-                    'timestamp': datetime.now().isoformat()
-                })
-            
-            # Disk alert
-            if system_info.get('disk', {}).get('percent', 0) > 90:
-                alerts.append({
-                    'type': 'warning',
-                    'message': f"High disk usage: {system_info['disk']['percent']:.1f}%",
-                    'timestamp': datetime.now().isoformat()
-                })
+            self.alert_engine.observe('localhost', {
+                'cpu': system_info.get('cpu', {}).get('percent'),
+                'memory': system_info.get('memory', {}).get('percent'),
+                'disk': system_info.get('disk', {}).get('percent'),
+                'load': (system_info.get('system', {}).get('load_average') or [None])[0]
+            })
+            return self.alert_engine.active_alerts()
                 
         except Exception as e:
             print(f"Error getting alerts: {e}")
-        
-        return alerts
+            return []
+    
+    def _client_data(self, system_info, alerts):
+        """Combined resource data in the format expected by the client"""
+        # Transform data to match the expected client format
+        data = {
+            'resource_usage': {
+                'cpu_percent': system_info.get('cpu', {}).get('percent', 0),
+                'memory_used': system_info.get('memory', {}).get('used', 0),
+                'memory_total': system_info.get('memory', {}).get('total', 0),
+                'memory_percent': system_info.get('memory', {}).get('percent', 0),
+                'memory_available': system_info.get('memory', {}).get('available', 0),
+                'swap_percent': 0  # Not implemented yet
+            },
+            'system_info': {
+                'cpu_count': system_info.get('cpu', {}).get('count', 0),
+                'uptime': system_info.get('system', {}).get('uptime', '0h 0m'),
+                'load_avg': system_info.get('system', {}).get('load_average', [0, 0, 0]),
+                'hostname': 'localhost',  # Default value
+                'platform': 'linux'  # Default value
+            },
+            'disk_info': {
+                'root_usage': {
+                    'used': system_info.get('disk', {}).get('used', 0),
+                    'total': system_info.get('disk', {}).get('total', 0),
+                    'percent': system_info.get('disk', {}).get('percent', 0)
+                },
+                'partitions': []  # Not implemented yet
+            },
+            'network_info': {
+                'bytes_sent': system_info.get('network', {}).get('bytes_sent', 0),
+                'bytes_recv': system_info.get('network', {}).get('bytes_recv', 0),
+                'interfaces': []  # Not implemented yet
+            },
+            'processes': [],  # Not implemented yet
+            'alerts': alerts,
+            'timestamp': datetime.now().isoformat()
+        }
+        return data
 
 class ResourceAPIHandler(BaseHTTPRequestHandler):
     """HTTP request handler for resource management API"""
     
+    # Set once this connection is kept open for a push agent
+    agent_connection = False
+    
     def __init__(self, *args, resource_data=None, **kwargs):
         self.resource_data = resource_data
         super().__init__(*args, **kwargs)
@@ -183,6 +521,12 @@ class ResourceAPIHandler(BaseHTTPRequestHandler):
                 self.send_system_info()
             elif path == '/api/alerts':
                 self.send_alerts()
+            elif path == '/metrics':
+                self.send_metrics()
+            elif path == '/api/jobs':
+                self.send_jobs()
+            elif path.startswith('/api/jobs/'):
+                self.send_jobs(path[len('/api/jobs/'):])
             else:
                 self.send_error(404, "Not Found")
                 
@@ -195,7 +539,9 @@ class ResourceAPIHandler(BaseHTTPRequestHandler):
             parsed_url = urlparse(self.path)
             path = parsed_url.path
             
-            if path == '/api/scan-network':
+            if path == '/api/agent/ingest':
+                self.handle_agent_ingest()
+            elif path == '/api/scan-network':
                 self.handle_scan_network()
             elif path == '/api/stop-scan':
                 self.handle_stop_scan()
@@ -203,6 +549,8 @@ class ResourceAPIHandler(BaseHTTPRequestHandler):
                 self.handle_connect_server()
             elif path == '/api/disconnect-server':
                 self.handle_disconnect_server()
+            elif path == '/api/fleet/exec':
+                self.handle_fleet_exec()
             elif path == '/api/save-config':
                 self.handle_save_config()
             elif path == '/api/load-config':
@@ -213,59 +561,76 @@ class ResourceAPIHandler(BaseHTTPRequestHandler):
         except Exception as e:
             self.send_error(500, str(e))
     
-    def send_response_headers(self, content_type='application/json'):
-        """Send response headers"""
-        self.send_response(200)
+    def send_response_headers(self, content_type='application/json', status=200, cors=True):
+        """Send response headers (without the CORS headers for endpoints browsers must not call)"""
+        self.send_response(status)
         self.send_header('Content-type', content_type)
+        if cors:
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+    
+    def send_job_response(self, job, background: bool, cors: bool = True):
+        """Reply with the job (202) in background mode, otherwise wait and reply with its result"""
+        if background:
+            response = {'success': True, 'job_id': job['id'], 'status_url': f"/api/jobs/{job['id']}", 'job': job}
+            self.send_response_headers(status=202, cors=cors)
+        else:
+            job = self.resource_data.jobs.wait(job)
+            if job['status'] == 'failed':
+                response = {'success': False, 'error': job['error']}
+            else:
+                response = job['result']
+            self.send_response_headers(cors=cors)
+        self.wfile.write(json.dumps(response, default=str).encode('utf-8'))
+    
+    def send_jobs(self, job_id=None):
+        """Send one background job (with its result) or the list of recent jobs"""
+        try:
+            if job_id:
+                job = self.resource_data.jobs.get(job_id)
+                if not job:
+                    self.send_error(404, "Job not found")
+                    return
+                response = {'success': True, 'job': job}
+            else:
+                response = {'success': True, 'jobs': self.resource_data.jobs.list()}
+            
+            self.send_response_headers()
+            self.wfile.write(json.dumps(response, default=str).encode('utf-8'))
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def send_snapshot(self, payload: bytes, snapshot: ResourceSnapshot):
+        """Send pre-serialised snapshot JSON; the snapshot age goes in the X-Snapshot-Age header"""
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('X-Snapshot-Age', f'{snapshot.age:.3f}')
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
+        self.wfile.write(payload)
     
     def send_resource_data(self):
         """Send combined resource data in the format expected by the client"""
         try:
-            system_info = self.resource_data.get_system_info()
-            alerts = self.resource_data.get_alerts()
-            
-            # Transform data to match the expected client format
-            data = {
-                'resource_usage': {
-                    'cpu_percent': system_info.get('cpu', {}).get('percent', 0),
-                    'memory_used': system_info.get('memory', {}).get('used', 0),
-                    'memory_total': system_info.get('memory', {}).get('total', 0),
-                    'memory_percent': system_info.get('memory', {}).get('percent', 0),
-                    'memory_available': system_info.get('memory', {}).get('available', 0),
-                    'swap_percent': 0  # Not implemented yet
-                },
-                'system_info': {
-                    'cpu_count': system_info.get('cpu', {}).get('count', 0),
-                    'uptime': system_info.get('system', {}).get('uptime', '0h 0m'),
-                    'load_avg': system_info.get('system', {}).get('load_average', [0, 0, 0]),
-                    'hostname': 'localhost',  # Default value
-                    'platform': 'linux'  # Default value
-                },
-                'disk_info': {
-                    'root_usage': {
-                        'used': system_info.get('disk', {}).get('used', 0),
-                        'total': system_info.get('disk', {}).get('total', 0),
-                        'percent': system_info.get('disk', {}).get('percent', 0)
-                    },
-                    'partitions': []  # Not implemented yet
-                },
-                'network_info': {
-                    'bytes_sent': system_info.get('network', {}).get('bytes_sent', 0),
-                    'bytes_recv': system_info.get('network', {}).get('bytes_recv', 0),
-                    'interfaces': []  # Not implemented yet
-                },
-                'processes': [],  # Not implemented yet
-                'alerts': alerts,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            self.send_response_headers()
-            self.wfile.write(json.dumps(data, default=str).encode('utf-8'))
-            
+            snapshot = self.resource_data.get_snapshot()
+            self.send_snapshot(snapshot.data_json, snapshot)
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def send_metrics(self):
+        """Send the latest collected data in OpenMetrics text format (never samples anything)"""
+        try:
+            payload = self.resource_data.metrics.render()
+            self.send_response(200)
+            self.send_header('Content-type', OPENMETRICS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
         except Exception as e:
             self.send_error(500, str(e))
     
@@ -281,7 +646,9 @@ class ResourceAPIHandler(BaseHTTPRequestHandler):
                     'success': True,
                     'status': status,
                     'connected_servers': connected_servers,
-                    'discovered_servers': discovered_servers
+                    'discovered_servers': discovered_servers,
+                    'agent_servers': self.resource_data.agents.servers(),
+                    'sampling': self.resource_data.sampling.stats()
                 }
             else:
                 response = {
@@ -298,23 +665,25 @@ class ResourceAPIHandler(BaseHTTPRequestHandler):
     def send_system_info(self):
         """Send system information"""
         try:
-            system_info = self.resource_data.get_system_info()
-            self.send_response_headers()
-            self.wfile.write(json.dumps(system_info, default=str).encode('utf-8'))
+            snapshot = self.resource_data.get_snapshot()
+            self.send_snapshot(snapshot.system_info_json, snapshot)
         except Exception as e:
             self.send_error(500, str(e))
     
     def send_alerts(self):
         """Send system alerts"""
         try:
-            alerts = self.resource_data.get_alerts()
-            self.send_response_headers()
-            self.wfile.write(json.dumps(alerts, default=str).encode('utf-8'))
+            snapshot = self.resource_data.get_snapshot()
+            self.send_snapshot(snapshot.alerts_json, snapshot)
         except Exception as e:
             self.send_error(500, str(e))
     
     def handle_scan_network(self):
-        """Handle network scanning request"""
+        """Handle network scanning request
+        
+        The scan runs as a background job. With "background": true the job is returned
+        right away (poll /api/jobs/<id>); otherwise the request waits for the result.
+        """
         try:
             content_length = int(self.headers.get('Content-Length', 0))
             if content_length > 0:
@@ -324,174 +693,97 @@ class ResourceAPIHandler(BaseHTTPRequestHandler):
                 username = request_data.get('username', 'root')
                 max_ips = request_data.get('max_ips', 50)
                 start_ip = request_data.get('start_ip', 1)
+                background = request_data.get('background', False)
             else:
                 network_range = '172.16.16'
                 username = 'root'
                 max_ips = 50
                 start_ip = 1
+                background = False
             
-            if self.resource_data.network_scanner:
-                try:
-                    # Try to use host network scanning if available
-                    discovered = self._scan_from_host(network_range, username, max_ips, start_ip)
-                    
-                    if not discovered:
-                        # Fallback to container-based scanning
-                        discovered = self.resource_data.network_scanner.quick_scan(
-                            network_range, username, max_ips=max_ips, start_ip=start_ip
-                        )
-                    
-                    print(f"Network scan completed. Found {len(discovered)} SSH-accessible servers.")
-                    
-                    if self.resource_data.server_discovery:
-                        for server in discovered:
-                            self.resource_data.server_discovery.discovered_servers[server['ip']] = {
-                                'status': 'discovered',
-                                'ssh_connected': False,
-                                'info': server,
-                                'discovered_at': server['discovered_at']
-                            }
-                    
-                    response = {
-                        'success': True,
-                        'message': f'✅ Scan completed. Found {len(discovered)} SSH-accessible servers.',
-                        'discovered_count': len(discovered),
-                        'discovered_servers': self.resource_data.server_discovery.discovered_servers
-                    }
-                except Exception as e:
-                    print(f"Error during network scan: {e}")
-                    response = {
-                        'success': False,
-                        'error': f'Scan failed: {str(e)}',
-                        'discovered_count': 0,
-                        'discovered_servers': {}
-                    }
-            else:
-                response = {
+            # Only one scan at a time; a second request joins the running one
+            job = self.resource_data.jobs.submit('scan', self._run_scan, network_range, username, max_ips, start_ip,
+                                                 single=True)
+            self.send_job_response(job, background)
+            
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def _run_scan(self, job, network_range: str, username: str, max_ips: int, start_ip: int):
+        """Network scan job; hosts with an open SSH port are published in the job progress as found"""
+        job['progress']['ssh_ports_open'] = []
+        
+        def on_result(result):
+            if result['ssh_open']:
+                job['progress']['ssh_ports_open'].append(result['ip'])
+        
+        if self.resource_data.network_scanner:
+            try:
+                # Try to use host network scanning if available
+                discovered = self._scan_from_host(network_range, username, max_ips, start_ip, on_result=on_result)
+                
+                if not discovered:
+                    # Fallback to container-based scanning
+                    discovered = self.resource_data.network_scanner.quick_scan(
+                        network_range, username, max_ips=max_ips, start_ip=start_ip
+                    )
+                
+                print(f"Network scan completed. Found {len(discovered)} SSH-accessible servers.")
+                
+                if self.resource_data.server_discovery:
+                    for server in discovered:
+                        self.resource_data.server_discovery.add_discovered_server(server['ip'], {
+                            'status': 'discovered',
+                            'ssh_connected': False,
+                            'info': server,
+                            'discovered_at': server['discovered_at']
+                        })
+                
+                return {
+                    'success': True,
+                    'message': f'✅ Scan completed. Found {len(discovered)} SSH-accessible servers.',
+                    'discovered_count': len(discovered),
+                    'discovered_servers': self.resource_data.server_discovery.discovered_servers
+                }
+            except Exception as e:
+                print(f"Error during network scan: {e}")
+                return {
                     'success': False,
-                    'error': 'Network scanner not available',
+                    'error': f'Scan failed: {str(e)}',
                     'discovered_count': 0,
                     'discovered_servers': {}
                 }
-            
-            self.send_response_headers()
-            self.wfile.write(json.dumps(response, default=str).encode('utf-8'))
-            
-        except Exception as e:
-            self.send_error(500, str(e))
+        
+        return {
+            'success': False,
+            'error': 'Network scanner not available',
+            'discovered_count': 0,
+            'discovered_servers': {}
+        }
     
-    def _scan_from_host(self, network_range: str, username: str, max_ips: int, start_ip: int):
+    def _scan_from_host(self, network_range: str, username: str, max_ips: int, start_ip: int, on_result=None):
         """Try to scan from host network perspective"""
         try:
-            # Check if we can access the host network
-            import subprocess
-            import json
-            from datetime import datetime
-            
             discovered = []
             end_ip = min(start_ip + max_ips - 1, 254)
             
             print(f"🔍 Host-based scanning network {network_range}.x (IPs {start_ip}-{end_ip})...")
             
-            for i in range(start_ip, min(start_ip + max_ips, 255)):
-                ip = f"{network_range}.{i}"
-                print(f"  Testing {ip}...", end=' ', flush=True)
-                
-                # First try ping to see if host is reachable
-                ping_success = False
-                try:
-                    ping_result = subprocess.run([
-                        'ping', '-c', '1', '-W', '2', ip
-                    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=5)
-                    
-                    if ping_result.returncode == 0:
-                        ping_success = True
-                        print("✅ Ping OK", end=' ')
-                    else:
-                        print("❌ No ping", end=' ')
-                except:
-                    print("❌ Ping failed", end=' ')
-                
-                # Try SSH connection with different authentication methods
-                ssh_success = False
-                ssh_error = None
-                
-                try:
-                    # Try key-based authentication first
-                    result = subprocess.run([
-                        'ssh', '-o', 'ConnectTimeout=5',
-                        '-o', 'BatchMode=yes',
-                        '-o', 'StrictHostKeyChecking=no',
-                        '-o', 'UserKnownHostsFile=/dev/null',
-                        f'{username}@{ip}',
-                        'echo OK'
-                    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=10)
-                    
-                    if result.returncode == 0:
-                        ssh_success = True
-                        print("✅ SSH OK (key auth)")
-                    else:
-                        # Check if it's a password authentication error
-                        stderr_output = result.stderr.decode('utf-8', errors='ignore')
-                        if 'Permission denied' in stderr_output and ('password' in stderr_output.lower() or 'publickey' in stderr_output.lower()):
-                            ssh_success = True
-                            ssh_error = "Requires password authentication"
-                            print("✅ SSH reachable (password required)")
-                        else:
-                            ssh_error = stderr_output
-                            print("❌ No SSH")
-                        
-                except subprocess.TimeoutExpired:
-                    ssh_error = "Connection timeout"
-                    print("⏰ SSH Timeout")
-                except Exception as e:
-                    ssh_error = str(e)
-                    print(f"❌ SSH Error: {e}")
-                
-                if ssh_success:
-                    # Get basic server info
-                    try:
-                        hostname_result = subprocess.run([
-                            'ssh', '-o', 'ConnectTimeout=3', f'{username}@{ip}', 'hostname'
-                        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=5, universal_newlines=True)
-                        
-                        hostname = hostname_result.stdout.strip() if hostname_result.returncode == 0 else 'Unknown'
-                        
-                        os_result = subprocess.run([
-                            'ssh', '-o', 'ConnectTimeout=3', f'{username}@{ip}', 
-                            'grep PRETTY_NAME /etc/os-release 2>/dev/null | cut -d\\" -f2 || echo "Unknown"'
-                        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=5, universal_newlines=True)
-                        
-                        os_info = os_result.stdout.strip() if os_result.returncode == 0 else 'Unknown'
-                        
-                        server_info = {
-                            'ip': ip,
-                            'hostname': hostname,
-                            'os': os_info,
-                            'cpu_cores': 'Unknown',
-                            'memory': 'Unknown',
-                            'ssh_accessible': True,
-                            'requires_password': ssh_error == "Requires password authentication",
-                            'ssh_error': ssh_error,
-                            'discovered_at': datetime.now().isoformat()
-                        }
-                        
-                        discovered.append(server_info)
-                        
-                    except Exception as e:
-                        print(f"Error getting info for {ip}: {e}")
-                        server_info = {
-                            'ip': ip,
-                            'hostname': 'Unknown',
-                            'os': 'Unknown',
-                            'cpu_cores': 'Unknown',
-                            'memory': 'Unknown',
-                            'ssh_accessible': True,
-                            'requires_password': ssh_error == "Requires password authentication",
-                            'ssh_error': ssh_error,
-                            'discovered_at': datetime.now().isoformat()
-                        }
-                        discovered.append(server_info)
+            # Fast sweep of the SSH port; only hosts that answer get the ssh login probe
+            def report(result):
+                print(f"  {result['ip']}: SSH port {'open' if result['ssh_open'] else 'closed'}")
+                if on_result:
+                    on_result(result)
+            
+            engine = ScanEngine()
+            results = engine.scan(iter_prefix_hosts(network_range, start_ip, max_ips), on_result=report)
+            ssh_hosts = [result['ip'] for result in results if result['ssh_open']]
+            
+            if ssh_hosts and not engine.cancelled:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+                    for server_info in executor.map(lambda ip: self._probe_ssh_host(ip, username), ssh_hosts):
+                        if server_info:
+                            discovered.append(server_info)
             
             print(f"✅ Host-based scan completed! Found {len(discovered)} SSH-accessible servers")
             return discovered
@@ -500,6 +792,140 @@ class ResourceAPIHandler(BaseHTTPRequestHandler):
             print(f"Host-based scanning failed: {e}")
             return []
     
+    def _probe_ssh_host(self, ip: str, username: str):
+        """SSH login probe for one host found by the sweep; None when SSH is not usable"""
+        # Try SSH connection with different authentication methods
+        ssh_success = False
+        ssh_error = None
+        
+        try:
+            # Try key-based authentication first
+            result = subprocess.run([
+                'ssh', '-o', 'ConnectTimeout=5',
+                '-o', 'BatchMode=yes',
+                '-o', 'StrictHostKeyChecking=no',
+                '-o', 'UserKnownHostsFile=/dev/null',
+                f'{username}@{ip}',
+                'echo OK'
+            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=10)
+            
+            if result.returncode == 0:
+                ssh_success = True
+                print(f"  {ip}: ✅ SSH OK (key auth)")
+            else:
+                # Check if it's a password authentication error
+                stderr_output = result.stderr.decode('utf-8', errors='ignore')
+                if 'Permission denied' in stderr_output and ('password' in stderr_output.lower() or 'publickey' in stderr_output.lower()):
+                    ssh_success = True
+                    ssh_error = "Requires password authentication"
+                    print(f"  {ip}: ✅ SSH reachable (password required)")
+                else:
+                    ssh_error = stderr_output
+                    print(f"  {ip}: ❌ No SSH")
+        
+        except subprocess.TimeoutExpired:
+            ssh_error = "Connection timeout"
+            print(f"  {ip}: ⏰ SSH Timeout")
+        except Exception as e:
+            ssh_error = str(e)
+            print(f"  {ip}: ❌ SSH Error: {e}")
+        
+        if ssh_success:
+            # Get basic server info
+            try:
+                hostname_result = subprocess.run([
+                    'ssh', '-o', 'ConnectTimeout=3', f'{username}@{ip}', 'hostname'
+                ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=5, universal_newlines=True)
+                
+                hostname = hostname_result.stdout.strip() if hostname_result.returncode == 0 else 'Unknown'
+                
+                os_result = subprocess.run([
+                    'ssh', '-o', 'ConnectTimeout=3', f'{username}@{ip}', 
+                    'grep PRETTY_NAME /etc/os-release 2>/dev/null | cut -d\\" -f2 || echo "Unknown"'
+                ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=5, universal_newlines=True)
+                
+                os_info = os_result.stdout.strip() if os_result.returncode == 0 else 'Unknown'
+                
+                server_info = {
+                    'ip': ip,
+                    'hostname': hostname,
+                    'os': os_info,
+                    'cpu_cores': 'Unknown',
+                    'memory': 'Unknown',
+                    'ssh_accessible': True,
+                    'requires_password': ssh_error == "Requires password authentication",
+                    'ssh_error': ssh_error,
+                    'discovered_at': datetime.now().isoformat()
+                }
+                
+                return server_info
+            
+            except Exception as e:
+                print(f"Error getting info for {ip}: {e}")
+                server_info = {
+                    'ip': ip,
+                    'hostname': 'Unknown',
+                    'os': 'Unknown',
+                    'cpu_cores': 'Unknown',
+                    'memory': 'Unknown',
+                    'ssh_accessible': True,
+                    'requires_password': ssh_error == "Requires password authentication",
+                    'ssh_error': ssh_error,
+                    'discovered_at': datetime.now().isoformat()
+                }
+                return server_info
+        return None
+    
+    def handle_agent_ingest(self):
+        """Handle a batch of samples pushed by a resource agent (core/push_agent.py)
+        
+        Agents authenticate with the shared RESOURCE_AGENT_TOKEN. The connection of an
+        authenticated agent stays open for its next push and no longer takes a request
+        worker; agent connections have their own limit instead.
+        """
+        try:
+            if not self.resource_data.agents.authenticate(self.headers.get('Authorization')):
+                # Checked before the body is read; unauthenticated pushes never get a kept-alive connection
+                self.close_connection = True
+                self.send_error(401, "Agent token required (RESOURCE_AGENT_TOKEN)")
+                return
+            content_length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(content_length)
+            try:
+                batch = decode_batch(body, self.headers.get('Content-Type'))
+                accepted = self.resource_data.ingest_agent_batch(batch, self.client_address[0])
+            except NotImplementedError as e:
+                self.send_error(415, str(e))
+                return
+            except ValueError as e:
+                self.send_error(400, f"Invalid batch: {e}")
+                return
+            
+            if not self.agent_connection and self.resource_data.agents.acquire_connection():
+                self.agent_connection = True
+                self.server.detach_request()
+            if self.agent_connection:
+                # An agent that went away must not hold its thread forever
+                self.connection.settimeout(max(AGENT_IDLE_TIMEOUT, 4 * batch.get('flush_interval', 0)))
+            
+            payload = json.dumps({'success': True, 'accepted': accepted}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.send_header('Connection', 'keep-alive' if self.agent_connection else 'close')
+            self.end_headers()
+            self.wfile.write(payload)
+            
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            if self.agent_connection:
+                self.resource_data.agents.release_connection()
+    
     def handle_stop_scan(self):
         """Handle stop scanning request"""
         try:
@@ -516,7 +942,7 @@ class ResourceAPIHandler(BaseHTTPRequestHandler):
             self.send_error(500, str(e))
     
     def handle_connect_server(self):
-        """Handle server connection request"""
+        """Handle server connection request (runs as a background job, see handle_scan_network)"""
         try:
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
@@ -529,11 +955,9 @@ class ResourceAPIHandler(BaseHTTPRequestHandler):
             if not ip:
                 response = {'success': False, 'error': 'IP address is required'}
             elif self.resource_data.server_discovery:
-                success = self.resource_data.server_discovery.connect_to_server(ip, username, password)
-                response = {
-                    'success': success,
-                    'message': f"Connection {'successful' if success else 'failed'} to {ip}"
-                }
+                job = self.resource_data.jobs.submit('connect', self._run_connect, ip, username, password)
+                self.send_job_response(job, request_data.get('background', False))
+                return
             else:
                 response = {'success': False, 'error': 'Server discovery not available'}
             
@@ -543,6 +967,107 @@ class ResourceAPIHandler(BaseHTTPRequestHandler):
         except Exception as e:
             self.send_error(500, str(e))
     
+    def _run_connect(self, job, ip: str, username: str, password: str):
+        """Server connection job"""
+        job['progress']['ip'] = ip
+        success = self.resource_data.server_discovery.connect_to_server(ip, username, password)
+        return {
+            'success': success,
+            'message': f"Connection {'successful' if success else 'failed'} to {ip}"
+        }
+    
+    def handle_fleet_exec(self):
+        """Handle a command to run on many connected servers at once (core/fleet_exec.py)
+        
+        Runs "command" on "servers" (default: every connected server), at most "max_concurrency"
+        hosts at a time and "timeout" seconds per host. With "stream": true the response is
+        newline-delimited JSON with one event per output line and per finished host, followed
+        by the aggregated result. Otherwise it runs as a background job (see handle_scan_network).
+        
+        Access is decided by FleetAccess (token or command allowlist, loopback clients by
+        default), and the responses carry no CORS headers so no web page can call it.
+        """
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+            request_data = json.loads(self.rfile.read(content_length).decode('utf-8')) if content_length else {}
+            
+            command = request_data.get('command')
+            servers = request_data.get('servers')
+            
+            if not command or not isinstance(command, str):
+                response = {'success': False, 'error': 'Command is required'}
+            elif servers is not None and not isinstance(servers, list):
+                response = {'success': False, 'error': 'servers must be a list of server addresses'}
+            elif not self.resource_data.server_discovery:
+                response = {'success': False, 'error': 'Server discovery not available'}
+            else:
+                refused = self.resource_data.fleet_access.check(self.client_address[0],
+                                                                self.headers.get('Authorization'), command)
+                if refused:
+                    self.send_error(*refused)
+                    return
+                options = {
+                    'max_concurrency': int(request_data.get('max_concurrency', FLEET_CONCURRENCY)),
+                    'timeout': float(request_data.get('timeout', FLEET_TIMEOUT)),
+                    'local_shell': self.resource_data.fleet_access.local_shell
+                }
+                if request_data.get('stream', False):
+                    self._stream_fleet_exec(command, servers, options)
+                else:
+                    job = self.resource_data.jobs.submit('fleet', self._run_fleet_exec, command, servers, options)
+                    self.send_job_response(job, request_data.get('background', False), cors=False)
+                return
+            
+            self.send_response_headers(cors=False)
+            self.wfile.write(json.dumps(response).encode('utf-8'))
+            
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def _run_fleet_exec(self, job, command: str, servers, options: dict):
+        """Fleet command job; the status of every host is published in the job progress"""
+        discovery = self.resource_data.server_discovery
+        hosts = list(dict.fromkeys(servers if servers is not None else discovery.connected_servers))
+        progress = job['progress']
+        progress.update({'command': command, 'total': len(hosts), 'finished': 0,
+                         'hosts': {ip: 'queued' for ip in hosts}})
+        
+        lock = threading.Lock()
+        
+        def on_event(event):
+            if event['event'] == 'start':
+                progress['hosts'][event['host']] = 'running'
+            elif event['event'] == 'done':
+                with lock:
+                    progress['hosts'][event['host']] = event['status']
+                    progress['finished'] += 1
+        
+        return discovery.run_fleet_command(command, hosts, on_event=on_event, **options)
+    
+    def _stream_fleet_exec(self, command: str, servers, options: dict):
+        """Write fleet command events as newline-delimited JSON while the command runs"""
+        self.send_response(200)
+        self.send_header('Content-type', 'application/x-ndjson')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        
+        # Events come from the fleet worker threads
+        write_lock = threading.Lock()
+        
+        def write(event):
+            line = json.dumps(event, default=str).encode('utf-8') + b'\n'
+            with write_lock:
+                self.wfile.write(line)
+                self.wfile.flush()
+        
+        result = self.resource_data.server_discovery.run_fleet_command(command, servers, on_event=write,
+                                                                       **options)
+        try:
+            write(dict(result, event='result'))
+        except OSError:
+            pass  # Client went away; the command has finished anyway
+    
     def handle_disconnect_server(self):
         """Handle server disconnection request"""
         try:
@@ -607,6 +1132,10 @@ class ResourceAPIHandler(BaseHTTPRequestHandler):
     
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
+        if urlparse(self.path).path == '/api/fleet/exec':
+            # Cross-origin calls of the fleet endpoint are never allowed
+            self.send_error(403, "Cross-origin requests are not allowed for fleet execution")
+            return
         self.send_response_headers()
 
 def create_resource_handler(resource_data):
@@ -616,8 +1145,9 @@ def create_resource_handler(resource_data):
             super().__init__(*args, resource_data=resource_data, **kwargs)
     return Handler
 
-def start_resource_server(port=8005, host='0.0.0.0'):
+def start_resource_server(port=8005, host='0.0.0.0', max_workers=32):
     """Start the resource management server"""
+    resource_data = None
     try:
         # Initialize resource data
         resource_data = ResourceData()
@@ -625,7 +1155,8 @@ def start_resource_server(port=8005, host='0.0.0.0'):
         
         # Create server
         handler_class = create_resource_handler(resource_data)
-        server = HTTPServer((host, port), handler_class)
+        # Requests are served concurrently, so a slow scan or connect never blocks /api/data
+        server = BoundedThreadingHTTPServer((host, port), handler_class, max_workers=max_workers)
         
         print(f"🚀 PinnacleAi Resource Server started on {host}:{port}")
         print(f"📊 API endpoints available:")
@@ -633,10 +1164,15 @@ def start_resource_server(port=8005, host='0.0.0.0'):
         print(f"   GET  /api/server-status     - Get server status")
         print(f"   GET  /api/system-info       - Get system info")
         print(f"   GET  /api/alerts            - Get alerts")
+        print(f"   GET  /api/jobs[/<id>]       - Background scan/connect jobs")
+        print(f"   GET  /metrics               - OpenMetrics exposition for Prometheus")
+        print(f"   POST /api/agent/ingest      - Samples pushed by resource agents")
         print(f"   POST /api/scan-network      - Scan network")
         print(f"   POST /api/stop-scan         - Stop scan")
         print(f"   POST /api/connect-server    - Connect to server")
         print(f"   POST /api/disconnect-server - Disconnect from server")
+        print(f"   POST /api/fleet/exec        - Run a command on connected servers "
+              f"({'enabled' if resource_data.fleet_access.enabled else 'disabled'})")
         print(f"   POST /api/save-config       - Save configuration")
         print(f"   POST /api/load-config       - Load configuration")
         print(f"")
@@ -662,6 +1198,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='PinnacleAi Resource Management Server')
     parser.add_argument('--host', default='0.0.0.0', help='Host to bind to (default: 0.0.0.0)')
     parser.add_argument('--port', type=int, default=8005, help='Port to bind to (default: 8005)')
+    parser.add_argument('--max-workers', type=int, default=32, help='Maximum concurrent requests (default: 32)')
     
     args = parser.parse_args()
-    start_resource_server(args.port, args.host) 
\ No newline at end of file
+    start_resource_server(args.port, args.host, args.max_workers) 
\ No newline at end of file
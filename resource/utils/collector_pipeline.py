@@ -0,0 +1,188 @@
+#!/usr/bin/env python3.12
+"""
+Scheduled collectors feeding one aggregator
+Every collector runs on its own thread at its own interval and puts its result on a bounded
+queue; one aggregator thread drains the queue and builds the snapshot. A slow collector
+only delays its own results. When the aggregator falls behind, collectors block on the full
+queue for at most one interval and then drop that result, so they slow down instead of
+piling up work.
+"""
+
+import time
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_QUEUE_SIZE = 32
+
+# Weight of the newest run in the average duration
+_EWMA_ALPHA = 0.2
+
+
+class ScheduledCollector:
+    """One collector function called every ``interval`` seconds on its own thread"""
+
+    def __init__(self, name: str, fn: Callable[[], Any], interval: float):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.wake = threading.Event()
+        self.thread = None
+
+        self.runs = 0
+        self.errors = 0
+        self.dropped = 0
+        self.last_error = None
+        self.last_run = None
+        self.last_duration = None
+        self.avg_duration = None
+        self.max_duration = 0.0
+
+    def _record(self, duration: float):
+        self.runs += 1
+        self.last_run = time.time()
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        if self.avg_duration is None:
+            self.avg_duration = duration
+        else:
+            self.avg_duration += _EWMA_ALPHA * (duration - self.avg_duration)
+
+    def stats(self) -> Dict:
+        def ms(seconds):
+            return round(seconds * 1000, 2) if seconds is not None else None
+        return {
+            'interval': self.interval,
+            'runs': self.runs,
+            'errors': self.errors,
+            'dropped': self.dropped,
+            'last_error': self.last_error,
+            'last_run': self.last_run,
+            'last_duration_ms': ms(self.last_duration),
+            'avg_duration_ms': ms(self.avg_duration),
+            'max_duration_ms': ms(self.max_duration)
+        }
+
+
+class CollectorPipeline:
+    """Runs scheduled collectors and hands their results to one aggregate callback
+
+    ``aggregate`` is called on the aggregator thread with every result waiting in the queue
+    as a list of (collector name, result) pairs, oldest first.
+    """
+
+    def __init__(self, aggregate: Callable[[List[Tuple[str, Any]]], None], queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.aggregate = aggregate
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.collectors = {}  # {name: ScheduledCollector}
+        self.running = False
+        self.aggregator_thread = None
+
+        self.batches = 0
+        self.max_depth = 0
+        self.last_wait = None  # Seconds the oldest result of the last batch spent in the queue
+        self.last_aggregate = None  # Seconds the aggregate callback took
+
+    def add(self, name: str, fn: Callable[[], Any], interval: float) -> ScheduledCollector:
+        collector = ScheduledCollector(name, fn, interval)
+        self.collectors[name] = collector
+        if self.running:
+            self._start_collector(collector)
+        return collector
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.aggregator_thread = threading.Thread(target=self._aggregate_loop, name='collector-aggregator',
+                                                  daemon=True)
+        self.aggregator_thread.start()
+        for collector in self.collectors.values():
+            self._start_collector(collector)
+
+    def stop(self):
+        self.running = False
+        for collector in self.collectors.values():
+            collector.wake.set()
+        for collector in self.collectors.values():
+            if collector.thread:
+                collector.thread.join(timeout=1)
+        if self.aggregator_thread:
+            self.aggregator_thread.join(timeout=1)
+
+    def trigger(self, names: Optional[Iterable[str]] = None):
+        """Run collectors now instead of at their next interval (all of them by default)"""
+        for name in (names if names is not None else list(self.collectors)):
+            collector = self.collectors.get(name)
+            if collector:
+                collector.wake.set()
+
+    def _start_collector(self, collector: ScheduledCollector):
+        collector.thread = threading.Thread(target=self._collect_loop, args=(collector,),
+                                            name=f'collector-{collector.name}', daemon=True)
+        collector.thread.start()
+
+    def _collect_loop(self, collector: ScheduledCollector):
+        next_run = time.monotonic()
+        while self.running:
+            started = time.monotonic()
+            try:
+                result = collector.fn()
+                collector.last_error = None
+            except Exception as e:
+                result = None
+                collector.errors += 1
+                collector.last_error = str(e)
+            collector._record(time.monotonic() - started)
+
+            if collector.last_error is None:
+                try:
+                    self.queue.put((collector.name, result, time.monotonic()), timeout=collector.interval)
+                except queue.Full:
+                    collector.dropped += 1
+
+            # A run that overran its interval is not followed by a burst of catch-up runs
+            next_run = max(next_run + collector.interval, time.monotonic())
+            if collector.wake.wait(max(0, next_run - time.monotonic())):
+                # Triggered: run now and count the next interval from here
+                collector.wake.clear()
+                next_run = time.monotonic()
+
+    def _aggregate_loop(self):
+        while self.running:
+            try:
+                items = [self.queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            # Everything that queued up meanwhile goes into the same snapshot
+            self.max_depth = max(self.max_depth, self.queue.qsize() + 1)
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            now = time.monotonic()
+            self.last_wait = now - items[0][2]
+            try:
+                self.aggregate([(name, result) for name, result, _ in items])
+            except Exception as e:
+                print(f"Error aggregating collector results: {e}")
+            self.last_aggregate = time.monotonic() - now
+            self.batches += 1
+
+    def stats(self) -> Dict:
+        """Queue depth, aggregator timing and per-collector latency"""
+        return {
+            'queue': {
+                'depth': self.queue.qsize(),
+                'size': self.queue.maxsize,
+                'max_depth': self.max_depth,
+                'last_wait_ms': round(self.last_wait * 1000, 2) if self.last_wait is not None else None
+            },
+            'aggregator': {
+                'batches': self.batches,
+                'last_duration_ms': round(self.last_aggregate * 1000, 2) if self.last_aggregate is not None else None
+            },
+            'collectors': {name: collector.stats() for name, collector in self.collectors.items()}
+        }
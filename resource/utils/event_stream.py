@@ -0,0 +1,139 @@
+#!/usr/bin/env python3.12
+"""
+Server-sent events for the dashboard
+Each update is diffed against the previous one and the changes are pushed to every
+connected client as a JSON patch (RFC 6902), serialised once for all clients. New clients
+and clients that fall behind get the full state instead.
+"""
+
+import json
+import queue
+import threading
+from typing import Dict, List, Optional
+
+DEFAULT_MAX_CLIENTS = 64
+# Frames a client may have waiting before it is switched to a full snapshot
+MAX_PENDING = 8
+KEEPALIVE_INTERVAL = 15
+
+
+def _escape(key) -> str:
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def json_diff(old, new, path: str = '') -> List[Dict]:
+    """JSON patch operations that turn ``old`` into ``new``
+
+    Lists of equal length are diffed element by element, other list changes replace the list.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in new.items():
+            child = f'{path}/{_escape(key)}'
+            if key not in old:
+                ops.append({'op': 'add', 'path': child, 'value': value})
+            elif old[key] != value:
+                ops.extend(json_diff(old[key], value, child))
+        for key in old:
+            if key not in new:
+                ops.append({'op': 'remove', 'path': f'{path}/{_escape(key)}'})
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            if old_item != new_item:
+                ops.extend(json_diff(old_item, new_item, f'{path}/{index}'))
+        return ops
+    if old == new:
+        return []
+    return [{'op': 'replace', 'path': path, 'value': new}]
+
+
+class Subscriber:
+    """One connected client"""
+
+    def __init__(self):
+        self.frames = queue.Queue(maxsize=MAX_PENDING)
+        self.resyncs = 0
+
+    def next_frame(self, timeout: float = KEEPALIVE_INTERVAL) -> Optional[bytes]:
+        """Next frame to write, or None when there was nothing to send within the timeout"""
+        try:
+            return self.frames.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroadcaster:
+    """Publishes dashboard state and fans out the changes to subscribers"""
+
+    def __init__(self, max_clients: int = DEFAULT_MAX_CLIENTS):
+        self.max_clients = max_clients
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.state = {}
+        self.version = 0
+        self._snapshot_json = b'{}'
+        self._snapshot_frame = None
+
+    @staticmethod
+    def _frame(event: str, version: int, payload: bytes) -> bytes:
+        return b'event: %s\nid: %d\ndata: %s\n\n' % (event.encode('ascii'), version, payload)
+
+    def publish(self, data: Dict) -> int:
+        """Publish a new state; returns the number of changed fields"""
+        # One serialisation per update, shared by every client and by /api/data
+        encoded = json.dumps(data, default=str)
+        state = json.loads(encoded)
+        with self.lock:
+            ops = json_diff(self.state, state)
+            if not ops and self.version:
+                return 0
+            self.version += 1
+            self.state = state
+            self._snapshot_json = encoded.encode('utf-8')
+            self._snapshot_frame = None
+            patch = self._frame('patch', self.version, json.dumps(ops, separators=(',', ':')).encode('utf-8'))
+            for subscriber in self.subscribers:
+                try:
+                    subscriber.frames.put_nowait(patch)
+                except queue.Full:
+                    self._resync(subscriber)
+        return len(ops)
+
+    def _resync(self, subscriber: Subscriber):
+        # The client is too slow to apply patches: drop what it has queued and send the full state
+        while True:
+            try:
+                subscriber.frames.get_nowait()
+            except queue.Empty:
+                break
+        subscriber.resyncs += 1
+        subscriber.frames.put_nowait(self.snapshot_frame())
+
+    def snapshot_json(self) -> bytes:
+        """Latest published state as JSON"""
+        return self._snapshot_json
+
+    def snapshot_frame(self) -> bytes:
+        frame = self._snapshot_frame
+        if frame is None:
+            frame = self._snapshot_frame = self._frame('snapshot', self.version, self._snapshot_json)
+        return frame
+
+    def subscribe(self) -> Optional[Subscriber]:
+        """Register a client and queue the full state for it; None when the client limit is reached"""
+        with self.lock:
+            if len(self.subscribers) >= self.max_clients:
+                return None
+            subscriber = Subscriber()
+            subscriber.frames.put_nowait(self.snapshot_frame())
+            self.subscribers.add(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def client_count(self) -> int:
+        return len(self.subscribers)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3.12
+"""
+Concurrent HTTP serving and background jobs for the dashboard and resource server
+"""
+
+import itertools
+import threading
+import concurrent.futures
+from collections import OrderedDict
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_MAX_WORKERS = 32
+DEFAULT_JOB_WORKERS = 4
+JOB_HISTORY = 50
+
+
+class BoundedThreadingHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with a cap on the number of requests handled at once"""
+
+    daemon_threads = True
+
+    def __init__(self, server_address, handler_class, max_workers: int = DEFAULT_MAX_WORKERS):
+        self.max_workers = max_workers
+        self.worker_slots = threading.BoundedSemaphore(max_workers)
+        self._request_state = threading.local()
+        super().__init__(server_address, handler_class)
+
+    def process_request(self, request, client_address):
+        # When every worker is busy the accept loop waits here and new connections queue in the backlog
+        self.worker_slots.acquire()
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self.worker_slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        self._request_state.detached = False
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            if not self._request_state.detached:
+                self.worker_slots.release()
+
+    def detach_request(self):
+        """Give up the worker slot of the current request (for long-lived streams with their own limit)"""
+        if not self._request_state.detached:
+            self._request_state.detached = True
+            self.worker_slots.release()
+
+
+class JobManager:
+    """Runs long operations (network scans, server connections) off the request threads"""
+
+    def __init__(self, max_workers: int = DEFAULT_JOB_WORKERS, history: int = JOB_HISTORY):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.history = history
+        self.jobs = OrderedDict()  # {job_id: job}
+        self.futures = {}
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def submit(self, kind: str, fn: Callable, *args, single: bool = False, **kwargs) -> Dict:
+        """Start ``fn(job, *args, **kwargs)`` in the background and return the job
+
+        With single=True a job of the same kind that is still running is returned instead
+        of starting another one. ``fn`` receives the job so it can publish progress.
+        """
+        with self.lock:
+            if single:
+                for job in self.jobs.values():
+                    if job['kind'] == kind and job['status'] in ('queued', 'running'):
+                        return self._public(job)
+
+            job_id = f"{kind}-{next(self._ids)}"
+            job = {
+                'id': job_id,
+                'kind': kind,
+                'status': 'queued',
+                'submitted_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'progress': {},
+                'result': None,
+                'error': None
+            }
+            self.jobs[job_id] = job
+            self._trim()
+            self.futures[job_id] = self.executor.submit(self._run, job, fn, args, kwargs)
+            return self._public(job)
+
+    def _run(self, job: Dict, fn: Callable, args, kwargs):
+        job['status'] = 'running'
+        job['started_at'] = datetime.now().isoformat()
+        try:
+            job['result'] = fn(job, *args, **kwargs)
+            job['status'] = 'completed'
+        except Exception as e:
+            job['error'] = str(e)
+            job['status'] = 'failed'
+        finally:
+            job['finished_at'] = datetime.now().isoformat()
+        return job
+
+    def _trim(self):
+        # Keep the newest finished jobs; running ones are never dropped
+        finished = [job_id for job_id, job in self.jobs.items() if job['status'] in ('completed', 'failed')]
+        for job_id in finished[:max(0, len(self.jobs) - self.history)]:
+            del self.jobs[job_id]
+            self.futures.pop(job_id, None)
+
+    def _public(self, job: Dict) -> Dict:
+        return dict(job, progress=dict(job['progress']))
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Current state of a job, or None if it is unknown"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return self._public(job) if job else None
+
+    def list(self) -> List[Dict]:
+        """All known jobs without their results, newest first"""
+        with self.lock:
+            jobs = list(self.jobs.values())
+        return [{key: value for key, value in self._public(job).items() if key != 'result'}
+                for job in reversed(jobs)]
+
+    def wait(self, job: Dict, timeout: float = None) -> Dict:
+        """Block until a job returned by submit has finished (or the timeout expires) and return its state"""
+        # The future resolves to the job itself, so a job trimmed from the history meanwhile is still returned
+        with self.lock:
+            future = self.futures.get(job['id'])
+            job = self.jobs.get(job['id'], job)
+        if future:
+            try:
+                job = future.result(timeout=timeout)
+            except concurrent.futures.TimeoutError:
+                pass
+        with self.lock:
+            return self._public(job)
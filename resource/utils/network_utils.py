@@ -2,15 +2,34 @@
 """
 Network Utilities for Dynamic IP Detection
 Provides functions to detect local and remote IP addresses dynamically
+
+The local identity (hostname, IPs, interfaces, network ranges) is detected once and cached.
+It is detected again after IDENTITY_TTL seconds, or right after the kernel reports a link,
+address or route change over netlink, so lookups on the refresh paths cost no socket or
+subprocess work.
 """
 
+import time
 import socket
+import threading
 import subprocess
 import psutil
 import ipaddress
-from typing import List, Dict, Optional
+from typing import List, Dict, FrozenSet, Optional
 
-def get_local_ip() -> str:
+# Seconds a detected identity is used when no interface change is reported
+IDENTITY_TTL = 300
+
+# rtnetlink multicast groups: links, IPv4/IPv6 addresses and IPv4 routes (the default route decides get_local_ip)
+_RTMGRP_LINK = 0x1
+_RTMGRP_IPV4_IFADDR = 0x10
+_RTMGRP_IPV4_ROUTE = 0x40
+_RTMGRP_IPV6_IFADDR = 0x100
+_NETLINK_ROUTE = 0
+
+_LOOPBACK_NAMES = ('127.0.0.1', '::1', 'localhost')
+
+def _detect_local_ip() -> str:
     """Get the local IP address of the current server"""
     try:
         # Try to connect to a remote address to determine local IP
@@ -30,18 +49,18 @@ def get_local_ip() -> str:
             pass
         return "127.0.0.1"
 
-def get_hostname() -> str:
+def _detect_hostname() -> str:
     """Get the hostname of the current server"""
     try:
         return socket.gethostname()
     except Exception:
         return "unknown"
 
-def get_network_interfaces() -> List[Dict]:
+def _detect_interfaces(if_addrs: Dict) -> List[Dict]:
     """Get all network interfaces and their IP addresses"""
     interfaces = []
     try:
-        for interface, addrs in psutil.net_if_addrs().items():
+        for interface, addrs in if_addrs.items():
             interface_info = {
                 'name': interface,
                 'ips': [],
@@ -61,11 +80,11 @@ def get_network_interfaces() -> List[Dict]:
     
     return interfaces
 
-def get_network_ranges() -> List[str]:
+def _detect_network_ranges(interfaces: List[Dict]) -> List[str]:
     """Get network ranges based on local IP addresses"""
     ranges = []
     try:
-        for interface in get_network_interfaces():
+        for interface in interfaces:
             for ip in interface['ips']:
                 if not ip.startswith('127.'):  # Skip loopback
                     try:
@@ -84,6 +103,105 @@ def get_network_ranges() -> List[str]:
     
     return list(set(ranges))  # Remove duplicates
 
+class NetworkIdentity:
+    """Hostname, addresses and network ranges of this machine at one point in time"""
+    
+    __slots__ = ('hostname', 'local_ip', 'interfaces', 'network_ranges', 'local_addresses', 'detected_at')
+    
+    def __init__(self):
+        if_addrs = {}
+        try:
+            if_addrs = psutil.net_if_addrs()
+        except Exception as e:
+            print(f"Error getting network interfaces: {e}")
+        
+        self.hostname = _detect_hostname()
+        self.local_ip = _detect_local_ip()
+        self.interfaces = _detect_interfaces(if_addrs)
+        self.network_ranges = _detect_network_ranges(self.interfaces)
+        
+        # Every name is_local_server accepts: all interface addresses (IPv6 without the zone) and loopback
+        addresses = {self.local_ip, self.hostname, *_LOOPBACK_NAMES}
+        for addrs in if_addrs.values():
+            for addr in addrs:
+                if addr.family in (socket.AF_INET, socket.AF_INET6):
+                    addresses.add(addr.address.split('%')[0])
+        self.local_addresses = frozenset(addresses)
+        self.detected_at = time.time()
+
+class NetworkIdentityCache:
+    """The current NetworkIdentity, detected again after a TTL or an interface change"""
+    
+    def __init__(self, ttl: float = IDENTITY_TTL):
+        self.ttl = ttl
+        self.identity = None
+        self.expires = 0.0
+        self.lock = threading.Lock()
+        self.watcher = None
+    
+    def get(self) -> NetworkIdentity:
+        identity = self.identity
+        if identity is not None and time.monotonic() < self.expires:
+            return identity
+        with self.lock:
+            if self.identity is None or time.monotonic() >= self.expires:
+                self.identity = NetworkIdentity()
+                self.expires = time.monotonic() + self.ttl
+                if self.watcher is None:
+                    self.watcher = threading.Thread(target=self._watch_interfaces, name='netlink-watch', daemon=True)
+                    self.watcher.start()
+            return self.identity
+    
+    def invalidate(self):
+        """Detect the identity again on the next lookup"""
+        self.expires = 0.0
+    
+    def _watch_interfaces(self):
+        # Linux only; elsewhere (or without permission) the TTL alone keeps the identity fresh
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, _NETLINK_ROUTE)
+            sock.bind((0, _RTMGRP_LINK | _RTMGRP_IPV4_IFADDR | _RTMGRP_IPV4_ROUTE | _RTMGRP_IPV6_IFADDR))
+        except (AttributeError, OSError):
+            return
+        with sock:
+            while True:
+                try:
+                    sock.recv(65536)
+                except OSError:
+                    return
+                self.invalidate()
+
+_identity_cache = NetworkIdentityCache()
+
+def get_network_identity() -> NetworkIdentity:
+    """Cached identity of this machine"""
+    return _identity_cache.get()
+
+def refresh_network_identity() -> NetworkIdentity:
+    """Detect the identity now instead of waiting for the TTL or an interface change"""
+    _identity_cache.invalidate()
+    return _identity_cache.get()
+
+def get_local_ip() -> str:
+    """Get the local IP address of the current server"""
+    return _identity_cache.get().local_ip
+
+def get_local_ips() -> FrozenSet[str]:
+    """All addresses of this machine, including loopback and the hostname"""
+    return _identity_cache.get().local_addresses
+
+def get_hostname() -> str:
+    """Get the hostname of the current server"""
+    return _identity_cache.get().hostname
+
+def get_network_interfaces() -> List[Dict]:
+    """Get all network interfaces and their IP addresses"""
+    return [dict(interface, ips=list(interface['ips'])) for interface in _identity_cache.get().interfaces]
+
+def get_network_ranges() -> List[str]:
+    """Get network ranges based on local IP addresses"""
+    return list(_identity_cache.get().network_ranges)
+
 def discover_servers_in_network(network_range: str, timeout: int = 1) -> List[str]:
     """Discover servers in a specific network range"""
     discovered = []
@@ -122,9 +240,8 @@ def get_server_info() -> Dict:
     }
 
 def is_local_server(ip: str) -> bool:
-    """Check if an IP address belongs to the local server"""
-    local_ip = get_local_ip()
-    return ip == local_ip or ip == "127.0.0.1" or ip == "localhost"
+    """Check if an IP address belongs to the local server (any of its addresses, loopback or hostname)"""
+    return ip in _identity_cache.get().local_addresses
 
 def get_server_display_name(ip: str) -> str:
     """Get a display name for a server based on its IP"""
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3.12
+"""
+OpenMetrics text exposition
+Every label set gets its sample line prefix rendered once. A new value only re-renders
+that one line, and a family is only joined again when one of its lines changed, so a
+scrape of unchanged data returns the cached body.
+"""
+
+import math
+import threading
+from typing import Iterable, Tuple
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_value(value) -> str:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class MetricFamily:
+    """One metric family and the current sample of each of its label sets"""
+
+    def __init__(self, name: str, metric_type: str, help_text: str, label_names: Tuple[str, ...] = (),
+                 unit: str = ''):
+        self.name = name
+        self.label_names = label_names
+        # Counter samples carry the _total suffix, the family name does not
+        self.sample_name = f'{name}_total' if metric_type == 'counter' else name
+        header = f'# TYPE {name} {metric_type}\n'
+        if unit:
+            header += f'# UNIT {name} {unit}\n'
+        header += f'# HELP {name} {escape_label(help_text)}\n'
+        self.header = header.encode('utf-8')
+        self.series = {}  # {label values: [line prefix, value, rendered line]}
+        self.chunk = b''
+        self.dirty = False
+
+    def _prefix(self, labels: Tuple) -> bytes:
+        if not labels:
+            return f'{self.sample_name} '.encode('utf-8')
+        pairs = ','.join(f'{name}="{escape_label(value)}"' for name, value in zip(self.label_names, labels))
+        return f'{self.sample_name}{{{pairs}}} '.encode('utf-8')
+
+    def set(self, labels: Tuple, value):
+        """Set the sample of one label set (label values in the order of label_names)"""
+        entry = self.series.get(labels)
+        if entry is None:
+            entry = self.series[labels] = [self._prefix(labels), None, b'']
+        elif entry[1] == value:
+            return
+        entry[1] = value
+        entry[2] = entry[0] + format_value(value).encode('ascii') + b'\n'
+        self.dirty = True
+
+    def retain(self, keep: Iterable[Tuple]):
+        """Drop the label sets that are not in ``keep``"""
+        keep = set(keep)
+        for labels in [labels for labels in self.series if labels not in keep]:
+            del self.series[labels]
+            self.dirty = True
+
+    def render(self) -> bytes:
+        if self.dirty:
+            self.chunk = self.header + b''.join(entry[2] for entry in self.series.values()) if self.series else b''
+            self.dirty = False
+        return self.chunk
+
+
+class MetricsRegistry:
+    """Ordered set of metric families rendered as one exposition"""
+
+    def __init__(self):
+        self.families = {}  # {name: MetricFamily}, in registration order
+        self.body = b'# EOF\n'
+        # Updates from the collector threads and renders from the scrape handlers
+        self.lock = threading.RLock()
+
+    def family(self, name: str, metric_type: str, help_text: str, label_names: Tuple[str, ...] = (),
+               unit: str = '') -> MetricFamily:
+        with self.lock:
+            family = self.families.get(name)
+            if family is None:
+                family = self.families[name] = MetricFamily(name, metric_type, help_text, label_names, unit)
+            return family
+
+    def render(self) -> bytes:
+        """Exposition body; only families whose samples changed are rendered again"""
+        with self.lock:
+            if any(family.dirty for family in self.families.values()):
+                self.body = b''.join(family.render() for family in self.families.values()) + b'# EOF\n'
+            return self.body
@@ -7,14 +7,31 @@ Fast version for testing - only scans a few IPs
 import subprocess
 import os
 import json
-from typing import List, Dict
+import concurrent.futures
+from typing import List, Dict, Optional
 from datetime import datetime
 
+from core.scan_engine import ScanEngine, iter_prefix_hosts
+from utils.network_utils import get_local_ips
+
+# Login checks run a few ssh processes at a time once the sweep has found open ports
+SSH_CHECK_WORKERS = 8
+
+# Discovery is read-only: one ssh call prints hostname, OS, cores and memory without writing to the host.
+# The collector script is only installed once a server is connected (ServerDiscovery.connect_to_server)
+IDENTITY_PROBE = (
+    'hostname; '
+    '(grep PRETTY_NAME /etc/os-release 2>/dev/null | cut -d\\" -f2 | grep . || uname -sr); '
+    'nproc 2>/dev/null || echo Unknown; '
+    'free -h 2>/dev/null | awk \'/^Mem:/ {print $2}\' | grep . || echo Unknown'
+)
+
 class QuickNetworkScanner:
     def __init__(self):
         self.scan_results = []
     
-    def quick_scan(self, network_range: str, username: str = None, max_ips: int = 10, start_ip: int = 1) -> List[Dict]:
+    def quick_scan(self, network_range: str, username: str = None, max_ips: int = 10, start_ip: int = 1,
+                   on_result=None) -> List[Dict]:
         """
         Quick scan of network for SSH-accessible servers
         
@@ -23,6 +40,7 @@ class QuickNetworkScanner:
             username: SSH username (defaults to current user)
             max_ips: Maximum number of IPs to scan (default: 10)
             start_ip: Starting IP number (default: 1)
+            on_result: Optional callback receiving each responding host as the sweep finds it
         
         Returns:
             List of dictionaries with server information
@@ -36,121 +54,84 @@ class QuickNetworkScanner:
         
         discovered_servers = []
         
-        # Get current machine's IP to skip it
-        current_ips = []
-        try:
-            # Get all IP addresses of current machine
-            result = subprocess.run(['hostname', '-I'], capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                current_ips = result.stdout.strip().split()
-        except:
-            pass
-        
-        # Also add localhost variants
-        current_ips.extend(['127.0.0.1', 'localhost'])
+        # All addresses of the current machine (cached, includes localhost variants) to skip it
+        current_ips = get_local_ips()
         
         # Scan IPs from start_ip to start_ip + max_ips
-        for i in range(start_ip, min(start_ip + max_ips, 255)):
-            ip = f"{network_range}.{i}"
-            
+        targets = []
+        for ip in iter_prefix_hosts(network_range, start_ip, max_ips):
             # Skip if it's the current machine
             if ip in current_ips:
                 print(f"  Skipping {ip} (current machine)")
-                continue
-            
-            print(f"  Testing {ip}...", end=' ', flush=True)
-            
-            # First try ping to see if host is reachable
-            ping_success = False
-            try:
-                # Use a more reliable ping approach
-                ping_result = subprocess.run([
-                    'ping', '-c', '1', '-W', '2', ip
-                ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=5)
-                
-                if ping_result.returncode == 0:
-                    ping_success = True
-                    print("✅ Ping OK", end=' ')
-                else:
-                    print("❌ No ping", end=' ')
-            except:
-                print("❌ Ping failed", end=' ')
-            
-            # If ping failed, still try SSH (some servers might not respond to ping)
-            if not ping_success:
-                print("(trying SSH anyway)", end=' ')
+            else:
+                targets.append(ip)
+        
+        # Fast sweep: only hosts with the SSH port open go on to the login check
+        def report(result):
+            print(f"  {result['ip']}: {'SSH port open' if result['ssh_open'] else 'port 22 closed'} "
+                  f"({result['latency_ms']} ms)")
+            if on_result:
+                on_result(result)
+        
+        engine = ScanEngine()
+        ssh_hosts = [result['ip'] for result in engine.scan(targets, on_result=report) if result['ssh_open']]
+        
+        if ssh_hosts and not engine.cancelled:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=SSH_CHECK_WORKERS) as executor:
+                for server_info in executor.map(lambda ip: self._check_ssh_host(ip, username), ssh_hosts):
+                    if server_info:
+                        discovered_servers.append(server_info)
+        
+        print(f"\n✅ Quick scan completed! Found {len(discovered_servers)} SSH-accessible servers")
+        return discovered_servers
+    
+    def _check_ssh_host(self, ip: str, username: str) -> Optional[Dict]:
+        """Log in to a host with an open SSH port and collect its info; None if login fails"""
+        # Test SSH connection (non-interactive)
+        try:
+            # Try key-based authentication first
+            result = subprocess.run([
+                'ssh', '-o', 'ConnectTimeout=5',
+                '-o', 'BatchMode=yes',
+                '-o', 'StrictHostKeyChecking=no',
+                '-o', 'UserKnownHostsFile=/dev/null',
+                f'{username}@{ip}',
+                'echo OK'
+            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=10)
             
-            # Test SSH connection (non-interactive)
-            try:
-                # Try key-based authentication first
+            # If key-based auth fails, try without BatchMode (allows password prompt)
+            if result.returncode != 0:
                 result = subprocess.run([
                     'ssh', '-o', 'ConnectTimeout=5',
-                    '-o', 'BatchMode=yes',
                     '-o', 'StrictHostKeyChecking=no',
                     '-o', 'UserKnownHostsFile=/dev/null',
                     f'{username}@{ip}',
                     'echo OK'
                 ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=10)
+            
+            if result.returncode == 0:
+                print(f"  {ip}: ✅ SSH OK")
                 
-                # If key-based auth fails, try without BatchMode (allows password prompt)
-                if result.returncode != 0:
-                    result = subprocess.run([
-                        'ssh', '-o', 'ConnectTimeout=5',
-                        '-o', 'StrictHostKeyChecking=no',
-                        '-o', 'UserKnownHostsFile=/dev/null',
-                        f'{username}@{ip}',
-                        'echo OK'
-                    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=10)
+                # Get server information
+                return self._get_server_info(ip, username)
+            print(f"  {ip}: ❌ No SSH")
                 
-                if result.returncode == 0:
-                    print("✅ SSH OK")
-                    
-                    # Get server information
-                    server_info = self._get_server_info(ip, username)
-                    discovered_servers.append(server_info)
-                else:
-                    print("❌ No SSH")
-                    
-            except subprocess.TimeoutExpired:
-                print("⏰ SSH Timeout")
-            except Exception as e:
-                print(f"❌ SSH Error: {e}")
-        
-        print(f"\n✅ Quick scan completed! Found {len(discovered_servers)} SSH-accessible servers")
-        return discovered_servers
+        except subprocess.TimeoutExpired:
+            print(f"  {ip}: ⏰ SSH Timeout")
+        except Exception as e:
+            print(f"  {ip}: ❌ SSH Error: {e}")
+        return None
     
     def _get_server_info(self, ip: str, username: str) -> Dict:
         """Get basic server information"""
         try:
-            # Get hostname
-            hostname_result = subprocess.run([
-                'ssh', '-o', 'ConnectTimeout=3', f'{username}@{ip}', 'hostname'
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=5, universal_newlines=True)
-            
-            hostname = hostname_result.stdout.strip() if hostname_result.returncode == 0 else 'Unknown'
-            
-            # Get OS info
-            os_result = subprocess.run([
-                'ssh', '-o', 'ConnectTimeout=3', f'{username}@{ip}', 
-                'grep PRETTY_NAME /etc/os-release 2>/dev/null | cut -d\\" -f2 || echo "Unknown"'
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=5, universal_newlines=True)
-            
-            os_info = os_result.stdout.strip() if os_result.returncode == 0 else 'Unknown'
-            
-            # Get CPU cores
-            cpu_result = subprocess.run([
-                'ssh', '-o', 'ConnectTimeout=3', f'{username}@{ip}', 'nproc 2>/dev/null || echo "Unknown"'
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=5, universal_newlines=True)
-            
-            cpu_cores = cpu_result.stdout.strip() if cpu_result.returncode == 0 else 'Unknown'
-            
-            # Get memory info
-            mem_result = subprocess.run([
-                'ssh', '-o', 'ConnectTimeout=3', f'{username}@{ip}', 
-                'free -h 2>/dev/null | grep "^Mem:" | awk "{print \\$2}" || echo "Unknown"'
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=5, universal_newlines=True)
+            result = subprocess.run([
+                'ssh', '-o', 'ConnectTimeout=3', f'{username}@{ip}', IDENTITY_PROBE
+            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=10, universal_newlines=True)
             
-            memory = mem_result.stdout.strip() if mem_result.returncode == 0 else 'Unknown'
+            lines = result.stdout.splitlines() if result.returncode == 0 else []
+            lines += ['Unknown'] * (4 - len(lines))
+            hostname, os_info, cpu_cores, memory = (line.strip() or 'Unknown' for line in lines[:4])
             
             return {
                 'ip': ip,
@@ -184,8 +165,8 @@ if __name__ == "__main__":
     import sys
     
     if len(sys.argv) < 2:
-        print("Usage: python3 quick_network_scanner.py <network_range> [username] [max_ips]")
-        print("Example: python3 quick_network_scanner.py 172.16.16 root 5")
+        print("Usage: python3 -m utils.quick_network_scanner <network_range> [username] [max_ips]")
+        print("Example: python3 -m utils.quick_network_scanner 172.16.16 root 5")
         sys.exit(1)
     
     network = sys.argv[1]
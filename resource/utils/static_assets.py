@@ -0,0 +1,114 @@
+#!/usr/bin/env python3.12
+"""
+Prebuilt static assets for the web dashboard
+Assets are encoded and compressed once, then served with an ETag, Cache-Control and
+304 responses for revalidation.
+"""
+
+import gzip
+import hashlib
+from typing import Dict, Optional
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+# Versioned URLs (?v=<hash>) change whenever the content does, so browsers may keep them forever
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+# Compressing tiny responses costs more than it saves
+MIN_COMPRESS_SIZE = 512
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Quality value per content coding of an Accept-Encoding header (q=0 means not acceptable)"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        coding, *params = [item.strip() for item in part.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.lower()] = quality
+    return accepted
+
+
+class StaticAsset:
+    """One asset with its compressed variants"""
+
+    def __init__(self, content: str, content_type: str):
+        self.content_type = content_type
+        self.hash = hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]
+        self.bodies = {'identity': content.encode('utf-8')}
+        if len(self.bodies['identity']) >= MIN_COMPRESS_SIZE:
+            # mtime=0 keeps the gzip bytes identical between restarts
+            self.bodies['gzip'] = gzip.compress(self.bodies['identity'], compresslevel=9, mtime=0)
+            if HAS_BROTLI:
+                self.bodies['br'] = brotli.compress(self.bodies['identity'])
+        self.etags = {encoding: f'"{self.hash}"' if encoding == 'identity' else f'"{self.hash}-{encoding}"'
+                      for encoding in self.bodies}
+
+    def choose_encoding(self, accept_encoding: Optional[str]) -> str:
+        """Variant with the highest client quality (brotli wins a tie with gzip), identity if none"""
+        accepted = accepted_encodings(accept_encoding)
+        wildcard = accepted.get('*', 0.0)
+        candidates = [(accepted.get(encoding, wildcard), -rank, encoding)
+                      for rank, encoding in enumerate(('br', 'gzip')) if encoding in self.bodies]
+        if candidates:
+            quality, _, encoding = max(candidates)
+            if quality > 0:
+                return encoding
+        return 'identity'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True when the client already has this version (any encoding)"""
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or any(etag in tags for etag in self.etags.values())
+
+
+def send_asset(handler, asset: StaticAsset, cache_control: str = REVALIDATE_CACHE):
+    """Write an asset response (or 304) through a BaseHTTPRequestHandler"""
+    encoding = asset.choose_encoding(handler.headers.get('Accept-Encoding'))
+    if asset.matches(handler.headers.get('If-None-Match')):
+        handler.send_response(304)
+        handler.send_header('ETag', asset.etags[encoding])
+        handler.send_header('Cache-Control', cache_control)
+        handler.send_header('Vary', 'Accept-Encoding')
+        handler.end_headers()
+        return
+
+    body = asset.bodies[encoding]
+    handler.send_response(200)
+    handler.send_header('Content-type', asset.content_type)
+    handler.send_header('Content-Length', str(len(body)))
+    if encoding != 'identity':
+        handler.send_header('Content-Encoding', encoding)
+    handler.send_header('ETag', asset.etags[encoding])
+    handler.send_header('Cache-Control', cache_control)
+    handler.send_header('Vary', 'Accept-Encoding')
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def build_assets(files: Dict[str, tuple], page: str) -> Dict[str, StaticAsset]:
+    """Build assets from {name: (content, content_type)} plus the page that links them
+
+    References to ``/static/<name>`` in the page get a ``?v=<hash>`` suffix, so a changed
+    file is fetched again even though the old one is cached as immutable.
+    """
+    assets = {name: StaticAsset(content, content_type) for name, (content, content_type) in files.items()}
+    for name, asset in assets.items():
+        page = page.replace(f'/static/{name}"', f'/static/{name}?v={asset.hash}"')
+    assets[''] = StaticAsset(page, 'text/html; charset=utf-8')
+    return assets
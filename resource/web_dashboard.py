@@ -11,7 +11,7 @@ import json
 import threading
 import webbrowser
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import BaseHTTPRequestHandler
 import urllib.parse
 import psutil
 import subprocess
@@ -19,6 +19,15 @@ import subprocess
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from utils.http_server import BoundedThreadingHTTPServer, JobManager
+from utils.event_stream import EventBroadcaster, KEEPALIVE_INTERVAL
+from utils.static_assets import build_assets, send_asset, IMMUTABLE_CACHE, REVALIDATE_CACHE
+from utils.collector_pipeline import CollectorPipeline
+from utils.network_utils import get_local_ip, get_hostname, is_local_server
+from core.process_sampler import ProcessSampler
+from core.alert_manager import AlertEngine
+from core.sampling_scheduler import AdaptiveScheduler, thresholds_from_rules
+
 try:
     from scripts.real_time_charts import RealTimeCharts
     from scripts.chart_generator import ChartGenerator
@@ -32,6 +41,16 @@ except ImportError:
 class DashboardData:
     """Manages dashboard data and updates"""
     
+    # Seconds between runs of each collector; fast local metrics never wait for the slow ones
+    COLLECTOR_INTERVALS = {
+        'local': 1,
+        'processes': 2,
+        'disk_info': 10,
+        'system_info': 10,
+        # Only checks which connected servers are due; each has its own adaptive interval
+        'servers': 1
+    }
+    
     def __init__(self):
         try:
             self.charts = RealTimeCharts()
@@ -64,34 +83,66 @@ class DashboardData:
             print(f"Warning: Could not initialize quick network scanner: {e}")
             self.network_scanner = None
         
+        # Scans and server connections run here instead of on the request threads
+        self.jobs = JobManager()
+        
+        # Metric history (ring buffers on disk) for the charts
+        try:
+            from core.metrics_store import MetricsStore
+            self.metrics = MetricsStore()
+        except Exception as e:
+            print(f"Warning: Could not initialize metrics store: {e}")
+            self.metrics = None
+        
+        # Pushes changes of self.data to /api/stream clients
+        self.events = EventBroadcaster()
+        
+        # Keeps process handles between updates for real CPU deltas
+        self.process_sampler = ProcessSampler()
+        
+        # Windowed alert rules for every monitored server
+        self.alert_engine = AlertEngine()
+        
+        # Per-server polling intervals: fast for viewed or alerting servers, backing off for idle ones
+        self.sampling = AdaptiveScheduler(thresholds=thresholds_from_rules(self.alert_engine.rules))
+        
         self.data = {}
-        self.update_interval = 5  # seconds
+        self.update_interval = self.sampling.base_interval  # seconds
         self.running = False
-        self.update_thread = None
         self.current_server = None  # Track current server selection
         
+        # Latest entries of the server list, from the local and the servers collector
+        self.local_server = None
+        self.remote_servers = {}
+        
+        # Every collector runs on its own schedule; one aggregator builds self.data from their results
+        self.pipeline = CollectorPipeline(self._aggregate)
+        self.pipeline.add('local', self._collect_local, self.COLLECTOR_INTERVALS['local'])
+        self.pipeline.add('processes', self._get_top_processes, self.COLLECTOR_INTERVALS['processes'])
+        self.pipeline.add('disk_info', self._get_disk_info, self.COLLECTOR_INTERVALS['disk_info'])
+        self.pipeline.add('system_info', self._get_system_info, self.COLLECTOR_INTERVALS['system_info'])
+        self.pipeline.add('servers', self._get_connected_servers_info, self.COLLECTOR_INTERVALS['servers'])
+        
     def start_monitoring(self):
         """Start continuous monitoring"""
         # Initialize current server to local IP
         try:
-            from utils.network_utils import get_local_ip
             self.current_server = get_local_ip()
         except:
             self.current_server = '127.0.0.1'
         
         self.running = True
-        self.update_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        self.update_thread.start()
+        self.pipeline.start()
         
     def stop_monitoring(self):
         """Stop monitoring"""
         self.running = False
-        if self.update_thread:
-            self.update_thread.join(timeout=1)
+        self.pipeline.stop()
+        if self.metrics:
+            self.metrics.flush()
     
     def set_current_server(self, server_ip):
         """Set the current server and refresh data"""
-        from utils.network_utils import get_local_ip
         local_ip = get_local_ip()
         
         if server_ip == 'LOCAL_IP' or server_ip == local_ip:
@@ -107,27 +158,62 @@ class DashboardData:
                 self.current_server = local_ip
         
         # Refresh data for the new server
+        self.watch()
         self.update_data()
         print(f"✅ Switched to server: {self.current_server}")
     
-    def _monitor_loop(self):
-        """Main monitoring loop"""
-        while self.running:
-            self.update_data()
-            time.sleep(self.update_interval)
+    def watch(self, hosts=()):
+        """A dashboard session is showing the current server (and ``hosts``): sample them fast"""
+        if not self.server_discovery:
+            return
+        connected = self.server_discovery.connected_servers
+        focused = [host for host in (self.current_server, *hosts) if host in connected]
+        for host in focused:
+            self.sampling.focus(host)
+        if self.sampling.due(focused):
+            self.pipeline.trigger(['servers'])
     
     def update_data(self):
-        """Update all dashboard data"""
+        """Refresh the panels that depend on the selected server now instead of at their next interval"""
+        self.pipeline.trigger(['local', 'processes', 'disk_info', 'system_info'])
+    
+    def _aggregate(self, results):
+        """Build the next dashboard snapshot from collector results (runs on the aggregator thread)"""
         try:
-            # System information
-            self.data['timestamp'] = datetime.now().isoformat()
-            self.data['system_info'] = self._get_system_info()
-            self.data['resource_usage'] = self._get_resource_usage()
-            self.data['processes'] = self._get_top_processes()
-            self.data['network_info'] = self._get_network_info()
-            self.data['disk_info'] = self._get_disk_info()
-            self.data['alerts'] = self._get_alerts()
-            self.data['multi_server'] = self._get_multi_server_info()
+            data = dict(self.data)
+            servers_changed = False
+            for name, result in results:
+                if name == 'local':
+                    data['resource_usage'] = result['resource_usage']
+                    data['network_info'] = result['network_info']
+                    self.local_server = result['local_server']
+                    self._record_metrics({self.local_server['ip']: self.local_server})
+                    servers_changed = True
+                elif name == 'servers':
+                    self.remote_servers = result['servers']
+                    # Servers that were not due keep their last entry, recording it again would flatten the history
+                    self._record_metrics({ip: result['servers'][ip] for ip in result['polled']
+                                          if ip in result['servers']})
+                    servers_changed = True
+                else:
+                    data[name] = result
+            
+            if servers_changed:
+                multi_server = {self.local_server['ip']: self.local_server} if self.local_server else {}
+                multi_server.update(self.remote_servers)
+                data['multi_server'] = multi_server
+                self.alert_engine.retain_hosts(multi_server)
+            data['alerts'] = self._get_alerts()
+            data['timestamp'] = datetime.now().isoformat()
+            
+            # Alerting servers are sampled fast until the alert has cleared
+            for alert in data['alerts']:
+                if alert.get('host') in self.remote_servers:
+                    self.sampling.promote(alert['host'])
+            
+            # Replaced as a whole, so readers never see a half built snapshot
+            self.data = data
+            self.events.publish(data)
             
             # Update charts data
             if self.charts:
@@ -139,6 +225,33 @@ class DashboardData:
         except Exception as e:
             print(f"Error updating data: {e}")
     
+    def _collect_local(self):
+        """Fast local metrics: usage, network counters and the local server list entry"""
+        # One CPU reading (usage since the previous run) shared by the usage panel and the server list
+        cpu_percent = psutil.cpu_percent(interval=None)
+        return {
+            'resource_usage': self._get_resource_usage(cpu_percent),
+            'network_info': self._get_network_info(),
+            'local_server': self._get_local_server_info(cpu_percent)
+        }
+    
+    def _record_metrics(self, multi_server):
+        """Add the latest values of the given servers to the metric history and the alert windows"""
+        now = time.time()
+        for ip, server in multi_server.items():
+            # Stale entries repeat the previous poll, recording them would flatten the history
+            if server.get('status') != 'Online' or server.get('stale'):
+                continue
+            values = {
+                'cpu': server.get('cpu_percent'),
+                'memory': server.get('memory_percent'),
+                'disk': server.get('disk_percent'),
+                'load': server.get('load_avg')
+            }
+            if self.metrics:
+                self.metrics.record(ip, values, now)
+            self.alert_engine.observe(ip, values, now)
+    
     def _get_system_info(self):
         """Get basic system information"""
         try:
@@ -147,7 +260,6 @@ class DashboardData:
             
             # Check if we're monitoring a remote server
             if self.current_server and self.current_server != '127.0.0.1':
-                from utils.network_utils import get_local_ip
                 local_ip = get_local_ip()
                 if self.current_server != local_ip:
                     # Get remote server info
@@ -221,12 +333,11 @@ class DashboardData:
                 'load_avg': [0, 0, 0]
             }
     
-    def _get_resource_usage(self):
-        """Get current resource usage"""
+    def _get_resource_usage(self, cpu_percent=None):
+        """Get current resource usage (cpu_percent: local CPU usage when already measured)"""
         try:
             # Check if we're monitoring a remote server
             if self.current_server and self.current_server != '127.0.0.1':
-                from utils.network_utils import get_local_ip
                 local_ip = get_local_ip()
                 if self.current_server != local_ip:
                     # Get remote server resource usage
@@ -250,7 +361,8 @@ class DashboardData:
                         print(f"⚠️  Remote server {self.current_server} not connected, using local info")
             
             # Get resource usage for local server
-            cpu_percent = psutil.cpu_percent(interval=0.1)  # Reduced interval for faster response
+            if cpu_percent is None:
+                cpu_percent = psutil.cpu_percent(interval=0.1)  # Reduced interval for faster response
             
             # Get memory information
             memory = psutil.virtual_memory()
@@ -287,7 +399,6 @@ class DashboardData:
         try:
             # Check if we have a remote server selected
             if hasattr(self, 'current_server') and self.current_server:
-                from utils.network_utils import is_local_server
                 if not is_local_server(self.current_server) and self.server_discovery:
                     # Get remote server processes
                     if self.current_server in self.server_discovery.connected_servers:
@@ -295,24 +406,8 @@ class DashboardData:
                         if 'info' in server_info and 'processes' in server_info['info']:
                             return server_info['info']['processes']
             
-            # Local server or fallback - use psutil
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'status']):
-                try:
-                    proc_info = proc.info
-                    # Ensure all required fields are present
-                    proc_info['cpu_percent'] = proc_info.get('cpu_percent', 0)
-                    proc_info['memory_percent'] = proc_info.get('memory_percent', 0)
-                    proc_info['name'] = proc_info.get('name', 'Unknown')
-                    proc_info['pid'] = proc_info.get('pid', 0)
-                    proc_info['status'] = proc_info.get('status', 'Unknown')
-                    processes.append(proc_info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-            
-            # Sort by CPU usage and get top 10
-            processes.sort(key=lambda x: x['cpu_percent'], reverse=True)
-            return processes[:10]
+            # Local server or fallback - CPU usage since the previous update
+            return self.process_sampler.sample(10)
         except Exception as e:
             print(f"Error getting processes: {e}")
             return []
@@ -345,7 +440,6 @@ class DashboardData:
         try:
             # Check if we have a remote server selected
             if hasattr(self, 'current_server') and self.current_server:
-                from utils.network_utils import is_local_server
                 if not is_local_server(self.current_server) and self.server_discovery:
                     # Get remote server disk info
                     if self.current_server in self.server_discovery.connected_servers:
@@ -414,81 +508,61 @@ class DashboardData:
             }
     
     def _get_alerts(self):
-        """Get system alerts"""
-        alerts = []
+        """Get system alerts (firing rules of all monitored servers)"""
         try:
-            # CPU alert
-            if self.data.get('resource_usage', {}).get('cpu_percent', 0) > 80:
-                alerts.append({
-                    'type': 'warning',
-                    'message': f"High CPU usage: {self.data['resource_usage']['cpu_percent']:.1f}%",
-                    'timestamp': datetime.now().isoformat()
-                })
-            
-            # Memory alert
-            if self.data.get('resource_usage', {}).get('memory_percent', 0) > 80:
-                alerts.append({
-                    'type': 'warning',
-                    'message': f"High memory usage: {self.data['resource_usage']['memory_percent']:.1f}%",
-                    'timestamp': datetime.now().isoformat()
-                })
-            
-            # Disk alert
-            if self.data.get('disk_info', {}).get('root_usage', {}).get('percent', 0) > 80:
-                alerts.append({
-                    'type': 'warning',
-                    'message': f"High disk usage: {self.data['disk_info']['root_usage']['percent']:.1f}%",
-                    'timestamp': datetime.now().isoformat()
-                })
-                
+            return self.alert_engine.active_alerts()
         except Exception as e:
-            alerts.append({
+            return [{
                 'type': 'error',
                 'message': f"Error checking alerts: {e}",
                 'timestamp': datetime.now().isoformat()
-            })
-        
-        return alerts
+            }]
     
-    def _get_multi_server_info(self):
-        """Get multi-server information"""
-        server_status = {}
-        
-        # Local server (always available)
+    def _get_local_server_info(self, cpu_percent=None):
+        """Server list entry of the local server (always available)"""
+        local_ip = get_local_ip()
+        hostname = get_hostname()
         try:
-            import psutil
-            from utils.network_utils import get_local_ip, get_hostname
-            
-            local_ip = get_local_ip()
-            hostname = get_hostname()
-            
-            server_status[local_ip] = {
+            return {
                 'name': f'Local Server ({hostname})',
                 'ip': local_ip,
                 'status': 'Online',
-                'cpu_percent': psutil.cpu_percent(interval=0.1),
+                'cpu_percent': cpu_percent if cpu_percent is not None else psutil.cpu_percent(interval=0.1),
                 'memory_percent': psutil.virtual_memory().percent,
                 'disk_percent': psutil.disk_usage('/').percent,
                 'load_avg': psutil.getloadavg()[0] if hasattr(psutil, 'getloadavg') else 0.0
             }
         except Exception as e:
-            from utils.network_utils import get_local_ip, get_hostname
-            local_ip = get_local_ip()
-            hostname = get_hostname()
-            
-            server_status[local_ip] = {
+            return {
                 'name': f'Local Server ({hostname})',
                 'ip': local_ip,
                 'status': 'Error',
                 'error': str(e)
             }
+    
+    def _get_connected_servers_info(self):
+        """Server list entries of the connected servers
+        
+        Only the servers that the adaptive scheduler says are due get polled (which may take up
+        to the poll deadline); the others keep their last entry. Returns the whole list and the
+        servers polled this time.
+        """
+        server_status = {}
+        polled = []
         
         # Connected servers from server discovery
         if self.server_discovery:
+            connected = self.server_discovery.connected_servers
+            self.sampling.retain(connected)
+            due = self.sampling.due(list(connected))
             try:
-                connected_servers = self.server_discovery.get_connected_servers_info()
+                if due:
+                    connected_servers = self.server_discovery.update_connected_servers(hosts=due, containers=False)
+                    polled = due
+                else:
+                    connected_servers = self.server_discovery.servers_snapshot
                 for ip, server_info in connected_servers.items():
-                    if server_info.get('ssh_connected'):
+                    if server_info.get('ssh_connected') and ip in connected:
                         # Format the data to match the expected structure
                         system_info = server_info.get('system_info', {})
                         server_status[ip] = {
@@ -498,9 +572,19 @@ class DashboardData:
                             'cpu_percent': system_info.get('cpu_percent', 0),
                             'memory_percent': system_info.get('memory_percent', 0),
                             'disk_percent': system_info.get('disk_percent', 0),
-                            'load_avg': system_info.get('load_avg', 0)
+                            'load_avg': system_info.get('load_avg', 0),
+                            'stale': server_info.get('stale', False)  # Missed the last poll deadline
+                        }
+                        if ip in due:
+                            print(f"✅ Added connected server {ip} with CPU: {system_info.get('cpu_percent', 0)}%, Memory: {system_info.get('memory_percent', 0)}%")
+                    elif server_info.get('status') in ('Error', 'Timeout') and ip in connected:
+                        # Failed poll: listed as such, never with zeroed metrics
+                        server_status[ip] = {
+                            'name': server_info.get('name', ip),
+                            'ip': ip,
+                            'status': server_info['status'],
+                            'error': server_info.get('error')
                         }
-                        print(f"✅ Added connected server {ip} with CPU: {system_info.get('cpu_percent', 0)}%, Memory: {system_info.get('memory_percent', 0)}%")
             except Exception as e:
                 print(f"Error getting connected servers info: {e}")
                 # Also try to get data directly from connected_servers
@@ -520,8 +604,22 @@ class DashboardData:
                             print(f"✅ Added connected server {ip} from direct info")
                 except Exception as e2:
                     print(f"Error getting direct connected servers info: {e2}")
+                polled = []
+            
+            # The next poll of each server depends on what this one returned (a failed poll backs off)
+            for ip in due:
+                server = server_status.get(ip) if ip in polled else None
+                # Error, timeout and stale entries carry no new values
+                sampled = (server and server.get('status') == 'Online' and not server.get('stale')
+                           and 'error' not in server)
+                self.sampling.record(ip, {
+                    'cpu': server.get('cpu_percent'),
+                    'memory': server.get('memory_percent'),
+                    'disk': server.get('disk_percent'),
+                    'load': server.get('load_avg')
+                } if sampled else None)
         
-        return server_status
+        return {'servers': server_status, 'polled': polled}
     
     def _get_remote_server_details(self, ip):
         """Get detailed remote server information via SSH"""
@@ -615,10 +713,27 @@ class DashboardData:
 class DashboardHandler(BaseHTTPRequestHandler):
     """HTTP request handler for the dashboard"""
     
+    # Page, CSS and JavaScript, built once for all requests (see load_assets)
+    _assets = None
+    _assets_lock = threading.Lock()
+    
     def __init__(self, *args, dashboard_data=None, **kwargs):
         self.dashboard_data = dashboard_data
         super().__init__(*args, **kwargs)
     
+    @classmethod
+    def load_assets(cls):
+        """Build the page and its static files with their compressed variants (once)"""
+        with cls._assets_lock:
+            if DashboardHandler._assets is None:
+                # The generators return constant strings, so they can run without a request
+                generator = cls.__new__(cls)
+                DashboardHandler._assets = build_assets({
+                    'style.css': (generator._get_css(), 'text/css; charset=utf-8'),
+                    'script.js': (generator._get_javascript(), 'application/javascript; charset=utf-8')
+                }, generator._get_dashboard_html())
+        return DashboardHandler._assets
+    
     def do_GET(self):
         """Handle GET requests"""
         parsed_path = urllib.parse.urlparse(self.path)
@@ -628,12 +743,20 @@ class DashboardHandler(BaseHTTPRequestHandler):
             self.send_dashboard_page()
         elif path == '/api/data':
             self.send_json_data()
+        elif path == '/api/stream':
+            self.send_event_stream()
         elif path == '/api/charts':
             self.send_chart_data()
         elif path == '/api/server-status':
             self.send_server_status()
         elif path == '/api/local-ip':
             self.send_local_ip()
+        elif path == '/api/jobs':
+            self.send_jobs()
+        elif path.startswith('/api/jobs/'):
+            self.send_jobs(path[len('/api/jobs/'):])
+        elif path == '/api/collectors':
+            self.send_collector_stats()
         elif path.startswith('/static/'):
             self.send_static_file(path[8:])  # Remove '/static/' prefix
         else:
@@ -672,27 +795,97 @@ class DashboardHandler(BaseHTTPRequestHandler):
     
     def send_dashboard_page(self):
         """Send the main dashboard HTML page"""
-        html = self._get_dashboard_html()
-        
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+        send_asset(self, self.load_assets()[''])
+    
+    def _focus_hosts(self):
+        """Servers listed in the "focus" query parameter (comma separated), sampled fast for this session"""
+        params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        return [host for host in params.get('focus', [''])[0].split(',') if host]
     
     def send_json_data(self):
         """Send JSON data for AJAX requests"""
+        if self.dashboard_data:
+            # Polling clients keep the servers they show on fast sampling
+            self.dashboard_data.watch(self._focus_hosts())
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
         
-        data = self.dashboard_data.data if self.dashboard_data else {}
-        self.wfile.write(json.dumps(data, default=str).encode('utf-8'))
+        if self.dashboard_data and self.dashboard_data.events.version:
+            # Already serialised when it was published
+            self.wfile.write(self.dashboard_data.events.snapshot_json())
+        else:
+            data = self.dashboard_data.data if self.dashboard_data else {}
+            self.wfile.write(json.dumps(data, default=str).encode('utf-8'))
+    
+    def send_event_stream(self):
+        """Stream dashboard updates as server-sent events
+        
+        The first event ("snapshot") carries the full data, later ones ("patch") carry JSON patch
+        operations for the fields that changed. A client that cannot keep up gets a new snapshot.
+        """
+        if not self.dashboard_data:
+            self.send_error(503, "Dashboard data not available")
+            return
+        events = self.dashboard_data.events
+        subscriber = events.subscribe()
+        if not subscriber:
+            # Clients fall back to polling /api/data
+            self.send_error(503, "Too many stream clients")
+            return
+        
+        # Streams are limited by the broadcaster, so they do not hold one of the request workers
+        self.server.detach_request()
+        try:
+            self.send_response(200)
+            self.send_header('Content-type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            # A client that stops reading fails the write instead of blocking this thread forever
+            self.connection.settimeout(KEEPALIVE_INTERVAL * 2)
+            focus = self._focus_hosts()
+            
+            while True:
+                # Renewed at least every keepalive, so the servers this client shows stay on fast sampling
+                self.dashboard_data.watch(focus)
+                frame = subscriber.next_frame()
+                self.wfile.write(frame if frame is not None else b': keepalive\n\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, TimeoutError, OSError):
+            pass  # Client went away
+        finally:
+            events.unsubscribe(subscriber)
     
     def send_chart_data(self):
-        """Send chart data"""
+        """Send chart data
+        
+        Query parameters: host (default: current server), range in seconds (default 300)
+        and series (default cpu,memory). Long ranges come back as min/max/avg rollups.
+        """
         try:
-            if self.dashboard_data and self.dashboard_data.charts:
+            if self.dashboard_data and self.dashboard_data.metrics:
+                params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                host = params.get('host', [None])[0] or self.dashboard_data.current_server or '127.0.0.1'
+                if host == 'LOCAL_IP' or is_local_server(host):
+                    host = get_local_ip()
+                self.dashboard_data.watch([host])
+                seconds = float(params.get('range', ['300'])[0])
+                names = params.get('series', ['cpu,memory'])[0].split(',')
+                
+                end = time.time()
+                series = {name: self.dashboard_data.metrics.query(host, name, end - seconds, end) for name in names}
+                first = series[names[0]]
+                chart_data = {
+                    'host': host,
+                    'resolution': first['resolution'],
+                    'cpu_data': series['cpu']['avg'] if 'cpu' in series else [],
+                    'memory_data': series['memory']['avg'] if 'memory' in series else [],
+                    'timestamps': [datetime.fromtimestamp(ts).isoformat() for ts in first['timestamps']],
+                    'series': series
+                }
+            elif self.dashboard_data and self.dashboard_data.charts:
                 # Create a simple chart data
                 chart_data = {
                     'cpu_data': list(self.dashboard_data.charts.cpu_data),
@@ -720,20 +913,15 @@ class DashboardHandler(BaseHTTPRequestHandler):
     def send_static_file(self, filename):
         """Send static files (CSS, JS, images)"""
         try:
-            if filename == 'style.css':
-                content = self._get_css()
-                content_type = 'text/css'
-            elif filename == 'script.js':
-                content = self._get_javascript()
-                content_type = 'application/javascript'
-            else:
+            asset = self.load_assets().get(filename) if filename else None
+            if not asset:
                 self.send_error(404, "File not found")
                 return
             
-            self.send_response(200)
-            self.send_header('Content-type', content_type)
-            self.end_headers()
-            self.wfile.write(content.encode('utf-8'))
+            # The page links versioned URLs; those never change and can be cached for good
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+            versioned = query.get('v', [None])[0] == asset.hash
+            send_asset(self, asset, IMMUTABLE_CACHE if versioned else REVALIDATE_CACHE)
             
         except Exception as e:
             self.send_error(500, str(e))
@@ -770,8 +958,6 @@ class DashboardHandler(BaseHTTPRequestHandler):
     def send_local_ip(self):
         """Send local IP address"""
         try:
-            from utils.network_utils import get_local_ip, get_hostname
-            
             response = {
                 'success': True,
                 'local_ip': get_local_ip(),
@@ -788,7 +974,11 @@ class DashboardHandler(BaseHTTPRequestHandler):
             self.send_error(500, str(e))
     
     def handle_scan_network(self):
-        """Handle network scanning request"""
+        """Handle network scanning request
+        
+        The scan runs as a background job. With "background": true the job is returned
+        right away (poll /api/jobs/<id>); otherwise the request waits for the result.
+        """
         try:
             # Parse request body
             content_length = int(self.headers.get('Content-Length', 0))
@@ -799,71 +989,162 @@ class DashboardHandler(BaseHTTPRequestHandler):
                 username = request_data.get('username', 'root')
                 max_ips = request_data.get('max_ips', 50)
                 start_ip = request_data.get('start_ip', 1)
+                background = request_data.get('background', False)
             else:
                 network_range = '172.16.16'
                 username = 'root'
                 max_ips = 50
                 start_ip = 1
+                background = False
             
-            # Use the network scanner from dashboard data
-            if self.dashboard_data and self.dashboard_data.network_scanner:
-                # Perform the scan synchronously to get immediate results
+            if not self.dashboard_data:
+                response = {
+                    'success': False,
+                    'error': 'Network scanner not available',
+                    'discovered_count': 0,
+                    'discovered_servers': {}
+                }
+                self.send_response(200)
+                self.send_header('Content-type', 'application/json')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                self.wfile.write(json.dumps(response).encode('utf-8'))
+                return
+            
+            # Only one scan at a time; a second request joins the running one
+            job = self.dashboard_data.jobs.submit('scan', self._run_scan, network_range, username, max_ips, start_ip,
+                                                  single=True)
+            self.send_job_response(job, background)
+            
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def _run_scan(self, job, network_range, username, max_ips, start_ip):
+        """Network scan job; hosts with an open SSH port are published in the job progress as found"""
+        job['progress']['ssh_ports_open'] = []
+        
+        def on_result(result):
+            if result['ssh_open']:
+                job['progress']['ssh_ports_open'].append(result['ip'])
+        
+        def on_server_found(ip, entry):
+            if entry['ssh_open']:
+                job['progress']['ssh_ports_open'].append(ip)
+        
+        # Use the network scanner from dashboard data
+        if self.dashboard_data and self.dashboard_data.network_scanner:
+            try:
+                discovered = self.dashboard_data.network_scanner.quick_scan(network_range, username, max_ips=max_ips,
+                                                                            start_ip=start_ip, on_result=on_result)
+                print(f"Network scan completed. Found {len(discovered)} SSH-accessible servers.")
+                
+                # Update server discovery with results
+                if self.dashboard_data and self.dashboard_data.server_discovery:
+                    for server in discovered:
+                        self.dashboard_data.server_discovery.add_discovered_server(server['ip'], {
+                            'status': 'discovered',
+                            'ssh_connected': False,
+                            'info': server,
+                            'discovered_at': server['discovered_at']
+                        })
+                
+                return {
+                    'success': True,
+                    'message': f'✅ Scan completed. Found {len(discovered)} SSH-accessible servers.',
+                    'discovered_count': len(discovered),
+                    'discovered_servers': self.dashboard_data.server_discovery.discovered_servers if self.dashboard_data and self.dashboard_data.server_discovery else {}
+                }
+            except Exception as e:
+                print(f"Error during network scan: {e}")
+                return {
+                    'success': False,
+                    'error': f'Scan failed: {str(e)}',
+                    'discovered_count': 0,
+                    'discovered_servers': {}
+                }
+        else:
+            # Fallback to old method
+            if self.dashboard_data and self.dashboard_data.server_discovery:
                 try:
-                    discovered = self.dashboard_data.network_scanner.quick_scan(network_range, username, max_ips=max_ips, start_ip=start_ip)
-                    print(f"Network scan completed. Found {len(discovered)} SSH-accessible servers.")
+                    discovered = self.dashboard_data.server_discovery.scan_network(on_result=on_server_found)
+                    print(f"Network scan completed. Found {len(discovered)} servers.")
                     
-                    # Update server discovery with results
-                    if self.dashboard_data and self.dashboard_data.server_discovery:
-                        for server in discovered:
-                            self.dashboard_data.server_discovery.discovered_servers[server['ip']] = {
-                                'status': 'discovered',
-                                'ssh_connected': False,
-                                'info': server,
-                                'discovered_at': server['discovered_at']
-                            }
-                    
-                    response = {
+                    return {
                         'success': True,
-                        'message': f'✅ Scan completed. Found {len(discovered)} SSH-accessible servers.',
+                        'message': f'✅ Scan completed. Found {len(discovered)} servers.',
                         'discovered_count': len(discovered),
-                        'discovered_servers': self.dashboard_data.server_discovery.discovered_servers if self.dashboard_data and self.dashboard_data.server_discovery else {}
+                        'discovered_servers': self.dashboard_data.server_discovery.discovered_servers
                     }
                 except Exception as e:
                     print(f"Error during network scan: {e}")
-                    response = {
+                    return {
                         'success': False,
                         'error': f'Scan failed: {str(e)}',
                         'discovered_count': 0,
                         'discovered_servers': {}
                     }
             else:
-                # Fallback to old method
-                if self.dashboard_data and self.dashboard_data.server_discovery:
-                    try:
-                        discovered = self.dashboard_data.server_discovery.scan_network()
-                        print(f"Network scan completed. Found {len(discovered)} servers.")
-                        
-                        response = {
-                            'success': True,
-                            'message': f'✅ Scan completed. Found {len(discovered)} servers.',
-                            'discovered_count': len(discovered),
-                            'discovered_servers': self.dashboard_data.server_discovery.discovered_servers
-                        }
-                    except Exception as e:
-                        print(f"Error during network scan: {e}")
-                        response = {
-                            'success': False,
-                            'error': f'Scan failed: {str(e)}',
-                            'discovered_count': 0,
-                            'discovered_servers': {}
-                        }
-                else:
-                    response = {
-                        'success': False,
-                        'error': 'Network scanner not available',
-                        'discovered_count': 0,
-                        'discovered_servers': {}
-                    }
+                return {
+                    'success': False,
+                    'error': 'Network scanner not available',
+                    'discovered_count': 0,
+                    'discovered_servers': {}
+                }
+    
+    def send_job_response(self, job, background):
+        """Reply with the job (202) in background mode, otherwise wait and reply with its result"""
+        if background:
+            status = 202
+            response = {'success': True, 'job_id': job['id'], 'status_url': f"/api/jobs/{job['id']}", 'job': job}
+        else:
+            status = 200
+            job = self.dashboard_data.jobs.wait(job)
+            if job['status'] == 'failed':
+                response = {'success': False, 'error': job['error']}
+            else:
+                response = job['result']
+        
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(json.dumps(response, default=str).encode('utf-8'))
+    
+    def send_collector_stats(self):
+        """Send collector latency, errors and drops, the depth of the result queue and the sampling interval of each server"""
+        try:
+            if not self.dashboard_data:
+                self.send_error(503, "Dashboard data not available")
+                return
+            response = {
+                'success': True,
+                'pipeline': self.dashboard_data.pipeline.stats(),
+                'sampling': self.dashboard_data.sampling.stats()
+            }
+            
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(json.dumps(response, default=str).encode('utf-8'))
+            
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def send_jobs(self, job_id=None):
+        """Send one background job (with its result) or the list of recent jobs"""
+        try:
+            if not self.dashboard_data:
+                self.send_error(503, "Dashboard data not available")
+                return
+            if job_id:
+                job = self.dashboard_data.jobs.get(job_id)
+                if not job:
+                    self.send_error(404, "Job not found")
+                    return
+                response = {'success': True, 'job': job}
+            else:
+                response = {'success': True, 'jobs': self.dashboard_data.jobs.list()}
             
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
@@ -893,7 +1174,7 @@ class DashboardHandler(BaseHTTPRequestHandler):
             self.send_error(500, str(e))
     
     def handle_connect_server(self):
-        """Handle server connection request"""
+        """Handle server connection request (runs as a background job, see handle_scan_network)"""
         try:
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
@@ -906,35 +1187,9 @@ class DashboardHandler(BaseHTTPRequestHandler):
             if not ip:
                 response = {'success': False, 'error': 'IP address is required'}
             elif self.dashboard_data and self.dashboard_data.server_discovery:
-                success = self.dashboard_data.server_discovery.connect_to_server(ip, username, password)
-                
-                # If connection successful, fetch server information
-                if success:
-                    try:
-                        # Get real-time system information
-                        system_info = self.dashboard_data.server_discovery._get_system_info(ip, username, password)
-                        if system_info:
-                            # Update the connected servers list with real-time data
-                            if ip in self.dashboard_data.server_discovery.connected_servers:
-                                self.dashboard_data.server_discovery.connected_servers[ip]['info'].update(system_info)
-                                self.dashboard_data.server_discovery.connected_servers[ip]['last_check'] = datetime.now().isoformat()
-                            print(f"✅ Successfully connected to {ip} and fetched real-time system info")
-                            print(f"   CPU: {system_info.get('cpu_percent', 0)}%, Memory: {system_info.get('memory_percent', 0)}%, Disk: {system_info.get('disk_percent', 0)}%")
-                            print(f"   Processes: {len(system_info.get('processes', []))}, Partitions: {len(system_info.get('disk_partitions', []))}")
-                        else:
-                            print(f"⚠️  Connected to {ip} but couldn't fetch real-time system info")
-                    except Exception as info_error:
-                        print(f"⚠️  Connected to {ip} but error fetching real-time info: {info_error}")
-                    
-                    # Also update the current server if this is the first connection
-                    if not self.dashboard_data.current_server or self.dashboard_data.current_server == '127.0.0.1':
-                        self.dashboard_data.set_current_server(ip)
-                        print(f"✅ Set {ip} as current server for resource details")
-                
-                response = {
-                    'success': success,
-                    'message': f"Connection {'successful' if success else 'failed'} to {ip}"
-                }
+                job = self.dashboard_data.jobs.submit('connect', self._run_connect, ip, username, password)
+                self.send_job_response(job, request_data.get('background', False))
+                return
             else:
                 response = {'success': False, 'error': 'Server discovery not available'}
             
@@ -947,6 +1202,39 @@ class DashboardHandler(BaseHTTPRequestHandler):
         except Exception as e:
             self.send_error(500, str(e))
     
+    def _run_connect(self, job, ip, username, password):
+        """Server connection job"""
+        job['progress']['ip'] = ip
+        success = self.dashboard_data.server_discovery.connect_to_server(ip, username, password)
+        
+        # If connection successful, fetch server information
+        if success:
+            try:
+                # Get real-time system information
+                system_info = self.dashboard_data.server_discovery._get_system_info(ip, username, password)
+                if system_info:
+                    # Update the connected servers list with real-time data
+                    if ip in self.dashboard_data.server_discovery.connected_servers:
+                        self.dashboard_data.server_discovery.connected_servers[ip]['info'].update(system_info)
+                        self.dashboard_data.server_discovery.connected_servers[ip]['last_check'] = datetime.now().isoformat()
+                    print(f"✅ Successfully connected to {ip} and fetched real-time system info")
+                    print(f"   CPU: {system_info.get('cpu_percent', 0)}%, Memory: {system_info.get('memory_percent', 0)}%, Disk: {system_info.get('disk_percent', 0)}%")
+                    print(f"   Processes: {len(system_info.get('processes', []))}, Partitions: {len(system_info.get('disk_partitions', []))}")
+                else:
+                    print(f"⚠️  Connected to {ip} but couldn't fetch real-time system info")
+            except Exception as info_error:
+                print(f"⚠️  Connected to {ip} but error fetching real-time info: {info_error}")
+            
+            # Also update the current server if this is the first connection
+            if not self.dashboard_data.current_server or self.dashboard_data.current_server == '127.0.0.1':
+                self.dashboard_data.set_current_server(ip)
+                print(f"✅ Set {ip} as current server for resource details")
+        
+        return {
+            'success': success,
+            'message': f"Connection {'successful' if success else 'failed'} to {ip}"
+        }
+    
     def handle_disconnect_server(self):
         """Handle server disconnection request"""
         try:
@@ -1838,6 +2126,8 @@ let chartData = {
     timestamps: []
 };
 let chartInitialized = false;
+let dashboardState = null; // Latest data from /api/stream
+let pollingTimer = null;
 let currentServer = 'LOCAL_IP'; // Default to local server - will be replaced dynamically
 
 // Initialize dashboard
@@ -1845,8 +2135,7 @@ document.addEventListener('DOMContentLoaded', function() {
     // Replace LOCAL_IP placeholder with actual local IP
     replaceLocalIPPlaceholder();
     
-    updateDashboard();
-    setInterval(updateDashboard, updateInterval);
+    connectEventStream();
     
     // Initialize chart after a short delay to ensure DOM is ready
     setTimeout(() => {
@@ -1921,6 +2210,56 @@ function changeServer() {
     });
 }
 
+// Live updates: the server sends the full data once, then only the fields that changed
+function connectEventStream() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    const source = new EventSource('/api/stream');
+    source.addEventListener('snapshot', (event) => {
+        dashboardState = JSON.parse(event.data);
+        renderDashboard(dashboardState);
+    });
+    source.addEventListener('patch', (event) => {
+        if (!dashboardState) {
+            return;
+        }
+        applyPatch(dashboardState, JSON.parse(event.data));
+        renderDashboard(dashboardState);
+    });
+    source.onerror = () => {
+        // EventSource reconnects on its own unless the server refused the stream
+        if (source.readyState === EventSource.CLOSED) {
+            startPolling();
+        }
+    };
+}
+
+function startPolling() {
+    if (!pollingTimer) {
+        updateDashboard();
+        pollingTimer = setInterval(updateDashboard, updateInterval);
+    }
+}
+
+// Apply JSON patch (RFC 6902) add/replace/remove operations in place
+function applyPatch(target, ops) {
+    for (const op of ops) {
+        const keys = op.path.split('/').slice(1).map(key => key.replace(/~1/g, '/').replace(/~0/g, '~'));
+        const last = keys.pop();
+        let parent = target;
+        for (const key of keys) {
+            parent = parent[key];
+        }
+        if (op.op === 'remove') {
+            delete parent[last];
+        } else {
+            parent[last] = op.value;
+        }
+    }
+}
+
 async function updateDashboard() {
     try {
         const response = await fetch('/api/data');
@@ -1931,6 +2270,16 @@ async function updateDashboard() {
             return;
         }
         
+        renderDashboard(data);
+    } catch (error) {
+        console.error('Error updating dashboard:', error);
+        document.getElementById('status').textContent = '🔴 Offline';
+        document.getElementById('status').className = 'status-indicator error';
+    }
+}
+
+function renderDashboard(data) {
+    try {
         updateStats(data);
         updateSystemInfo(data);
         updateProcessList(data);
@@ -1944,9 +2293,7 @@ async function updateDashboard() {
             'Last Update: ' + new Date().toLocaleTimeString();
         
     } catch (error) {
-        console.error('Error updating dashboard:', error);
-        document.getElementById('status').textContent = '🔴 Offline';
-        document.getElementById('status').className = 'status-indicator error';
+        console.error('Error rendering dashboard:', error);
     }
 }
 
@@ -2441,10 +2788,14 @@ async function startNetworkScan() {
                 network_range: networkRange,
                 username: sshUsername,
                 max_ips: maxIps,
-                start_ip: startIp
+                start_ip: startIp,
+                background: true
             })
         });
-        const result = await response.json();
+        const result = await waitForJob(await response.json(), (job) => {
+            const found = (job.progress.ssh_ports_open || []).length;
+            status.textContent = `🔍 Scanning network ${networkRange}.x... ${found} SSH ports open so far`;
+        });
         
         if (result.success) {
             status.textContent = result.message || `✅ Scan completed. Found ${result.discovered_count} servers.`;
@@ -2460,6 +2811,27 @@ async function startNetworkScan() {
     }
 }
 
+// Poll a background job until it finishes and return its result
+async function waitForJob(submitted, onProgress) {
+    if (!submitted.job_id) {
+        return submitted;
+    }
+    while (true) {
+        const response = await fetch(submitted.status_url);
+        const { job } = await response.json();
+        if (job.status === 'completed') {
+            return job.result;
+        }
+        if (job.status === 'failed') {
+            return { success: false, error: job.error };
+        }
+        if (onProgress) {
+            onProgress(job);
+        }
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
 async function stopNetworkScan() {
     try {
         await fetch('/api/stop-scan', { method: 'POST' });
@@ -2823,20 +3195,24 @@ def create_dashboard_handler(dashboard_data):
             super().__init__(*args, dashboard_data=dashboard_data, **kwargs)
     return Handler
 
-def start_dashboard(port=8005, host='localhost'):
+def start_dashboard(port=8005, host='localhost', max_workers=32):
     """Start the web dashboard"""
     dashboard_data = DashboardData()
     dashboard_data.start_monitoring()
     
     # Create handler with dashboard data
     handler_class = create_dashboard_handler(dashboard_data)
+    handler_class.load_assets()
     
     # Start server
-    server = HTTPServer((host, port), handler_class)
+    # Requests are served concurrently, so a slow scan or connect never blocks /api/data
+    server = BoundedThreadingHTTPServer((host, port), handler_class, max_workers=max_workers)
     
     print(f"🚀 Starting RHEL Resource Manager Dashboard...")
     print(f"📊 Dashboard URL: http://{host}:{port}")
-    print(f"⏱️  Auto-refresh: Every {dashboard_data.update_interval} seconds")
+    print(f"⏱️  Auto-refresh: Local metrics every {dashboard_data.COLLECTOR_INTERVALS['local']}s, "
+          f"connected servers every {dashboard_data.sampling.fast_interval}s while viewed or alerting, "
+          f"{dashboard_data.update_interval}s while active, backing off to {dashboard_data.sampling.max_interval}s when idle")
     print(f"🔄 Press Ctrl+C to stop")
     
     # Open browser
@@ -2860,10 +3236,11 @@ def main():
     parser = argparse.ArgumentParser(description='RHEL Resource Manager Web Dashboard')
     parser.add_argument('--port', type=int, default=8005, help='Port to run the dashboard on')
     parser.add_argument('--host', default='localhost', help='Host to bind to')
+    parser.add_argument('--max-workers', type=int, default=32, help='Maximum concurrent requests')
     
     args = parser.parse_args()
     
-    start_dashboard(args.port, args.host)
+    start_dashboard(args.port, args.host, args.max_workers)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file